@@ -0,0 +1 @@
+"""Benchmarks of nilearn, to be run with airspeed velocity (asv)."""
@@ -0,0 +1,125 @@
+"""Benchmarks of the first and second level GLM."""
+import numpy as np
+import pandas as pd
+
+from nilearn.glm import compute_contrast
+from nilearn.glm.first_level import FirstLevelModel, run_glm
+from nilearn.glm.second_level import SecondLevelModel
+from nilearn.image import iter_img
+
+from .common import (
+    N_SCANS,
+    autocorrelated_signals,
+    brain_data,
+    design_matrix,
+)
+
+
+class RunGLM:
+    """Fit a GLM on signals with run_glm."""
+
+    params = (["ols", "ar1", "ar2"], [10_000, 100_000])
+    param_names = ["noise_model", "n_voxels"]
+    timeout = 300
+
+    def setup(self, noise_model, n_voxels):
+        """Generate signals and a design matrix."""
+        self.Y = autocorrelated_signals(N_SCANS, n_voxels)
+        self.X = design_matrix(N_SCANS, n_regressors=10).values
+
+    def time_run_glm(self, noise_model, n_voxels):
+        """Time run_glm."""
+        run_glm(self.Y, self.X, noise_model=noise_model)
+
+    def peakmem_run_glm(self, noise_model, n_voxels):
+        """Measure the peak memory of run_glm."""
+        run_glm(self.Y, self.X, noise_model=noise_model)
+
+
+class ComputeContrast:
+    """Compute contrasts from the results of run_glm."""
+
+    params = (["ols", "ar1"], ["t", "F"])
+    param_names = ["noise_model", "contrast_type"]
+
+    def setup(self, noise_model, contrast_type):
+        """Fit a GLM."""
+        Y = autocorrelated_signals(N_SCANS, 50_000)
+        X = design_matrix(N_SCANS, n_regressors=10).values
+        self.labels, self.results = run_glm(Y, X, noise_model=noise_model)
+        self.contrast = (
+            np.eye(10)[:1] if contrast_type == "t" else np.eye(10)[:3]
+        )
+
+    def time_compute_contrast(self, noise_model, contrast_type):
+        """Time compute_contrast."""
+        compute_contrast(
+            self.labels,
+            self.results,
+            self.contrast,
+            contrast_type=contrast_type,
+        )
+
+
+class FirstLevelModelFit:
+    """Fit a FirstLevelModel on several runs of brain images."""
+
+    params = (["ols", "ar1"], [1, 4])
+    param_names = ["noise_model", "n_runs"]
+    timeout = 600
+
+    def setup(self, noise_model, n_runs):
+        """Generate runs of 4mm brain images and their design matrices."""
+        self.run_imgs = []
+        self.design_matrices = []
+        for run in range(n_runs):
+            run_img, self.mask_img = brain_data(
+                N_SCANS, resolution=4, random_state=run
+            )
+            self.run_imgs.append(run_img)
+            self.design_matrices.append(
+                design_matrix(N_SCANS, n_regressors=10, random_state=run)
+            )
+
+    def _fit(self, noise_model):
+        return FirstLevelModel(
+            mask_img=self.mask_img,
+            noise_model=noise_model,
+            minimize_memory=True,
+        ).fit(self.run_imgs, design_matrices=self.design_matrices)
+
+    def time_fit(self, noise_model, n_runs):
+        """Time FirstLevelModel.fit."""
+        self._fit(noise_model)
+
+    def peakmem_fit(self, noise_model, n_runs):
+        """Measure the peak memory of FirstLevelModel.fit."""
+        self._fit(noise_model)
+
+
+class SecondLevelModelFit:
+    """Fit a one-sample SecondLevelModel and compute its contrast."""
+
+    params = [20, 100]
+    param_names = ["n_subjects"]
+    timeout = 300
+
+    def setup(self, n_subjects):
+        """Generate one 4mm brain image per subject."""
+        imgs, self.mask_img = brain_data(n_subjects, resolution=4)
+        self.imgs = list(iter_img(imgs))
+        self.design_matrix = pd.DataFrame({"intercept": np.ones(n_subjects)})
+
+    def _fit(self):
+        model = SecondLevelModel(mask_img=self.mask_img).fit(
+            self.imgs, design_matrix=self.design_matrix
+        )
+        model.compute_contrast("intercept")
+
+    def time_fit(self, n_subjects):
+        """Time SecondLevelModel.fit and compute_contrast."""
+        self._fit()
+
+    def peakmem_fit(self, n_subjects):
+        """Measure the peak memory of SecondLevelModel.fit."""
+        self._fit()
@@ -0,0 +1,80 @@
+"""Benchmarks of the permutation tests of nilearn.mass_univariate."""
+import numpy as np
+from scipy.ndimage import generate_binary_structure
+
+from nilearn.maskers import NiftiMasker
+from nilearn.mass_univariate import permuted_ols
+from nilearn.mass_univariate._utils import _calculate_tfce
+
+from .common import RESOLUTIONS, brain_data
+
+# Number of subjects of a typical group analysis.
+N_SUBJECTS = 30
+
+
+def _smooth_brain_data(n_subjects, resolution):
+    """Generate smooth maps in a brain mask, to get realistic clusters."""
+    imgs, mask_img = brain_data(n_subjects, resolution)
+    masker = NiftiMasker(mask_img, smoothing_fwhm=8).fit()
+    return masker, masker.transform(imgs)
+
+
+class PermutedOLS:
+    """Perform a one-sample permutation test with permuted_ols."""
+
+    params = (["voxel", "cluster", "tfce"], RESOLUTIONS[:2])
+    param_names = ["inference", "resolution"]
+    timeout = 600
+
+    def setup(self, inference, resolution):
+        """Generate smooth maps for a group of subjects."""
+        self.masker, self.target_vars = _smooth_brain_data(
+            N_SUBJECTS, resolution
+        )
+        self.tested_vars = np.ones((N_SUBJECTS, 1))
+
+    def _permuted_ols(self, inference):
+        permuted_ols(
+            self.tested_vars,
+            self.target_vars,
+            model_intercept=False,
+            n_perm=100,
+            two_sided_test=True,
+            random_state=0,
+            masker=self.masker,
+            threshold=0.001 if inference == "cluster" else None,
+            tfce=inference == "tfce",
+            output_type="dict",
+        )
+
+    def time_permuted_ols(self, inference, resolution):
+        """Time permuted_ols."""
+        self._permuted_ols(inference)
+
+    def peakmem_permuted_ols(self, inference, resolution):
+        """Measure the peak memory of permuted_ols."""
+        self._permuted_ols(inference)
+
+
+class CalculateTFCE:
+    """Compute TFCE values of a t map."""
+
+    params = (RESOLUTIONS, [1, 3])
+    param_names = ["resolution", "connectivity"]
+
+    def setup(self, resolution, connectivity):
+        """Generate a smooth t map."""
+        masker, target_vars = _smooth_brain_data(N_SUBJECTS, resolution)
+        t_scores = (
+            target_vars.mean(axis=0)
+            / target_vars.std(axis=0)
+            * np.sqrt(N_SUBJECTS)
+        )
+        self.arr4d = masker.inverse_transform(t_scores).get_fdata()[
+            ..., np.newaxis
+        ]
+        self.bin_struct = generate_binary_structure(3, connectivity)
+
+    def time_calculate_tfce(self, resolution, connectivity):
+        """Time _calculate_tfce."""
+        _calculate_tfce(self.arr4d, self.bin_struct, two_sided_test=True)
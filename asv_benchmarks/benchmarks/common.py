@@ -0,0 +1,106 @@
+"""Synthetic data shared by the benchmarks.
+
+Data are generated with the helpers of :mod:`nilearn._utils.data_gen`,
+with sizes close to the ones of real datasets.
+"""
+import numpy as np
+import pandas as pd
+
+from nilearn._utils.data_gen import generate_mni_space_img, generate_timeseries
+
+# Number of scans of a typical fMRI run.
+N_SCANS = 200
+
+# Resolutions (in mm) of the brain images: 6k, 28k and 67k voxels
+# in the MNI152 brain mask.
+RESOLUTIONS = [8, 4, 3]
+
+
+def brain_data(n_scans, resolution, random_state=0):
+    """Generate random signals in the MNI152 brain mask.
+
+    Parameters
+    ----------
+    n_scans : :obj:`int`
+        Number of scans.
+
+    resolution : :obj:`int`
+        Resolution of the images, in mm.
+
+    random_state : :obj:`int`, default=0
+        Seed of the random number generator.
+
+    Returns
+    -------
+    img : :class:`nibabel.nifti1.Nifti1Image`
+        4D image of random signals.
+
+    mask_img : :class:`nibabel.nifti1.Nifti1Image`
+        Brain mask.
+    """
+    return generate_mni_space_img(
+        n_scans=n_scans,
+        res=resolution,
+        random_state=random_state,
+        mask_dilation=0,
+    )
+
+
+def design_matrix(n_scans, n_regressors, random_state=0):
+    """Generate a random design matrix with an intercept.
+
+    Parameters
+    ----------
+    n_scans : :obj:`int`
+        Number of scans.
+
+    n_regressors : :obj:`int`
+        Number of regressors, including the intercept.
+
+    random_state : :obj:`int`, default=0
+        Seed of the random number generator.
+
+    Returns
+    -------
+    design_matrix : :class:`pandas.DataFrame`
+        Design matrix, with an intercept as last column.
+    """
+    regressors = generate_timeseries(
+        n_scans, n_regressors - 1, random_state=random_state
+    )
+    design_matrix = pd.DataFrame(
+        regressors,
+        columns=[f"regressor_{i}" for i in range(n_regressors - 1)],
+    )
+    design_matrix["intercept"] = 1.0
+    return design_matrix
+
+
+def autocorrelated_signals(n_scans, n_voxels, random_state=0):
+    """Generate signals with a random AR(1) noise in each voxel.
+
+    Autocorrelation coefficients are spread across voxels, as in real data,
+    so that AR noise models use many bins.
+
+    Parameters
+    ----------
+    n_scans : :obj:`int`
+        Number of scans.
+
+    n_voxels : :obj:`int`
+        Number of voxels.
+
+    random_state : :obj:`int`, default=0
+        Seed of the random number generator.
+
+    Returns
+    -------
+    signals : :obj:`numpy.ndarray` of shape (n_scans, n_voxels)
+        Signals.
+    """
+    rng = np.random.RandomState(random_state)
+    signals = generate_timeseries(n_scans, n_voxels, random_state=rng)
+    rhos = rng.uniform(0, 0.6, n_voxels)
+    for t in range(1, n_scans):
+        signals[t] += rhos * signals[t - 1]
+    return signals
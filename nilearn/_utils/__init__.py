@@ -13,7 +13,7 @@ from nilearn._utils.helpers import (
     stringify_path,
 )
 
-from .cache_mixin import CacheMixin
+from .cache_mixin import CacheMixin, InMemoryCache
 from .docs import fill_doc
 from .logger import compose_err_msg
 from .niimg import _repr_niimgs, copy_img, load_niimg
@@ -217,6 +217,7 @@ __all__ = [
     "load_niimg",
     "as_ndarray",
     "CacheMixin",
+    "InMemoryCache",
     "compose_err_msg",
     "rename_parameters",
     "remove_parameters",
@@ -1,17 +1,300 @@
 """Mixin for cache with joblib."""
 # Author: Gael Varoquaux, Alexandre Abraham, Philippe Gervais
 
+import copy
+import inspect
 import os
+import sys
+import threading
 import warnings
+from collections import OrderedDict, namedtuple
 
+import joblib
+import numpy as np
 from joblib import Memory
-
-MEMORY_CLASSES = (Memory,)
+from nibabel.spatialimages import SpatialImage
 
 import nilearn
 
 from .helpers import stringify_path
 
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "n_results", "nbytes", "max_bytes"]
+)
+
+# number and size of the blocks of bytes read to fingerprint a file
+_N_SAMPLED_BLOCKS = 16
+_SAMPLED_BLOCK_SIZE = 4096
+
+
+def _file_fingerprint(path):
+    """Identify a file by its path, size, modification time and a sample \
+    of its bytes.
+
+    This is approximate: a modification which keeps the size and the
+    modification time of the file and leaves the sampled bytes unchanged
+    is not detected.
+
+    """
+    stat = os.stat(path)
+    with open(path, "rb") as file:
+        if stat.st_size <= _N_SAMPLED_BLOCKS * _SAMPLED_BLOCK_SIZE:
+            sample = [file.read()]
+        else:
+            sample = []
+            for offset in np.linspace(
+                0, stat.st_size - _SAMPLED_BLOCK_SIZE, _N_SAMPLED_BLOCKS
+            ).astype(int):
+                file.seek(offset)
+                sample.append(file.read(_SAMPLED_BLOCK_SIZE))
+    return (
+        "file",
+        os.path.abspath(path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        joblib.hash(sample),
+    )
+
+
+def _fingerprint(obj):
+    """Replace arrays, images and files in obj by fingerprints."""
+    if isinstance(obj, np.ndarray) and not isinstance(obj, np.ma.MaskedArray):
+        return "array", obj.shape, obj.dtype.str, joblib.hash(obj)
+    if isinstance(obj, SpatialImage):
+        if isinstance(obj.dataobj, np.ndarray) or obj.get_filename() is None:
+            data = _fingerprint(np.asanyarray(obj.dataobj))
+        else:
+            data = _file_fingerprint(obj.get_filename())
+        return (
+            "image",
+            type(obj).__name__,
+            joblib.hash(obj.header),
+            _fingerprint(obj.affine),
+            data,
+        )
+    if isinstance(obj, os.PathLike) or (
+        isinstance(obj, str) and os.path.isfile(obj)
+    ):
+        return _file_fingerprint(obj)
+    if isinstance(obj, (list, tuple)):
+        return type(obj).__name__, [_fingerprint(item) for item in obj]
+    if isinstance(obj, dict):
+        return "dict", [
+            (key, _fingerprint(value)) for key, value in obj.items()
+        ]
+    return obj
+
+
+def _nbytes(obj):
+    """Estimate the memory used by a cached result."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, SpatialImage):
+        return _nbytes(obj.dataobj) + sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(item) for item in obj) + sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sum(_nbytes(value) for value in obj.values()) + sys.getsizeof(
+            obj
+        )
+    return sys.getsizeof(obj)
+
+
+class _InMemoryResult:
+    """Result of a call, with the interface of joblib's MemorizedResult."""
+
+    def __init__(self, value):
+        self._value = value
+
+    def get(self):
+        return copy.deepcopy(self._value)
+
+
+class _InMemoryCachedFunc:
+    """Function whose results are stored in an InMemoryCache."""
+
+    def __init__(self, func, cache, ignore=None):
+        self.func = func
+        self.cache = cache
+        self.ignore = ignore or []
+        self.__name__ = getattr(func, "__name__", type(func).__name__)
+        try:
+            self._signature = inspect.signature(func)
+        except (TypeError, ValueError):
+            self._signature = None
+
+    def _key(self, args, kwargs):
+        if self._signature is None:
+            arguments = {"args": args, "kwargs": kwargs}
+        else:
+            bound = self._signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {
+                name: value
+                for name, value in bound.arguments.items()
+                if name not in self.ignore
+            }
+        return joblib.hash(
+            (
+                self.func,
+                _fingerprint(arguments),
+            )
+        )
+
+    def _call(self, args, kwargs):
+        key = self._key(args, kwargs)
+        found, value = self.cache._get(key)
+        if not found:
+            value = self.func(*args, **kwargs)
+            self.cache._put(key, value)
+        return value
+
+    def __call__(self, *args, **kwargs):
+        return copy.deepcopy(self._call(args, kwargs))
+
+    def call_and_shelve(self, *args, **kwargs):
+        return _InMemoryResult(self._call(args, kwargs))
+
+
+class InMemoryCache:
+    """Cache function results in the memory of the current process.
+
+    It can be given instead of a :class:`joblib.Memory` as the ``memory``
+    of nilearn estimators and functions, and is used depending on their
+    ``memory_level`` in the same way. Results are not written to disk.
+
+    Arrays given as arguments, and the data of in-memory images, are
+    identified by hashing their full content on every call, so that
+    arrays modified in place are detected: for large in-memory arrays,
+    this hashing is not cheaper than with :class:`joblib.Memory`, only the
+    disk input and output are avoided. Files, and images loaded from files,
+    are identified by their path, size, modification time and a sample of
+    their bytes, without reading them in full: this is approximate, and a
+    file modified without changing its size, modification time and sampled
+    bytes is not detected.
+
+    The least recently used results are discarded when their estimated
+    size exceeds ``max_bytes``.
+
+    Copies of the cache, e.g. made by :func:`sklearn.base.clone`, share
+    the results of the original cache. Pickled caches, e.g. sent to other
+    processes by ``n_jobs``, are empty when unpickled: results computed in
+    other processes are not cached in the current process.
+
+    .. versionadded:: 0.11.0
+
+    Parameters
+    ----------
+    max_bytes : :obj:`int`, default=1e9
+        Maximum total size of the cached results, in bytes. Results larger
+        than this are not cached.
+
+    verbose : :obj:`int`, default=0
+        Unused, accepted for compatibility with :class:`joblib.Memory`.
+
+    """
+
+    def __init__(self, max_bytes=int(1e9), verbose=0):
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+        self._results = OrderedDict()
+        self._nbytes = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ("_results", "_nbytes", "_lock", "_hits", "_misses"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def cache(self, func, ignore=None, **kwargs):
+        """Wrap a function so that its results are cached.
+
+        Parameters
+        ----------
+        func : callable
+            The function to cache.
+
+        ignore : :obj:`list` of :obj:`str`, optional
+            Names of arguments that do not change the result.
+
+        kwargs : keyword arguments, optional
+            Other arguments of :meth:`joblib.Memory.cache`, unused.
+
+        Returns
+        -------
+        cached_func : callable
+            Returns a copy of the cached result of ``func``.
+
+        """
+        return _InMemoryCachedFunc(func, self, ignore=ignore)
+
+    def _get(self, key):
+        with self._lock:
+            if key in self._results:
+                self._hits += 1
+                self._results.move_to_end(key)
+                return True, self._results[key]
+            self._misses += 1
+            return False, None
+
+    def _put(self, key, value):
+        nbytes = _nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self._results[key] = value
+            self._nbytes[key] = nbytes
+            while sum(self._nbytes.values()) > self.max_bytes:
+                old_key, _ = self._results.popitem(last=False)
+                del self._nbytes[old_key]
+
+    def cache_info(self):
+        """Return the numbers of hits and misses and the size of the cache.
+
+        Returns
+        -------
+        info : :obj:`~collections.namedtuple`
+            With fields ``hits``, ``misses``, ``n_results``, ``nbytes``
+            and ``max_bytes``.
+
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                len(self._results),
+                sum(self._nbytes.values()),
+                self.max_bytes,
+            )
+
+    def cache_clear(self):
+        """Discard all the cached results and statistics."""
+        with self._lock:
+            self._results.clear()
+            self._nbytes.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}(max_bytes={self.max_bytes})"
+
+
+MEMORY_CLASSES = (Memory, InMemoryCache)
+
+
+def _stores_results(memory):
+    """Whether a memory object actually caches results."""
+    return not isinstance(memory, Memory) or memory.location is not None
+
 
 def _check_memory(memory, verbose=0):
     """Ensure an instance of a joblib.Memory object.
@@ -154,12 +437,12 @@ def cache(
             memory = Memory(location=memory, verbose=verbose)
         if not isinstance(memory, MEMORY_CLASSES):
             raise TypeError(
-                "'memory' argument must be a string or a "
-                "joblib.Memory object. "
+                "'memory' argument must be a string, a "
+                "joblib.Memory or an InMemoryCache object. "
                 f"{memory} {type(memory)} was given."
             )
         if (
-            memory.location is None
+            not _stores_results(memory)
             and memory_level is not None
             and memory_level > 1
         ):
@@ -236,7 +519,7 @@ class CacheMixin:
 
         # If cache level is 0 but a memory object has been provided, set
         # memory_level to 1 with a warning.
-        if self.memory_level == 0 and self.memory.location is not None:
+        if self.memory_level == 0 and _stores_results(self.memory):
             warnings.warn(
                 "memory_level is currently set to 0 but "
                 "a Memory object has been provided. "
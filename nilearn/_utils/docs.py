@@ -626,6 +626,8 @@ memory : instance of :class:`joblib.Memory`, :obj:`str`, or \
     Used to cache the masking process.
     By default, no caching is done.
     If a :obj:`str` is given, it is the path to the caching directory.
+    An ``InMemoryCache`` from ``nilearn._utils`` keeps the results in the
+    memory of the current process instead.
 """
 
 # memory_level
@@ -130,7 +130,9 @@ def load_niimg(niimg, dtype=None):
             + _repr_niimgs(niimg, shorten=True)
         )
 
-    dtype = _get_target_dtype(_get_data(niimg).dtype, dtype)
+    if dtype is not None:
+        # Only load the data when a conversion may be needed
+        dtype = _get_target_dtype(_get_data(niimg).dtype, dtype)
 
     if dtype is not None:
         # Copyheader and set dtype in header if header exists
@@ -1,13 +1,19 @@
 """Test the _utils.cache_mixin module."""
 import os
+import pickle
 import shutil
 from pathlib import Path
 
+import numpy as np
 import pytest
 from joblib import Memory
+from nibabel import Nifti1Image
+from sklearn.base import clone
 
 import nilearn
 from nilearn._utils import CacheMixin, cache_mixin
+from nilearn.image import get_data, load_img
+from nilearn.maskers import MultiNiftiMasker, NiftiMasker
 
 
 def _get_subdirs(top_dir):
@@ -147,3 +153,129 @@ def test_cache_shelving(tmp_path):
     res = cache_mixin.cache(f, mem, shelve=True)(2)
     assert res.get() == 2
     assert len(_get_subdirs(joblib_dir)) == 1
+
+
+def g(x, verbose=0):
+    # A simple test function returning an array
+    return np.asarray(x) * 2
+
+
+def _sum_data(img):
+    return get_data(img).sum()
+
+
+def test_in_memory_cache():
+    mem = cache_mixin.InMemoryCache()
+    cached_g = cache_mixin.cache(g, mem, ignore=["verbose"])
+    x = np.arange(5.0)
+
+    result = cached_g(x)
+    np.testing.assert_array_equal(result, g(x))
+    # the result is a copy, modifying it does not change the cache
+    result[0] = 100
+    np.testing.assert_array_equal(cached_g(x.copy(), verbose=1), g(x))
+    assert mem.cache_info()[:3] == (1, 1, 1)
+
+    # arrays modified in place are detected
+    x[0] = 1
+    np.testing.assert_array_equal(cached_g(x), g(x))
+    assert mem.cache_info()[:3] == (1, 2, 2)
+
+    res = cache_mixin.cache(g, mem, shelve=True, ignore=["verbose"])(x)
+    np.testing.assert_array_equal(res.get(), g(x))
+    assert mem.cache_info().hits == 2
+
+    # even when they are modified on a single element
+    cached_sum = mem.cache(np.sum)
+    x = np.zeros((100, 100, 100))
+    assert cached_sum(x) == 0
+    x[50, 50, 51] = 7
+    assert cached_sum(x) == 7
+
+    mem.cache_clear()
+    assert mem.cache_info()[:4] == (0, 0, 0, 0)
+
+
+def test_in_memory_cache_max_bytes():
+    mem = cache_mixin.InMemoryCache(max_bytes=6000)
+    cached_g = mem.cache(g)
+    for n in [100, 200, 300, 400, 1000]:
+        cached_g(np.ones(n))
+    info = mem.cache_info()
+    # only the results for 300 and 400 elements fit in the cache
+    assert info.n_results == 2
+    assert info.nbytes == 5600
+    cached_g(np.ones(300))
+    assert mem.cache_info().hits == 1
+    cached_g(np.ones(100))
+    assert mem.cache_info().hits == 1
+
+
+def test_in_memory_cache_images(tmp_path):
+    mem = cache_mixin.InMemoryCache()
+    cached_get_data = mem.cache(get_data)
+    data = np.arange(24.0).reshape((2, 3, 4))
+    img = Nifti1Image(data, np.eye(4))
+
+    cached_get_data(img)
+    cached_get_data(Nifti1Image(data.copy(), np.eye(4)))
+    assert mem.cache_info()[:2] == (1, 1)
+    cached_get_data(Nifti1Image(data, 2 * np.eye(4)))
+    assert mem.cache_info()[:2] == (1, 2)
+
+    img_path = tmp_path / "img.nii.gz"
+    img.to_filename(img_path)
+    cached_get_data(str(img_path))
+    cached_get_data(img_path)
+    cached_get_data(load_img(img_path))
+    assert mem.cache_info()[:2] == (2, 4)
+    # files are identified by their size, modification time and bytes
+    cached_sum = mem.cache(_sum_data)
+    img_path = tmp_path / "img.nii"
+    img.to_filename(img_path)
+    assert cached_sum(img_path) == data.sum()
+    stat = os.stat(img_path)
+    Nifti1Image(2 * data, np.eye(4)).to_filename(img_path)
+    os.utime(img_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(img_path).st_size == stat.st_size
+    assert cached_sum(img_path) == 2 * data.sum()
+
+
+def test_in_memory_cache_copy_and_pickle():
+    mem = cache_mixin.InMemoryCache(max_bytes=10000)
+    mem.cache(g)(np.ones(3))
+
+    # clones of estimators share the cache
+    masker = clone(NiftiMasker(memory=mem))
+    assert masker.memory is mem
+
+    # unpickled caches are empty
+    unpickled = pickle.loads(pickle.dumps(mem))
+    assert unpickled.max_bytes == 10000
+    assert unpickled.cache_info()[:4] == (0, 0, 0, 0)
+    unpickled.cache(g)(np.ones(3))
+    assert mem.cache_info()[:3] == (0, 1, 1)
+
+
+def test_in_memory_cache_parallel_masker(rng):
+    mem = cache_mixin.InMemoryCache()
+    img = Nifti1Image(rng.standard_normal((5, 5, 5, 4)), np.eye(4))
+    mask = Nifti1Image(np.ones((5, 5, 5), dtype="int8"), np.eye(4))
+
+    signals = MultiNiftiMasker(
+        mask, memory=mem, memory_level=1, n_jobs=2
+    ).fit_transform([img, img])
+
+    assert len(signals) == 2
+    np.testing.assert_array_equal(signals[0], signals[1])
+    assert signals[0].shape == (4, 125)
+
+
+def test_cache_mixin_in_memory_cache():
+    mem = cache_mixin.InMemoryCache()
+    mixin_mock = CacheMixinTest(mem, memory_level=0)
+    with pytest.warns(UserWarning, match="Setting memory_level to 1"):
+        mixin_mock._cache(f)(2)
+    assert mixin_mock.memory is mem
+    assert mixin_mock.memory_level == 1
+    assert mem.cache_info().misses == 1
@@ -1,16 +1,19 @@
 """Connectivity matrices."""
 
+import functools
 import warnings
 from math import floor, sqrt
 
 import numpy as np
+import sklearn
 from scipy import linalg
 from sklearn.base import BaseEstimator, TransformerMixin, clone
-from sklearn.covariance import LedoitWolf
+from sklearn.covariance import OAS, EmpiricalCovariance, LedoitWolf
 
 from nilearn._utils.docs import fill_doc
 
 from .. import signal
+from .._utils import compare_version
 from .._utils.extmath import is_spd
 
 
@@ -43,6 +46,10 @@ def _check_spd(matrix):
         raise ValueError("Expected a symmetric positive definite matrix.")
 
 
+# maximal number of elements in the stacks of matrices processed at once
+_CHUNK_N_ELEMENTS = 2**23
+
+
 def _form_symmetric(function, eigenvalues, eigenvectors):
     """Return the symmetric matrix with the given eigenvectors and \
     eigenvalues transformed by function.
@@ -52,20 +59,23 @@ def _form_symmetric(function, eigenvalues, eigenvectors):
     function : function numpy.ndarray -> numpy.ndarray
         The transform to apply to the eigenvalues.
 
-    eigenvalues : numpy.ndarray, shape (n_features, )
+    eigenvalues : numpy.ndarray, shape (..., n_features)
         Input argument of the function.
 
-    eigenvectors : numpy.ndarray, shape (n_features, n_features)
+    eigenvectors : numpy.ndarray, shape (..., n_features, n_features)
         Unitary matrix.
 
     Returns
     -------
-    output : numpy.ndarray, shape (n_features, n_features)
+    output : numpy.ndarray, shape (..., n_features, n_features)
         The symmetric matrix obtained after transforming the eigenvalues, while
         keeping the same eigenvectors.
 
     """
-    return np.dot(eigenvectors * function(eigenvalues), eigenvectors.T)
+    return np.matmul(
+        eigenvectors * function(eigenvalues)[..., np.newaxis, :],
+        np.swapaxes(eigenvectors, -1, -2),
+    )
 
 
 def _map_eigenvalues(function, symmetric):
@@ -78,12 +88,12 @@ def _map_eigenvalues(function, symmetric):
     function : function numpy.ndarray -> numpy.ndarray
         The transform to apply to the eigenvalues.
 
-    symmetric : numpy.ndarray, shape (n_features, n_features)
-        The input symmetric matrix.
+    symmetric : numpy.ndarray, shape (..., n_features, n_features)
+        The input symmetric matrix, or a stack of them.
 
     Returns
     -------
-    output : numpy.ndarray, shape (n_features, n_features)
+    output : numpy.ndarray, shape (..., n_features, n_features)
         The new symmetric matrix obtained after transforming the eigenvalues,
         while keeping the same eigenvectors.
 
@@ -93,11 +103,134 @@ def _map_eigenvalues(function, symmetric):
     be wrong.
 
     """
-    eigenvalues, eigenvectors = linalg.eigh(symmetric)
+    eigenvalues, eigenvectors = np.linalg.eigh(symmetric)
     return _form_symmetric(function, eigenvalues, eigenvectors)
 
 
-def _geometric_mean(matrices, init=None, max_iter=10, tol=1e-7):
+def _chunks(n_matrices, n_features):
+    """Split matrices in chunks of bounded size."""
+    chunk_size = max(1, _CHUNK_N_ELEMENTS // n_features**2)
+    for start in range(0, n_matrices, chunk_size):
+        yield slice(start, start + chunk_size)
+
+
+def _whitened_logs(matrices, whitening, dtype=np.float64):
+    """Compute the logarithms of whitened matrices, by chunks.
+
+    Parameters
+    ----------
+    matrices : sequence of numpy.ndarray, all of shape \
+        (n_features, n_features)
+        Symmetric positive definite matrices.
+
+    whitening : numpy.ndarray, shape (n_features, n_features)
+        The whitening matrix W, such that the logarithms of W M W are
+        computed for each matrix M.
+
+    dtype : numpy dtype, default=np.float64
+        Precision of the computations.
+
+    Yields
+    ------
+    chunk : slice
+        The matrices in the chunk.
+
+    logs : numpy.ndarray, shape (n_matrices_in_chunk, n_features, n_features)
+        Logarithms of the whitened matrices in the chunk.
+
+    """
+    whitening = whitening.astype(dtype, copy=False)
+    for chunk in _chunks(len(matrices), whitening.shape[0]):
+        whitened = whitening @ np.asarray(matrices[chunk], dtype=dtype)
+        whitened = whitened @ whitening
+        yield chunk, _map_eigenvalues(np.log, whitened)
+
+
+def _sum_whitened_logs(
+    matrices, gmean, vals_gmean, vecs_gmean, dtype, weights=None
+):
+    """Compute the sum of the logarithms of matrices whitened by gmean.
+
+    The matrices are whitened by chunks with the Cholesky factor L of gmean,
+    which takes triangular solves instead of matrix products. The sum of the
+    logarithms of L^-1 M L^-T is formed with two symmetric rank-k updates
+    and rotated back to the whitening by gmean^-1/2.
+
+    Parameters
+    ----------
+    matrices : sequence of numpy.ndarray, all of shape \
+        (n_features, n_features)
+        Symmetric positive definite matrices.
+
+    gmean : numpy.ndarray, shape (n_features, n_features)
+        Symmetric positive definite whitening matrix.
+
+    vals_gmean, vecs_gmean : numpy.ndarray
+        Eigenvalues and eigenvectors of gmean.
+
+    dtype : numpy dtype
+        Precision of the whitening and of the eigendecompositions.
+
+    weights : numpy.ndarray, shape (n_matrices,), optional
+        Positive weights of the matrices in the sum. Default to ones.
+
+    Returns
+    -------
+    logs_sum : numpy.ndarray, shape (n_features, n_features)
+        Weighted sum of log(gmean^-1/2 M gmean^-1/2) over the matrices.
+
+    """
+    n_features = gmean.shape[0]
+    cholesky = linalg.cholesky(gmean, lower=True)
+    cholesky_dtype = cholesky.astype(dtype)
+    logs_sum = np.zeros((n_features, n_features))
+    for chunk in _chunks(len(matrices), n_features):
+        stack = np.asarray(matrices[chunk], dtype=dtype)
+        n_chunk = stack.shape[0]
+        # L^-1 M, for all the matrices of the chunk side by side
+        whitened = linalg.solve_triangular(
+            cholesky_dtype,
+            stack.transpose(1, 0, 2).reshape(n_features, -1),
+            lower=True,
+        )
+        # L^-1 (L^-1 M)^T = L^-1 M L^-T, as M is symmetric
+        whitened = linalg.solve_triangular(
+            cholesky_dtype,
+            whitened.reshape(n_features, n_chunk, n_features)
+            .transpose(2, 1, 0)
+            .reshape(n_features, -1),
+            lower=True,
+        )
+        eigenvalues, eigenvectors = np.linalg.eigh(
+            whitened.reshape(n_features, n_chunk, n_features).transpose(
+                1, 0, 2
+            )
+        )
+        logs = np.log(eigenvalues)
+        if np.any(np.isnan(logs)):
+            raise FloatingPointError("Nan value after logarithm operation.")
+        if weights is not None:
+            logs *= weights[chunk, np.newaxis]
+        logs = logs.ravel()
+        # sum of V diag(logs) V^T as P P^T - N N^T, where P and N gather
+        # the eigenvectors of positive and negative logarithms
+        eigenvectors = eigenvectors.transpose(1, 0, 2).reshape(n_features, -1)
+        positive = eigenvectors[:, logs > 0] * np.sqrt(logs[logs > 0])
+        negative = eigenvectors[:, logs < 0] * np.sqrt(-logs[logs < 0])
+        logs_sum += positive @ positive.T
+        logs_sum -= negative @ negative.T
+
+    # L = gmean^1/2 R with R orthogonal, so that
+    # log(gmean^-1/2 M gmean^-1/2) = R log(L^-1 M L^-T) R^T
+    rotation = (
+        _form_symmetric(np.sqrt, 1.0 / vals_gmean, vecs_gmean) @ cholesky
+    )
+    return rotation @ logs_sum @ rotation.T
+
+
+def _geometric_mean(
+    matrices, init=None, max_iter=10, tol=1e-7, dtype=np.float64, weights=None
+):
     """Compute the geometric mean of symmetric positive definite matrices.
 
     The geometric mean of n positive definite matrices
@@ -137,6 +270,15 @@ def _geometric_mean(matrices, init=None, max_iter=10, tol=1e-7):
         this value, the gradient descent is stopped. If None, no  check is
         performed.
 
+    dtype : numpy dtype, default=np.float64
+        Precision of the whitening and of the eigendecompositions of the
+        whitened matrices, which are computed by chunks of stacked matrices.
+        The mean and the gradient are always accumulated in float64.
+
+    weights : numpy.ndarray, shape (n_matrices,), optional
+        Positive weights of the matrices, to compute a weighted geometric
+        mean. Default to ones.
+
     Returns
     -------
     gmean : numpy.ndarray, shape (n_features, n_features)
@@ -152,9 +294,17 @@ def _geometric_mean(matrices, init=None, max_iter=10, tol=1e-7):
         _check_spd(matrix)
 
     # Initialization
-    matrices = np.array(matrices)
+    n_matrices = len(matrices)
+    if weights is None:
+        weights = np.ones(n_matrices)
+    weights = np.asarray(weights, dtype=float)
     if init is None:
-        gmean = np.mean(matrices, axis=0)
+        gmean = np.zeros((n_features, n_features))
+        for chunk in _chunks(n_matrices, n_features):
+            gmean += np.tensordot(
+                weights[chunk], np.asarray(matrices[chunk]), axes=1
+            )
+        gmean /= weights.sum()
     else:
         _check_square(init)
         if init.shape[0] != n_features:
@@ -169,14 +319,13 @@ def _geometric_mean(matrices, init=None, max_iter=10, tol=1e-7):
     for _ in range(max_iter):
         # Computation of the gradient
         vals_gmean, vecs_gmean = linalg.eigh(gmean)
-        gmean_inv_sqrt = _form_symmetric(np.sqrt, 1.0 / vals_gmean, vecs_gmean)
-        whitened_matrices = [
-            gmean_inv_sqrt.dot(matrix).dot(gmean_inv_sqrt)
-            for matrix in matrices
-        ]
-        logs = [_map_eigenvalues(np.log, w_mat) for w_mat in whitened_matrices]
+        logs_mean = (
+            _sum_whitened_logs(
+                matrices, gmean, vals_gmean, vecs_gmean, dtype, weights
+            )
+            / weights.sum()
+        )
         # Covariant derivative is - gmean.dot(logms_mean)
-        logs_mean = np.mean(logs, axis=0)
         if np.any(np.isnan(logs_mean)):
             raise FloatingPointError("Nan value after logarithm operation.")
 
@@ -331,44 +480,174 @@ def vec_to_sym_matrix(vec, diagonal=None):
 def cov_to_corr(covariance):
     """Return correlation matrix for a given covariance matrix.
 
+    Acts on the last two dimensions of the array if not 2-dimensional.
+
     Parameters
     ----------
-    covariance : 2D numpy.ndarray
+    covariance : numpy.ndarray, shape (..., n_features, n_features)
         The input covariance matrix.
 
     Returns
     -------
-    correlation : 2D numpy.ndarray
+    correlation : numpy.ndarray, shape (..., n_features, n_features)
         The output correlation matrix.
 
     """
-    diagonal = np.atleast_2d(1.0 / np.sqrt(np.diag(covariance)))
-    correlation = covariance * diagonal * diagonal.T
+    diagonal = 1.0 / np.sqrt(np.diagonal(covariance, axis1=-2, axis2=-1))
+    correlation = (
+        covariance * diagonal[..., np.newaxis, :] * diagonal[..., np.newaxis]
+    )
 
     # Force exact 1. on diagonal
-    np.fill_diagonal(correlation, 1.0)
+    np.einsum("...ii->...i", correlation)[...] = 1.0
     return correlation
 
 
 def prec_to_partial(precision):
     """Return partial correlation matrix for a given precision matrix.
 
+    Acts on the last two dimensions of the array if not 2-dimensional.
+
     Parameters
     ----------
-    precision : 2D numpy.ndarray
+    precision : numpy.ndarray, shape (..., n_features, n_features)
         The input precision matrix.
 
     Returns
     -------
-    partial_correlation : 2D numpy.ndarray
-        The 2D output partial correlation matrix.
+    partial_correlation : numpy.ndarray, shape (..., n_features, n_features)
+        The output partial correlation matrix.
 
     """
     partial_correlation = -cov_to_corr(precision)
-    np.fill_diagonal(partial_correlation, 1.0)
+    np.einsum("...ii->...i", partial_correlation)[...] = 1.0
     return partial_correlation
 
 
+def _inv_spd(matrices):
+    """Invert a stack of symmetric positive definite matrices.
+
+    The inverses are computed from the Cholesky factorizations, and are
+    exactly symmetric. Matrices which are not positive definite are
+    inverted with their LU factorization.
+
+    """
+    potrf, potri = linalg.get_lapack_funcs(("potrf", "potri"), (matrices,))
+    inverses = np.empty_like(matrices)
+    for matrix, inverse in zip(matrices, inverses):
+        factor, info = potrf(matrix, lower=True, clean=False)
+        if info == 0:
+            lower_inverse, info = potri(factor, lower=True)
+        if info != 0:
+            inverse[...] = linalg.inv(matrix)
+            continue
+        # potri only computes the lower triangle of the inverse
+        inverse[...] = np.tril(lower_inverse)
+        inverse += np.tril(lower_inverse, k=-1).T
+    return inverses
+
+
+def _shrinkages(estimator, covariances, centered):
+    """Compute the shrinkages of LedoitWolf and OAS for stacked subjects.
+
+    The formulas are those of scikit-learn, computed from the empirical
+    covariances and the centered time series of the subjects.
+
+    """
+    n_subjects, n_samples, n_features = centered.shape
+    trace = np.trace(covariances, axis1=1, axis2=2)
+    mu = trace / n_features
+    squares_sum = (covariances**2).sum(axis=(1, 2))
+    if isinstance(estimator, OAS):
+        alpha = squares_sum / n_features**2
+        num = alpha + mu**2
+        den = (n_samples + 1) * (alpha - mu**2 / n_features)
+        shrinkage = np.divide(num, den, out=np.ones_like(num), where=den != 0)
+        return mu, np.minimum(shrinkage, 1.0)
+
+    if n_features == 1:
+        return mu, np.zeros(n_subjects)
+    # sum of the coefficients of <X2.T, X2>: sum over samples of squared
+    # squared norms
+    beta_ = (np.einsum("kij,kij->ki", centered, centered) ** 2).sum(axis=1)
+    beta = (beta_ / n_samples - squares_sum) / (n_features * n_samples)
+    delta = (
+        squares_sum - 2.0 * mu * trace + n_features * mu**2
+    ) / n_features
+    beta = np.minimum(beta, delta)
+    shrinkage = np.divide(
+        beta, delta, out=np.zeros_like(beta), where=beta != 0
+    )
+    return mu, shrinkage
+
+
+def _covariance_chunks(estimator, X, preprocess=None):
+    """Compute the covariances of the subjects, by chunks.
+
+    For the EmpiricalCovariance, LedoitWolf and OAS estimators, subjects
+    with the same number of samples are stacked, a chunk at a time, in a
+    workspace where they are centered, and their covariances are computed
+    with a batched matrix product. They are the same as those estimated by
+    the estimator, up to rounding errors. Other estimators are fitted to
+    each subject.
+
+    Parameters
+    ----------
+    estimator : covariance estimator
+        The covariance estimator.
+
+    X : list of numpy.ndarray, shape for each (n_samples, n_features)
+        The input subjects time series.
+
+    preprocess : callable, optional
+        Function applied to the time series of each subject before the
+        estimation of its covariance.
+
+    Yields
+    ------
+    indices : list of int
+        Indices of the subjects of the chunk.
+
+    covariances : numpy.ndarray, shape (len(indices), n_features, n_features)
+        Covariances of the subjects of the chunk.
+
+    """
+    batched = type(estimator) in (EmpiricalCovariance, LedoitWolf) or (
+        type(estimator) is OAS
+        and compare_version(sklearn.__version__, ">=", "1.3")
+    )
+    groups = {}
+    for k, x in enumerate(X):
+        if not batched or x.shape[0] < 2:
+            x = x if preprocess is None else preprocess(x)
+            yield [k], estimator.fit(x).covariance_[np.newaxis]
+            continue
+        dtype = x.dtype if x.dtype.kind == "f" else np.dtype(np.float64)
+        groups.setdefault((x.shape, dtype), []).append(k)
+
+    for ((n_samples, n_features), dtype), indices in groups.items():
+        chunk_size = max(1, _CHUNK_N_ELEMENTS // (n_samples * n_features))
+        workspace = np.empty(
+            (min(chunk_size, len(indices)), n_samples, n_features), dtype
+        )
+        for start in range(0, len(indices), chunk_size):
+            chunk = indices[start : start + chunk_size]
+            centered = workspace[: len(chunk)]
+            for k, x in zip(chunk, centered):
+                x[...] = X[k] if preprocess is None else preprocess(X[k])
+                if not estimator.assume_centered:
+                    x -= x.mean(axis=0)
+            covariances = np.matmul(centered.transpose((0, 2, 1)), centered)
+            covariances /= n_samples
+            if type(estimator) is not EmpiricalCovariance:
+                mu, shrinkage = _shrinkages(estimator, covariances, centered)
+                covariances *= (1.0 - shrinkage)[:, np.newaxis, np.newaxis]
+                np.einsum("kii->ki", covariances)[...] += (shrinkage * mu)[
+                    :, np.newaxis
+                ]
+            yield chunk, covariances
+
+
 @fill_doc
 class ConnectivityMeasure(BaseEstimator, TransformerMixin):
     """A class that computes different kinds of \
@@ -406,6 +685,14 @@ class ConnectivityMeasure(BaseEstimator, TransformerMixin):
             deprecated. This parameter will be deprecated in version 0.13 and
             removed in version 0.15.
 
+    dtype : {np.float64, np.float32}, default=np.float64
+        Precision of the eigendecompositions used for the "tangent" kind,
+        which are computed by chunks of stacked matrices. float32 halves the
+        memory used, at the cost of errors of about 1e-6 on the tangent
+        space coordinates. Unused for the other kinds.
+
+        .. versionadded:: 0.11.0
+
     Attributes
     ----------
     cov_estimator_ : estimator object
@@ -421,6 +708,12 @@ class ConnectivityMeasure(BaseEstimator, TransformerMixin):
     whitening_ : numpy.ndarray
         The inverted square-rooted geometric mean of the covariance matrices.
 
+    n_subjects_seen_ : int
+        The number of subjects the mean was computed on, across calls to
+        :meth:`partial_fit`.
+
+        .. versionadded:: 0.11.0
+
     References
     ----------
     .. footbibliography::
@@ -434,12 +727,14 @@ class ConnectivityMeasure(BaseEstimator, TransformerMixin):
         vectorize=False,
         discard_diagonal=False,
         standardize=True,
+        dtype=np.float64,
     ):
         self.cov_estimator = cov_estimator
         self.kind = kind
         self.vectorize = vectorize
         self.discard_diagonal = discard_diagonal
         self.standardize = standardize
+        self.dtype = dtype
 
     def _check_input(self, X, confounds=None):
         if not hasattr(X, "__iter__"):
@@ -449,7 +744,7 @@ class ConnectivityMeasure(BaseEstimator, TransformerMixin):
             )
 
         subjects_types = [type(s) for s in X]
-        if set(subjects_types) != {np.ndarray}:
+        if not all(isinstance(s, np.ndarray) for s in X):
             raise ValueError(
                 "Each subject must be 2D numpy.ndarray.\n "
                 f"You provided {subjects_types}"
@@ -494,94 +789,171 @@ class ConnectivityMeasure(BaseEstimator, TransformerMixin):
         self._fit_transform(X, do_fit=True)
         return self
 
+    def partial_fit(self, X, y=None):
+        """Update the mean connectivity with a batch of subjects.
+
+        The mean is updated as if all the subjects given to successive
+        calls had been given to :meth:`fit` at once. For the "tangent" kind,
+        the geometric mean is warm-started from the current mean, which
+        stands for the previous subjects, so that they need not be kept or
+        processed again. This is an approximation, which is exact when the
+        covariance matrices commute.
+
+        .. versionadded:: 0.11.0
+
+        Parameters
+        ----------
+        X : list of numpy.ndarray, shape for each (n_samples, n_features)
+            The input time series of the subjects in the batch. The number
+            of samples may differ from one subject to another. The arrays
+            can be memory-mapped.
+
+        Returns
+        -------
+        self : ConnectivityMatrix instance
+            The object itself. Useful for chaining operations.
+
+        """
+        self._fit_transform(X, do_fit=True, partial=True)
+        return self
+
     def _fit_transform(
-        self, X, do_transform=False, do_fit=False, confounds=None
+        self,
+        X,
+        do_transform=False,
+        do_fit=False,
+        confounds=None,
+        partial=False,
     ):
         """Avoid duplication of computation."""
         self._check_input(X, confounds=confounds)
-        if do_fit:
+        allowed_kinds = (
+            "correlation",
+            "partial correlation",
+            "tangent",
+            "covariance",
+            "precision",
+        )
+        if self.kind not in allowed_kinds:
+            raise ValueError(
+                f"Allowed connectivity kinds are {allowed_kinds}. "
+                f"Got kind {self.kind}."
+            )
+        if do_transform and confounds is not None and not self.vectorize:
+            error_message = (
+                "'confounds' are provided but vectorize=False. "
+                "Confounds are only cleaned on vectorized matrices "
+                "as second level connectome regression "
+                "but not on symmetric matrices."
+            )
+            raise ValueError(error_message)
+
+        n_subjects_seen = (
+            getattr(self, "n_subjects_seen_", 0) if partial else 0
+        )
+        if do_fit and not n_subjects_seen:
             self.cov_estimator_ = clone(self.cov_estimator)
 
-        # Compute all the matrices, stored in "connectivities"
+        preprocess = None
         if self.kind == "correlation":
-            covariances_std = [
-                self.cov_estimator_.fit(
-                    signal._standardize(
-                        x,
-                        detrend=False,
-                        standardize=self.standardize,
-                    )
-                ).covariance_
-                for x in X
-            ]
-            connectivities = [cov_to_corr(cov) for cov in covariances_std]
-        else:
-            covariances = [self.cov_estimator_.fit(x).covariance_ for x in X]
+            preprocess = functools.partial(
+                signal._standardize,
+                detrend=False,
+                standardize=self.standardize,
+            )
+        # Matrices of all subjects are kept only when needed, vectorized if
+        # they are returned as vectors.
+        keep = do_transform or self.kind == "tangent"
+        vectorize = do_transform and self.vectorize and self.kind != "tangent"
+        dtype = np.result_type(*{x.dtype for x in X})
+        if dtype.kind != "f":
+            dtype = np.dtype(np.float64)
+
+        # Compute all the matrices, stored in "connectivities", by chunks of
+        # subjects
+        connectivities = None
+        connectivities_sum = 0.0
+        for indices, covariances in _covariance_chunks(
+            self.cov_estimator_, X, preprocess=preprocess
+        ):
             if self.kind in ("covariance", "tangent"):
-                connectivities = covariances
+                matrices = covariances
+            elif self.kind == "correlation":
+                matrices = cov_to_corr(covariances)
             elif self.kind == "precision":
-                connectivities = [linalg.inv(cov) for cov in covariances]
-            elif self.kind == "partial correlation":
-                connectivities = [
-                    prec_to_partial(linalg.inv(cov)) for cov in covariances
-                ]
+                matrices = _inv_spd(covariances)
             else:
-                allowed_kinds = (
-                    "correlation",
-                    "partial correlation",
-                    "tangent",
-                    "covariance",
-                    "precision",
+                matrices = prec_to_partial(_inv_spd(covariances))
+
+            if do_fit and self.kind != "tangent":
+                connectivities_sum = connectivities_sum + matrices.sum(axis=0)
+            if not keep:
+                continue
+            if vectorize:
+                matrices = sym_matrix_to_vec(
+                    matrices, discard_diagonal=self.discard_diagonal
                 )
-                raise ValueError(
-                    f"Allowed connectivity kinds are {allowed_kinds}. "
-                    f"Got kind {self.kind}."
+            if connectivities is None:
+                connectivities = np.empty(
+                    (len(X),) + matrices.shape[1:],
+                    dtype=np.result_type(dtype, matrices.dtype),
                 )
+            connectivities[indices] = matrices
 
         # Store the mean
         if do_fit:
-            if self.kind == "tangent":
+            if self.kind == "tangent" and n_subjects_seen:
+                # the previous subjects are summarized by their mean
                 self.mean_ = _geometric_mean(
-                    covariances, max_iter=30, tol=1e-7
+                    [self.mean_, *connectivities],
+                    init=self.mean_,
+                    max_iter=30,
+                    tol=1e-7,
+                    dtype=self.dtype,
+                    weights=[n_subjects_seen] + [1] * len(X),
                 )
-                self.whitening_ = _map_eigenvalues(
-                    lambda x: 1.0 / np.sqrt(x), self.mean_
+            elif self.kind == "tangent":
+                self.mean_ = _geometric_mean(
+                    connectivities, max_iter=30, tol=1e-7, dtype=self.dtype
                 )
             else:
-                self.mean_ = np.mean(connectivities, axis=0)
+                mean = connectivities_sum / len(X)
                 # Fight numerical instabilities: make symmetric
-                self.mean_ = self.mean_ + self.mean_.T
-                self.mean_ *= 0.5
+                mean = mean + mean.T
+                mean *= 0.5
+                if n_subjects_seen:
+                    mean = self.mean_ + (mean - self.mean_) * len(X) / (
+                        n_subjects_seen + len(X)
+                    )
+                self.mean_ = mean
+            if self.kind == "tangent":
+                self.whitening_ = _map_eigenvalues(
+                    lambda x: 1.0 / np.sqrt(x), self.mean_
+                )
+            self.n_subjects_seen_ = n_subjects_seen + len(X)
 
         # Compute the vector we return on transform
         if do_transform:
             if self.kind == "tangent":
-                connectivities = [
-                    _map_eigenvalues(
-                        np.log, self.whitening_.dot(cov).dot(self.whitening_)
-                    )
-                    for cov in connectivities
-                ]
-
-            connectivities = np.array(connectivities)
-
-            if confounds is not None and not self.vectorize:
-                error_message = (
-                    "'confounds' are provided but vectorize=False. "
-                    "Confounds are only cleaned on vectorized matrices "
-                    "as second level connectome regression "
-                    "but not on symmetric matrices."
+                n_features = self.whitening_.shape[0]
+                tangents = np.empty(
+                    (len(connectivities), n_features, n_features),
+                    dtype=self.dtype,
                 )
-                raise ValueError(error_message)
+                for chunk, logs in _whitened_logs(
+                    connectivities, self.whitening_, self.dtype
+                ):
+                    tangents[chunk] = logs
+                connectivities = tangents
+                if self.vectorize:
+                    connectivities = sym_matrix_to_vec(
+                        connectivities, discard_diagonal=self.discard_diagonal
+                    )
 
-            if self.vectorize:
-                connectivities = sym_matrix_to_vec(
-                    connectivities, discard_diagonal=self.discard_diagonal
+            if confounds is not None:
+                connectivities = signal.clean(
+                    connectivities, confounds=confounds
                 )
-                if confounds is not None:
-                    connectivities = signal.clean(
-                        connectivities, confounds=confounds
-                    )
 
         return connectivities
 
@@ -712,12 +1084,8 @@ class ConnectivityMeasure(BaseEstimator, TransformerMixin):
 
         if self.kind == "tangent":
             mean_sqrt = _map_eigenvalues(np.sqrt, self.mean_)
-            connectivities = [
-                mean_sqrt.dot(_map_eigenvalues(np.exp, displacement)).dot(
-                    mean_sqrt
-                )
-                for displacement in connectivities
-            ]
-            connectivities = np.array(connectivities)
+            connectivities = (
+                mean_sqrt @ _map_eigenvalues(np.exp, connectivities)
+            ) @ mean_sqrt
 
         return connectivities
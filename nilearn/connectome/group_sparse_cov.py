@@ -70,46 +70,52 @@ def compute_alpha_max(emp_covs, n_samples):
     return np.max(norms), np.min(norms[norms > 0])
 
 
-def _update_submatrix(full, sub, sub_inv, p, h, v):
-    """Update submatrix and its inverse.
+def _update_submatrix(full, sub, sub_inv, p):
+    """Update submatrices and their inverses, for a stack of matrices.
 
-    sub_inv is the inverse of the submatrix of "full" obtained by removing
-    the p-th row and column.
+    full, sub and sub_inv are stacks of matrices, with the subject index on
+    the first axis. sub_inv contains the inverses of the submatrices of "full"
+    obtained by removing the p-th row and column.
 
-    sub_inv is modified in-place. After execution of this function, it contains
-    the inverse of the submatrix of "full" obtained by removing the n+1-th row
-    and column.
+    sub and sub_inv are modified in-place. After execution of this function,
+    they contain the submatrices of "full" (and their inverses) obtained by
+    removing the n+1-th row and column.
 
     This computation is based on the Sherman-Woodbury-Morrison identity.
 
     """
     n = p - 1
-    v[: n + 1] = full[: n + 1, n]
-    v[n + 1 :] = full[n + 2 :, n]
-    h[: n + 1] = full[n, : n + 1]
-    h[n + 1 :] = full[n, n + 2 :]
+    v = np.concatenate((full[:, : n + 1, n], full[:, n + 2 :, n]), axis=1)
+    h = np.concatenate((full[:, n, : n + 1], full[:, n, n + 2 :]), axis=1)
 
     # change row: first usage of SWM identity
-    coln = sub_inv[:, n : n + 1]  # 2d array, useful for sub_inv below
-    V = h - sub[n, :]
-    coln = coln / (1.0 + np.dot(V, coln))
-    # The following line is equivalent to
-    # sub_inv -= np.outer(coln, np.dot(V, sub_inv))
-    sub_inv -= np.dot(coln, np.dot(V, sub_inv)[np.newaxis, :])
-    sub[n, :] = h
-
-    # change column: second usage of SWM identity
-    rown = sub_inv[n : n + 1, :]  # 2d array, useful for sub_inv below
-    U = v - sub[:, n]
-    rown = rown / (1.0 + np.dot(rown, U))
-    # The following line is equivalent to (but faster)
-    # sub_inv -= np.outer(np.dot(sub_inv, U), rown)
-    sub_inv -= np.dot(np.dot(sub_inv, U)[:, np.newaxis], rown)
-    sub[:, n] = v  # equivalent to sub[n, :] += U
-
-    # Make sub_inv symmetric (overcome some numerical limitations)
-    sub_inv += sub_inv.T.copy()
-    sub_inv /= 2.0
+    # sub_inv -> sub_inv - outer(coln, row_dot)
+    coln = sub_inv[:, :, n]
+    V = h - sub[:, n, :]
+    coln = coln / (1.0 + (V * coln).sum(axis=1))[:, np.newaxis]
+    # sub_inv is symmetric: np.dot(V, sub_inv) == np.dot(sub_inv, V)
+    row_dot = np.matmul(sub_inv, V[:, :, np.newaxis])[..., 0]
+    sub[:, n, :] = h
+
+    # change column: second usage of SWM identity, on the updated sub_inv
+    # sub_inv -> sub_inv - outer(col_dot, rown)
+    U = v - sub[:, :, n]
+    rown = sub_inv[:, n, :] - coln[:, n, np.newaxis] * row_dot
+    rown = rown / (1.0 + (rown * U).sum(axis=1))[:, np.newaxis]
+    col_dot = (
+        np.matmul(sub_inv, U[:, :, np.newaxis])[..., 0]
+        - coln * (row_dot * U).sum(axis=1)[:, np.newaxis]
+    )
+    sub[:, :, n] = v
+
+    # Apply both updates at once, keeping only their symmetric part
+    # (overcome some numerical limitations)
+    update = np.matmul(
+        np.stack((coln, col_dot), axis=2) / 2.0,
+        np.stack((row_dot, rown), axis=1),
+    )
+    update += update.transpose((0, 2, 1))
+    sub_inv -= update
 
 
 def _assert_submatrix(full, sub, n):
@@ -258,46 +264,32 @@ def _group_sparse_covariance(
     n_samples = np.asarray(n_samples)
     n_samples /= n_samples.sum()  # essential for numerical stability
 
+    # Subject-first views of the stacks of matrices: with Fortran-ordered
+    # input, covs[k] and omegas[k] are contiguous, and per-subject operations
+    # are done on all subjects at once.
+    covs = emp_covs.T
+    covs_diag = np.diagonal(covs, axis1=1, axis2=2)
+
     # Check diagonal normalization.
-    ones = np.ones(emp_covs.shape[0])
-    for k in range(n_subjects):
-        if (
-            abs(emp_covs[..., k].flat[:: emp_covs.shape[0] + 1] - ones) > 0.1
-        ).any():
-            warnings.warn(
-                "input signals do not all have unit variance. This "
-                "can lead to numerical instability."
-            )
-            break
+    if (abs(covs_diag - 1.0) > 0.1).any():
+        warnings.warn(
+            "input signals do not all have unit variance. This "
+            "can lead to numerical instability."
+        )
 
     if precisions_init is None:
         # Fortran order make omega[..., k] contiguous, which is often useful.
-        omega = np.ndarray(shape=emp_covs.shape, dtype=np.float64, order="F")
-        for k in range(n_subjects):
-            # Values on main diagonals are far from zero, because they
-            # are timeseries energy.
-            omega[..., k] = np.diag(1.0 / np.diag(emp_covs[..., k]))
+        omega = np.zeros(shape=emp_covs.shape, dtype=np.float64, order="F")
+        # Values on main diagonals are far from zero, because they
+        # are timeseries energy.
+        omega.T.reshape(n_subjects, -1)[:, :: n_features + 1] = 1.0 / covs_diag
     else:
-        omega = precisions_init.copy()
+        omega = np.array(precisions_init, dtype=np.float64, order="F")
+    omegas = omega.T
 
     # Preallocate arrays
-    y = np.ndarray(shape=(n_subjects, n_features - 1), dtype=np.float64)
-    u = np.ndarray(shape=(n_subjects, n_features - 1), dtype=np.float64)
-    y_1 = np.ndarray(shape=(n_subjects, n_features - 2), dtype=np.float64)
-    h_12 = np.ndarray(shape=(n_subjects, n_features - 2), dtype=np.float64)
-    q = np.ndarray(shape=(n_subjects,), dtype=np.float64)
-    aq = np.ndarray(shape=(n_subjects,), dtype=np.float64)  # temp. array
-    c = np.ndarray(shape=(n_subjects,), dtype=np.float64)
-    W = np.ndarray(
-        shape=(omega.shape[0] - 1, omega.shape[1] - 1, omega.shape[2]),
-        dtype=np.float64,
-        order="F",
-    )
-    W_inv = np.ndarray(shape=W.shape, dtype=np.float64, order="F")
-
-    # Auxiliary arrays.
-    v = np.ndarray((omega.shape[0] - 1,), dtype=np.float64)
-    h = np.ndarray((omega.shape[1] - 1,), dtype=np.float64)
+    y = np.ndarray(shape=(n_features - 1, n_subjects), dtype=np.float64)
+    u = np.ndarray(shape=(n_features - 1, n_subjects), dtype=np.float64)
 
     # Optional.
     tolerance_reached = False
@@ -333,75 +325,84 @@ def _group_sparse_covariance(
         for p in range(n_features):
             if p == 0:
                 # Initial state: remove first col/row
-                W = omega[1:, 1:, :].copy()  # stack of W(k)
-                W_inv = np.ndarray(shape=W.shape, dtype=np.float64)
-                for k in range(W.shape[2]):
-                    # stack of W^-1(k)
-                    W_inv[..., k] = scipy.linalg.inv(W[..., k])
-                    if debug:
+                W = omegas[:, 1:, 1:].copy()  # stack of W(k)
+                W_inv = np.linalg.inv(W)  # stack of W^-1(k)
+                # Make W_inv symmetric: later updates keep it symmetric.
+                W_inv += W_inv.transpose((0, 2, 1)).copy()
+                W_inv /= 2.0
+                if debug:
+                    for k in range(n_subjects):
                         np.testing.assert_almost_equal(
-                            np.dot(W_inv[..., k], W[..., k]),
-                            np.eye(W_inv[..., k].shape[0]),
+                            np.dot(W_inv[k], W[k]),
+                            np.eye(W_inv[k].shape[0]),
                             decimal=10,
                         )
-                        _assert_submatrix(omega[..., k], W[..., k], p)
-                        assert is_spd(W_inv[..., k])
+                        _assert_submatrix(omegas[k], W[k], p)
+                        assert is_spd(W_inv[k])
             else:
                 # Update W and W_inv
                 if debug:
                     omega_orig = omega.copy()
 
-                for k in range(n_subjects):
-                    _update_submatrix(
-                        omega[..., k], W[..., k], W_inv[..., k], p, h, v
-                    )
+                _update_submatrix(omegas, W, W_inv, p)
 
-                    if debug:
-                        _assert_submatrix(omega[..., k], W[..., k], p)
-                        assert is_spd(W_inv[..., k], decimal=14)
+                if debug:
+                    for k in range(n_subjects):
+                        _assert_submatrix(omegas[k], W[k], p)
+                        assert is_spd(W_inv[k], decimal=14)
                         np.testing.assert_almost_equal(
-                            np.dot(W[..., k], W_inv[..., k]),
-                            np.eye(W_inv[..., k].shape[0]),
+                            np.dot(W[k], W_inv[k]),
+                            np.eye(W_inv[k].shape[0]),
                             decimal=10,
                         )
-                if debug:
                     # Check that omega has not been modified.
                     np.testing.assert_almost_equal(omega_orig, omega)
 
-            # In the following lines, implicit loop on k (subjects)
+            # In the following lines, implicit loop on k (subjects). y and u
+            # have the subject index last, so that y[m] is contiguous.
             # Extract y and u
-            y[:, :p] = omega[:p, p, :].T
-            y[:, p:] = omega[p + 1 :, p, :].T
+            y[:p] = omegas[:, p, :p].T
+            y[p:] = omegas[:, p, p + 1 :].T
+
+            u[:p] = covs[:, p, :p].T
+            u[p:] = covs[:, p, p + 1 :].T
+
+            # T(k) * v(k), with v(k) -> emp_covs[p, p, k]
+            t_v = n_samples * covs[:, p, p]
+            # q(k) -> T(k) * v(k) * h_22(k), for every m
+            q_all = np.diagonal(W_inv, axis1=1, axis2=2).T * t_v
+            # -T(k) * (v(k) * W^-1(k) y(k) + u(k)), kept up to date when y
+            # changes. c is obtained from it for every m, without computing
+            # (h_12 * y_1).sum() from scratch.
+            grad = -(
+                t_v * np.matmul(W_inv, y.T[..., np.newaxis])[..., 0].T
+                + n_samples * u
+            )
 
-            u[:, :p] = emp_covs[:p, p, :].T
-            u[:, p:] = emp_covs[p + 1 :, p, :].T
+            # Coefficients of y that are non-zero (for at least a subject).
+            nonzero = y.any(axis=1)
 
             for m in range(n_features - 1):
                 # Coordinate descent on y
 
                 # T(k) -> n_samples[k]
-                # v(k) -> emp_covs[p, p, k]
-                # h_22(k) -> W_inv[m, m, k]
-                # h_12(k) -> W_inv[:m, m, k],  W_inv[m+1:, m, k]
-                # y_1(k) -> y[k, :m], y[k, m+1:]
-                # u_2(k) -> u[k, m]
-                h_12[:, :m] = W_inv[:m, m, :].T
-                h_12[:, m:] = W_inv[m + 1 :, m, :].T
-                y_1[:, :m] = y[:, :m]
-                y_1[:, m:] = y[:, m + 1 :]
-
-                c[:] = -n_samples * (
-                    emp_covs[p, p, :] * (h_12 * y_1).sum(axis=1) + u[:, m]
-                )
+                # h_22(k) -> W_inv[k, m, m]
+                # h_12(k) -> W_inv[k, m, :m],  W_inv[k, m, m+1:]
+                # y_1(k) -> y[:m, k], y[m+1:, k]
+                # u_2(k) -> u[m, k]
+                y_m = y[m]
+                q = q_all[m]
+                c = grad[m] + q * y_m if nonzero[m] else grad[m]
                 c2 = np.sqrt(np.dot(c, c))
 
-                # x -> y[:][m]
+                # x -> y[m][:]
                 if c2 <= alpha:
-                    y[:, m] = 0  # x* = 0
+                    if not nonzero[m]:
+                        continue
+                    x = np.zeros(n_subjects)  # x* = 0
+                    nonzero[m] = False
                 else:
-                    # q(k) -> T(k) * v(k) * h_22(k)
                     # \lambda -> gamma   (lambda is a Python keyword)
-                    q[:] = n_samples * emp_covs[p, p, :] * W_inv[m, m, :]
                     if debug:
                         assert np.all(q > 0)
                     # x* = \lambda* diag(1 + \lambda q)^{-1} c
@@ -418,16 +419,17 @@ def _group_sparse_covariance(
                     for _ in itertools.repeat(None, 100):
                         # Function whose zero must be determined (fval) and
                         # its derivative (fder).
-                        # Written inplace to save some function calls.
+                        # Sums are written as dot products to save some
+                        # function calls.
                         aq = 1.0 + gamma * q
-                        aq2 = aq * aq
-                        fder = (two_ccq / (aq2 * aq)).sum()
+                        aq2_inv = 1.0 / (aq * aq)
+                        fder = np.dot(two_ccq, aq2_inv / aq)
 
                         if fder == 0:
                             msg = "derivative was zero."
                             warnings.warn(msg, RuntimeWarning)
                             break
-                        fval = -(alpha2 - (cc / aq2).sum()) / fder
+                        fval = -(alpha2 - np.dot(cc, aq2_inv)) / fder
                         gamma = fval + gamma
                         if abs(fval) < 1.5e-8:
                             break
@@ -441,21 +443,25 @@ def _group_sparse_covariance(
 
                     if debug:
                         assert gamma >= 0.0, gamma
-                    y[:, m] = (gamma * c) / aq  # x*
+                    x = (gamma * c) / aq  # x*
+                    nonzero[m] = True
+
+                grad -= W_inv[:, m, :].T * (t_v * (x - y_m))
+                y[m] = x
 
             # Copy back y in omega (column and row)
-            omega[:p, p, :] = y[:, :p].T
-            omega[p + 1 :, p, :] = y[:, p:].T
-            omega[p, :p, :] = y[:, :p].T
-            omega[p, p + 1 :, :] = y[:, p:].T
+            omegas[:, p, :p] = y[:p].T
+            omegas[:, p, p + 1 :] = y[p:].T
+            omegas[:, :p, p] = y[:p].T
+            omegas[:, p + 1 :, p] = y[p:].T
 
-            for k in range(n_subjects):
-                omega[p, p, k] = 1.0 / emp_covs[p, p, k] + np.dot(
-                    np.dot(y[k, :], W_inv[..., k]), y[k, :]
-                )
+            omegas[:, p, p] = 1.0 / covs[:, p, p] + (
+                np.matmul(W_inv, y.T[..., np.newaxis])[..., 0] * y.T
+            ).sum(axis=1)
 
-                if debug:
-                    assert is_spd(omega[..., k])
+            if debug:
+                for k in range(n_subjects):
+                    assert is_spd(omegas[k])
 
         if probe_function is not None:
             if probe_function(
@@ -784,6 +790,7 @@ def group_sparse_covariance_path(
     verbose=0,
     debug=False,
     probe_function=None,
+    n_jobs=1,
 ):
     """Get estimated precision matrices for different values of alpha.
 
@@ -825,6 +832,14 @@ def group_sparse_covariance_path(
         - current value of precisions (ndarray).
         - previous value of precisions (ndarray). None before first iteration.
 
+    n_jobs : int, default=1
+        The number of CPUs to use to do the computation. -1 means
+        'all CPUs'. If different from 1, all values of alpha are computed
+        in parallel, each starting from precisions_init instead of the
+        precisions obtained for the previous value of alpha.
+
+        .. versionadded:: 0.11.0
+
     Returns
     -------
     precisions_list : list of numpy.ndarray
@@ -840,33 +855,49 @@ def group_sparse_covariance_path(
         train_subjs, assume_centered=False, standardize=True
     )
 
-    scores = []
-    precisions_list = []
-    for alpha in alphas:
-        precisions = _group_sparse_covariance(
-            train_covs,
-            train_n_samples,
-            alpha,
-            tol=tol,
-            max_iter=max_iter,
-            precisions_init=precisions_init,
-            verbose=max(0, verbose - 1),
-            debug=debug,
-            probe_function=probe_function,
-        )
-
-        # Compute log-likelihood
-        if test_subjs is not None:
-            test_covs, _ = empirical_covariances(
-                test_subjs, assume_centered=False, standardize=True
+    # Normalized as in _group_sparse_covariance, also for computing scores.
+    train_n_samples /= train_n_samples.sum()
+
+    kwargs = {
+        "tol": tol,
+        "max_iter": max_iter,
+        "verbose": max(0, verbose - 1),
+        "debug": debug,
+        "probe_function": probe_function,
+    }
+    if n_jobs == 1:
+        precisions_list = []
+        for alpha in alphas:
+            precisions = _group_sparse_covariance(
+                train_covs,
+                train_n_samples,
+                alpha,
+                precisions_init=precisions_init,
+                **kwargs,
             )
-            scores.append(
-                group_sparse_scores(precisions, train_n_samples, test_covs, 0)[
-                    0
-                ]
+            precisions_list.append(precisions)
+            precisions_init = precisions
+    else:
+        precisions_list = Parallel(n_jobs=n_jobs)(
+            delayed(_group_sparse_covariance)(
+                train_covs,
+                train_n_samples,
+                alpha,
+                precisions_init=precisions_init,
+                **kwargs,
             )
-        precisions_list.append(precisions)
-        precisions_init = precisions
+            for alpha in alphas
+        )
+
+    # Compute log-likelihood
+    if test_subjs is not None:
+        test_covs, _ = empirical_covariances(
+            test_subjs, assume_centered=False, standardize=True
+        )
+        scores = [
+            group_sparse_scores(precisions, train_n_samples, test_covs, 0)[0]
+            for precisions in precisions_list
+        ]
 
     return (
         (precisions_list, scores)
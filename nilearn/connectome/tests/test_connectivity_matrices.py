@@ -7,17 +7,27 @@ import pytest
 from numpy.testing import assert_array_almost_equal, assert_array_equal
 from pandas import DataFrame
 from scipy import linalg
-from sklearn.covariance import EmpiricalCovariance, LedoitWolf
+from sklearn.base import clone
+from sklearn.covariance import (
+    OAS,
+    EmpiricalCovariance,
+    LedoitWolf,
+    ShrunkCovariance,
+)
 from sklearn.utils import check_random_state
 
 from nilearn._utils.extmath import is_spd
+from nilearn.connectome import connectivity_matrices
 from nilearn.connectome.connectivity_matrices import (
     ConnectivityMeasure,
     _check_spd,
     _check_square,
+    _covariance_chunks,
     _form_symmetric,
     _geometric_mean,
+    _inv_spd,
     _map_eigenvalues,
+    cov_to_corr,
     prec_to_partial,
     sym_matrix_to_vec,
     vec_to_sym_matrix,
@@ -180,6 +190,20 @@ def test_map_eigenvalues_on_log_map():
     assert_array_almost_equal(_map_eigenvalues(np.log, spd), spd_log)
 
 
+def test_map_eigenvalues_on_stack(rng):
+    spds = np.array(
+        [
+            random_spd(5, eig_min=1.0, cond=10.0, random_state=k)
+            for k in range(3)
+        ]
+    )
+    for function in [np.exp, np.sqrt, np.log]:
+        assert_array_almost_equal(
+            _map_eigenvalues(function, spds),
+            [_map_eigenvalues(function, spd) for spd in spds],
+        )
+
+
 def test_geometric_mean_couple():
     n_features = 7
     spd1 = np.ones((n_features, n_features))
@@ -420,6 +444,37 @@ def test_geometric_mean_properties_evaluate_convergence(p):
     _geometric_mean(spds, max_iter=max_iter, tol=1e-5)
 
 
+def test_geometric_mean_chunks_and_dtype(monkeypatch):
+    n_features = 10
+    spds = [
+        random_spd(n_features, eig_min=1.0, cond=10.0, random_state=k)
+        for k in range(7)
+    ]
+    gmean = _geometric_mean(spds, max_iter=30, tol=1e-7)
+
+    # chunks of 3 matrices
+    monkeypatch.setattr(
+        connectivity_matrices, "_CHUNK_N_ELEMENTS", 3 * n_features**2
+    )
+    assert_array_almost_equal(
+        _geometric_mean(spds, max_iter=30, tol=1e-7), gmean, decimal=12
+    )
+    assert_array_almost_equal(
+        _geometric_mean(spds, max_iter=30, tol=1e-7, dtype=np.float32),
+        gmean,
+        decimal=5,
+    )
+
+
+def test_geometric_mean_error_nan_logarithm():
+    # the whitened matrices are not positive definite if the input is
+    # not checked, which is detected
+    with pytest.raises(FloatingPointError, match="Nan value"):
+        connectivity_matrices._sum_whitened_logs(
+            [-np.eye(3)], np.eye(3), np.ones(3), np.eye(3), np.float64
+        )
+
+
 def test_geometric_mean_error_non_square_matrix():
     n_features = 5
     mat1 = np.ones((n_features, n_features + 1))
@@ -555,6 +610,77 @@ def test_prec_to_partial():
     assert_array_almost_equal(prec_to_partial(precision), partial)
 
 
+def test_cov_to_corr_and_prec_to_partial_on_stack(rng):
+    matrices = np.array(
+        [
+            random_spd(4, eig_min=1.0, cond=10.0, random_state=k)
+            for k in range(3)
+        ]
+    ).reshape((3, 1, 4, 4))
+    correlations = cov_to_corr(matrices)
+    partials = prec_to_partial(matrices)
+    for matrix, correlation, partial in zip(
+        matrices[:, 0], correlations[:, 0], partials[:, 0]
+    ):
+        assert_array_equal(correlation, cov_to_corr(matrix))
+        assert_array_equal(partial, prec_to_partial(matrix))
+
+
+def test_inv_spd():
+    spd = random_spd(5, eig_min=1.0, cond=10.0, random_state=0)
+    # symmetric, invertible but not positive definite
+    not_spd = spd - 2 * np.eye(5) * np.linalg.eigvalsh(spd)[0]
+    matrices = np.array([spd, not_spd])
+    inverses = _inv_spd(matrices)
+
+    assert_array_equal(inverses[0], inverses[0].T)
+    for matrix, inverse in zip(matrices, inverses):
+        assert_array_almost_equal(inverse, linalg.inv(matrix))
+
+
+@pytest.mark.parametrize(
+    "cov_estimator",
+    [
+        EmpiricalCovariance(),
+        EmpiricalCovariance(assume_centered=True),
+        LedoitWolf(),
+        LedoitWolf(assume_centered=True),
+        OAS(),
+        ShrunkCovariance(),
+    ],
+)
+@pytest.mark.parametrize("n_features", [1, 4])
+def test_covariance_chunks(cov_estimator, n_features, monkeypatch, rng):
+    # subjects of different lengths and dtypes, in chunks of 2 subjects
+    monkeypatch.setattr(
+        connectivity_matrices, "_CHUNK_N_ELEMENTS", 2 * 20 * n_features
+    )
+    X = [
+        rng.standard_normal((n_samples, n_features)).astype(dtype) + 1
+        for n_samples, dtype in [
+            (20, np.float64),
+            (30, np.float64),
+            (20, np.float32),
+            (20, np.float64),
+            (20, np.float64),
+            (1, np.float64),
+        ]
+    ]
+
+    n_seen = 0
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        for indices, covariances in _covariance_chunks(cov_estimator, X):
+            assert len(covariances) == len(indices) <= 2
+            for k, covariance in zip(indices, covariances):
+                expected = clone(cov_estimator).fit(X[k]).covariance_
+                assert_array_almost_equal(
+                    covariance, expected, decimal=5 if k == 2 else 12
+                )
+            n_seen += len(indices)
+    assert n_seen == len(X)
+
+
 def test_connectivity_measure_errors():
     # Raising error for input subjects not iterable
     conn_measure = ConnectivityMeasure()
@@ -881,6 +1007,77 @@ def test_connectivity_measure_inverse_transform_tangent(
         tangent_measure.inverse_transform(vectorized_displacements)
 
 
+def test_connectivity_measure_tangent_float32(signals, monkeypatch):
+    monkeypatch.setattr(
+        connectivity_matrices, "_CHUNK_N_ELEMENTS", 2 * N_FEATURES**2
+    )
+    conn_measure = ConnectivityMeasure(kind="tangent")
+    tangents = conn_measure.fit_transform(signals)
+    conn_measure_32 = ConnectivityMeasure(kind="tangent", dtype=np.float32)
+    tangents_32 = conn_measure_32.fit_transform(signals)
+
+    assert tangents_32.dtype == np.float32
+    assert_array_almost_equal(tangents_32, tangents, decimal=4)
+    np.testing.assert_allclose(
+        conn_measure_32.inverse_transform(tangents_32),
+        conn_measure.inverse_transform(tangents),
+        rtol=1e-4,
+        atol=1e-4,
+    )
+
+
+@pytest.mark.parametrize("kind", CONNECTIVITY_KINDS)
+def test_connectivity_measure_partial_fit(kind, tmp_path):
+    signals, _ = _signals(n_subjects=6)
+    conn_measure = ConnectivityMeasure(kind=kind).fit(signals)
+
+    # memory-mapped subjects
+    memmaps = []
+    for k, signal_ in enumerate(signals):
+        memmap = np.memmap(
+            tmp_path / f"signal_{k}.dat",
+            dtype=signal_.dtype,
+            mode="w+",
+            shape=signal_.shape,
+        )
+        memmap[:] = signal_
+        memmap.flush()
+        memmaps.append(
+            np.memmap(
+                memmap.filename,
+                dtype=signal_.dtype,
+                mode="r",
+                shape=signal_.shape,
+            )
+        )
+
+    partial_measure = ConnectivityMeasure(kind=kind)
+    for batch in [memmaps[:1], memmaps[1:4], memmaps[4:]]:
+        partial_measure.partial_fit(batch)
+
+    assert partial_measure.n_subjects_seen_ == 6
+    if kind == "tangent":
+        # the geometric mean is approximated
+        assert np.linalg.norm(
+            partial_measure.mean_ - conn_measure.mean_
+        ) < 0.01 * np.linalg.norm(conn_measure.mean_)
+        assert partial_measure.transform(memmaps).shape == (
+            conn_measure.transform(signals).shape
+        )
+    else:
+        assert_array_almost_equal(partial_measure.mean_, conn_measure.mean_)
+        assert_array_almost_equal(
+            partial_measure.transform(memmaps),
+            conn_measure.transform(signals),
+        )
+
+    # partial_fit continues after fit, and fit starts over
+    conn_measure.partial_fit(signals[:2])
+    assert conn_measure.n_subjects_seen_ == 8
+    conn_measure.fit(signals[:2])
+    assert conn_measure.n_subjects_seen_ == 2
+
+
 def test_confounds_connectome_measure():
     n_subjects = 10
 
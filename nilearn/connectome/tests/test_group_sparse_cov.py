@@ -4,7 +4,11 @@ import pytest
 from nilearn._utils.data_gen import generate_group_sparse_gaussian_graphs
 from nilearn.connectome import GroupSparseCovariance, GroupSparseCovarianceCV
 from nilearn.connectome.group_sparse_cov import (
+    _group_sparse_covariance,
+    _update_submatrix,
+    empirical_covariances,
     group_sparse_covariance,
+    group_sparse_covariance_path,
     group_sparse_scores,
 )
 
@@ -35,6 +39,23 @@ def test_group_sparse_covariance(rng):
     np.testing.assert_almost_equal(omega, omega2, decimal=4)
 
 
+def test_update_submatrix(rng):
+    n_subjects, n_features = 3, 6
+    full = rng.standard_normal((n_subjects, n_features, 2 * n_features))
+    full = np.matmul(full, full.transpose((0, 2, 1)))
+
+    # submatrices without the first row and column
+    sub = full[:, 1:, 1:].copy()
+    sub_inv = np.linalg.inv(sub)
+    sub_inv = (sub_inv + sub_inv.transpose((0, 2, 1))) / 2
+    for p in range(1, n_features):
+        _update_submatrix(full, sub, sub_inv, p)
+        expected = np.delete(np.delete(full, p, axis=1), p, axis=2)
+        np.testing.assert_array_almost_equal(sub, expected)
+        np.testing.assert_array_almost_equal(sub_inv, np.linalg.inv(expected))
+        np.testing.assert_array_equal(sub_inv, sub_inv.transpose((0, 2, 1)))
+
+
 def test_group_sparse_covariance_with_probe_function(rng):
     signals, _, _ = generate_group_sparse_gaussian_graphs(
         density=0.1,
@@ -109,6 +130,51 @@ def test_group_sparse_covariance_check_consistency_between_classes(rng):
     )
 
 
+def test_group_sparse_covariance_path_n_jobs(rng):
+    signals, _, _ = generate_group_sparse_gaussian_graphs(
+        density=0.1,
+        n_subjects=5,
+        n_features=10,
+        min_n_samples=100,
+        max_n_samples=151,
+        random_state=rng,
+    )
+    train_subjs = [s[:80] for s in signals]
+    test_subjs = [s[80:] for s in signals]
+    alphas = [0.3, 0.1, 0.03]
+
+    precisions_list, scores = group_sparse_covariance_path(
+        train_subjs, alphas, test_subjs=test_subjs, max_iter=5
+    )
+    precisions_list_par, scores_par = group_sparse_covariance_path(
+        train_subjs, alphas, test_subjs=test_subjs, max_iter=5, n_jobs=2
+    )
+
+    # sequential path is warm started, parallel path is not.
+    covs, n_samples = empirical_covariances(train_subjs, standardize=True)
+    precisions_init = None
+    for alpha, precisions, precisions_par in zip(
+        alphas, precisions_list, precisions_list_par
+    ):
+        np.testing.assert_array_equal(
+            precisions,
+            _group_sparse_covariance(
+                covs,
+                n_samples,
+                alpha,
+                max_iter=5,
+                precisions_init=precisions_init,
+            ),
+        )
+        np.testing.assert_array_equal(
+            precisions_par,
+            _group_sparse_covariance(covs, n_samples, alpha, max_iter=5),
+        )
+        precisions_init = precisions
+    assert len(scores_par) == len(alphas)
+    np.testing.assert_almost_equal(scores[0], scores_par[0])
+
+
 def test_group_sparse_covariance_errors(rng):
     signals, _, _ = generate_group_sparse_gaussian_graphs(
         density=0.1,
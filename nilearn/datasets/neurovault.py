@@ -7,17 +7,24 @@ import json
 import os
 import re
 import shutil
+import threading
 import traceback
 import uuid
 import warnings
+from collections import deque
 from collections.abc import Container
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from copy import copy, deepcopy
+from functools import partial
 from glob import glob
+from itertools import islice, tee
 from tempfile import mkdtemp
 from urllib.parse import urlencode, urljoin
 
 import numpy as np
 import requests
+from joblib import effective_n_jobs
 from sklearn.feature_extraction import DictVectorizer
 from sklearn.utils import Bunch
 
@@ -54,6 +61,9 @@ _MAX_CONSECUTIVE_FAILS = 100
 # next collection.
 _MAX_FAILS_IN_COLLECTION = 30
 
+# collection directories and metadata are created by one thread at a time
+_COLLECTION_LOCK = threading.Lock()
+
 _DEBUG = 3
 _INFO = 2
 _WARNING = 1
@@ -887,6 +897,13 @@ class _TemporaryDirectory:
         self.temp_dir_ = None
 
 
+def _thread_pool(n_jobs):
+    """Get a pool of ``n_jobs`` threads, or no pool if ``n_jobs`` is 1."""
+    if n_jobs == 1:
+        return nullcontext()
+    return ThreadPoolExecutor(n_jobs)
+
+
 def _print_if(message, level, threshold_level, with_traceback=False):
     """Print a message if its importance is above a threshold.
 
@@ -1162,14 +1179,18 @@ def _simple_download(url, target_file, temp_dir, verbose=3):
 
     """
     _print_if(f"Downloading file: {url}", _DEBUG, verbose)
+    # files downloaded concurrently can have the same name
+    download_dir = mkdtemp(dir=temp_dir)
     try:
         downloaded = _fetch_file(
-            url, temp_dir, resume=False, overwrite=True, verbose=0
+            url, download_dir, resume=False, overwrite=True, verbose=0
         )
+        shutil.move(downloaded, target_file)
     except Exception:
         _print_if(f"Problem downloading file from {url}", _ERROR, verbose)
         raise
-    shutil.move(downloaded, target_file)
+    finally:
+        shutil.rmtree(download_dir)
     _print_if(
         f"Download succeeded, downloaded to: {target_file}", _DEBUG, verbose
     )
@@ -1446,16 +1467,19 @@ def _fetch_collection_for_image(image_info, download_params):
     collection_absolute_path = os.path.join(
         download_params["nv_data_dir"], collection_relative_path
     )
-    if os.path.isdir(collection_absolute_path):
-        return _json_add_collection_dir(
-            os.path.join(collection_absolute_path, "collection_metadata.json")
-        )
+    with _COLLECTION_LOCK:
+        if os.path.isdir(collection_absolute_path):
+            return _json_add_collection_dir(
+                os.path.join(
+                    collection_absolute_path, "collection_metadata.json"
+                )
+            )
 
-    col_batch = _get_batch(
-        urljoin(_NEUROVAULT_COLLECTIONS_URL, str(collection_id)),
-        verbose=download_params["verbose"],
-    )
-    return _download_collection(col_batch["results"][0], download_params)
+        col_batch = _get_batch(
+            urljoin(_NEUROVAULT_COLLECTIONS_URL, str(collection_id)),
+            verbose=download_params["verbose"],
+        )
+        return _download_collection(col_batch["results"][0], download_params)
 
 
 def _download_image_nii_file(image_info, collection, download_params):
@@ -1708,6 +1732,130 @@ def _update(image_info, collection, download_params):
     return image_info, collection
 
 
+def _n_downloads_ahead(download_params):
+    """Get how many images can be downloaded before they are needed.
+
+    No more images are downloaded than needed to reach ``max_images``,
+    unless some of the downloads fail.
+
+    """
+    n_ahead = download_params.get("n_jobs", 1)
+    if download_params["max_images"] is not None:
+        n_ahead = min(
+            n_ahead,
+            download_params["max_images"] - download_params.get("n_found", 0),
+        )
+    return max(n_ahead, 1)
+
+
+def _map_ahead(function, items, n_ahead, executor, skip=None):
+    """Apply a function to items in threads, yielding results in order.
+
+    Parameters
+    ----------
+    function : callable
+        Function applied to each item.
+
+    items : iterable
+        Items to which the function is applied.
+
+    n_ahead : callable
+        Returns the maximum number of items that can be processed before
+        they are consumed.
+
+    executor : concurrent.futures.Executor or None
+        Runs the function. If ``None``, each item is processed only when
+        its result is requested.
+
+    skip : callable, optional
+        Returns True for items which should not be processed ahead anymore.
+        They are still yielded, but are processed only when their result is
+        requested, and their pending processing is cancelled.
+
+    Yields
+    ------
+    item
+        An item, in the same order as ``items``.
+
+    result : callable
+        Returns ``function(item)``, or raises the error that occurred.
+
+    """
+    if executor is None:
+        for item in items:
+            yield item, partial(function, item)
+        return
+    if skip is None:
+
+        def skip(item):
+            return False
+
+    items = iter(items)
+    pending = deque()
+    try:
+        while True:
+            while len(pending) < n_ahead():
+                item = next(items, StopIteration)
+                if item is StopIteration:
+                    break
+                if skip(item):
+                    pending.append((item, None))
+                else:
+                    pending.append((item, executor.submit(function, item)))
+            if not pending:
+                return
+            item, future = pending.popleft()
+            if future is not None and skip(item):
+                future.cancel()
+                future = None
+            if future is None:
+                yield item, partial(function, item)
+            else:
+                yield item, future.result
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def _download_images(images, download_params, skip=None):
+    """Download images, several at a time if ``n_jobs`` is more than 1.
+
+    Images are downloaded by a pool of threads while the next metadata is
+    fetched and filtered, and are yielded in the same order as ``images``.
+
+    Parameters
+    ----------
+    images : iterable of dict or None
+        Metadata for the images.
+
+    download_params : dict
+       General information about download session, containing e.g. the
+       data directory (see `_read_download_params` and
+       `_prepare_download_params for details`)
+
+    skip : callable, optional
+        Returns True for images which should not be downloaded ahead
+        anymore, see :func:`_map_ahead`.
+
+    Yields
+    ------
+    image : dict or None
+        Metadata for an image, as given by ``images``.
+
+    download : callable
+        Returns the result of ``_download_image`` for this image, or raises
+        the error that occurred while downloading it.
+
+    """
+    return _map_ahead(
+        partial(_download_image, download_params=download_params),
+        images,
+        partial(_n_downloads_ahead, download_params),
+        download_params.get("executor"),
+        skip=skip,
+    )
+
+
 def _scroll_local(download_params):
     """Iterate over local neurovault data.
 
@@ -1771,7 +1919,30 @@ def _scroll_local(download_params):
                 yield image, collection
 
 
-def _scroll_collection(collection, download_params):
+def _scroll_collection_images(collection, download_params):
+    """Iterate over the metadata of the images in a collection."""
+    query = urljoin(_NEUROVAULT_COLLECTIONS_URL, f"{collection['id']}/images/")
+    return _scroll_server_results(
+        query,
+        query_terms=download_params["image_terms"],
+        local_filter=download_params["image_filter"],
+        prefix_msg=f"Scroll images from collection {collection['id']}: ",
+        batch_size=download_params["batch_size"],
+        verbose=download_params["verbose"],
+    )
+
+
+def _list_collection(collection, download_params):
+    """Download a collection and list the images it contains."""
+    collection = _download_collection(collection, download_params)
+    if collection is None:
+        return None, []
+    return collection, list(
+        _scroll_collection_images(collection, download_params)
+    )
+
+
+def _scroll_collection(collection, download_params, downloads=None):
     """Iterate over the content of a collection on Neurovault server.
 
     Images that are found and match filter criteria are downloaded.
@@ -1786,6 +1957,11 @@ def _scroll_collection(collection, download_params):
        data directory (see `_read_download_params` and
        `_prepare_download_params for details`)
 
+    downloads : iterable of (dict, callable) pairs, optional
+        Images of the collection and their downloads, as yielded by
+        `_download_images`. By default the images of the collection
+        are listed and downloaded here.
+
     Yields
     ------
     image : dict
@@ -1801,21 +1977,17 @@ def _scroll_collection(collection, download_params):
         return
     n_im_in_collection = 0
     fails_in_collection = 0
-    query = urljoin(_NEUROVAULT_COLLECTIONS_URL, f"{collection['id']}/images/")
-    images = _scroll_server_results(
-        query,
-        query_terms=download_params["image_terms"],
-        local_filter=download_params["image_filter"],
-        prefix_msg=f"Scroll images from collection {collection['id']}: ",
-        batch_size=download_params["batch_size"],
-        verbose=download_params["verbose"],
-    )
+    if downloads is None:
+        downloads = _download_images(
+            _scroll_collection_images(collection, download_params),
+            download_params,
+        )
 
-    for image in images:
+    for image, download in downloads:
         if image is None:
             yield None
         try:
-            image = _download_image(image, download_params)
+            image = download()
             fails_in_collection = 0
             n_im_in_collection += 1
             yield image
@@ -1898,11 +2070,46 @@ def _scroll_filtered(download_params):
         verbose=download_params["verbose"],
     )
 
-    for collection in collections:
-        collection = _download_collection(collection, download_params)
-        collection_content = _scroll_collection(collection, download_params)
+    executor = download_params.get("executor")
+    if executor is None:
+        for collection in collections:
+            collection = _download_collection(collection, download_params)
+            collection_content = _scroll_collection(
+                collection, download_params
+            )
+            for image in collection_content:
+                yield image, collection
+        return
+
+    # The next collections are listed, and their images downloaded, while
+    # the images of the current collection are yielded.
+    listings = _map_ahead(
+        partial(_list_collection, download_params=download_params),
+        collections,
+        lambda: download_params["n_jobs"],
+        executor,
+    )
+    listings, listings_to_download = tee(listing() for _, listing in listings)
+    # The images left in a collection which had too many failures are
+    # skipped without being downloaded.
+    scrolled_collections = set()
+    downloads = _download_images(
+        (image for _, images in listings_to_download for image in images),
+        download_params,
+        skip=lambda image: image is not None
+        and image.get("collection_id") in scrolled_collections,
+    )
+    for collection, images in listings:
+        collection_downloads = islice(downloads, len(images))
+        collection_content = _scroll_collection(
+            collection, download_params, collection_downloads
+        )
         for image in collection_content:
             yield image, collection
+        if collection is not None:
+            scrolled_collections.add(collection["id"])
+        for _ in collection_downloads:
+            pass
 
 
 def _scroll_collection_ids(download_params):
@@ -1988,9 +2195,9 @@ def _scroll_image_ids(download_params):
     images = _yield_from_url_list(
         image_urls, verbose=download_params["verbose"]
     )
-    for image in images:
+    for image, download in _download_images(images, download_params):
         try:
-            image = _download_image(image, download_params)
+            image = download()
             collection = _json_add_collection_dir(
                 os.path.join(
                     os.path.dirname(image["absolute_path"]),
@@ -2107,6 +2314,7 @@ def _scroll(download_params):
         return
     if found == download_params["max_images"]:
         return
+    download_params["n_found"] = found
     server_data = scroll_modes[download_params["scroll_mode"]](download_params)
     n_consecutive_fails = 0
     for image, collection in server_data:
@@ -2115,6 +2323,7 @@ def _scroll(download_params):
         else:
             n_consecutive_fails = 0
             found += 1
+            download_params["n_found"] = found
             _print_progress(found, download_params)
             yield image, collection
 
@@ -2225,6 +2434,7 @@ def _read_download_params(
     verbose=3,
     fetch_neurosynth_words=False,
     vectorize_words=True,
+    n_jobs=1,
 ):
     """Create a dictionary containing download information."""
     download_params = {"verbose": verbose}
@@ -2261,6 +2471,7 @@ def _read_download_params(
         download_params["nv_data_dir"], os.W_OK
     )
     download_params["vectorize_words"] = vectorize_words
+    download_params["n_jobs"] = effective_n_jobs(n_jobs)
     return download_params
 
 
@@ -2403,6 +2614,7 @@ def _fetch_neurovault_implementation(
     interpolation="continuous",
     vectorize_words=True,
     verbose=3,
+    n_jobs=1,
     **kwarg_image_filters,
 ):
     """Download data from neurovault.org and neurosynth.org."""
@@ -2431,11 +2643,14 @@ def _fetch_neurovault_implementation(
         verbose=verbose,
         fetch_neurosynth_words=fetch_neurosynth_words,
         vectorize_words=vectorize_words,
+        n_jobs=n_jobs,
     )
     download_params = _prepare_download_params(download_params)
+    n_jobs = download_params["n_jobs"]
 
-    with _TemporaryDirectory() as temp_dir:
+    with _TemporaryDirectory() as temp_dir, _thread_pool(n_jobs) as executor:
         download_params["temp_dir"] = temp_dir
+        download_params["executor"] = executor
         scroller = list(_scroll(download_params))
 
     return _result_list_to_bunch(scroller, download_params)
@@ -2453,6 +2668,7 @@ def fetch_neurovault(
     resample=False,
     vectorize_words=True,
     verbose=3,
+    n_jobs=1,
     **kwarg_image_filters,
 ):
     """Download data from neurovault.org that match certain criteria.
@@ -2531,6 +2747,16 @@ def fetch_neurovault(
     verbose : int, default=3
         An integer in [0, 1, 2, 3] to control the verbosity level.
 
+    n_jobs : int, default=1
+        Number of images downloaded at the same time. If more than 1, images
+        are downloaded by a pool of threads while the metadata of the next
+        images is fetched and filtered. Images are returned in the same order
+        and no more than `max_images` images are downloaded, unless some
+        downloads fail. -1 means as many threads as CPUs, and
+        ``-i`` all but ``i - 1`` CPUs (joblib conventions).
+
+        .. versionadded:: 0.11.0
+
     kwarg_image_filters
         Keyword arguments are understood to be filter terms for
         images, so for example ``map_type='Z map'`` means only
@@ -2669,6 +2895,7 @@ def fetch_neurovault(
         resample=resample,
         vectorize_words=vectorize_words,
         verbose=verbose,
+        n_jobs=n_jobs,
         **kwarg_image_filters,
     )
 
@@ -2682,6 +2909,7 @@ def fetch_neurovault_ids(
     resample=False,
     vectorize_words=True,
     verbose=3,
+    n_jobs=1,
 ):
     """Download specific images and collections from neurovault.org.
 
@@ -2732,6 +2960,15 @@ def fetch_neurovault_ids(
     verbose : int, default=3
         An integer in [0, 1, 2, 3] to control the verbosity level.
 
+    n_jobs : int, default=1
+        Number of images downloaded at the same time. If more than 1, images
+        are downloaded by a pool of threads while the metadata of the next
+        images is fetched. Images are returned in the same order.
+        -1 means as many threads as CPUs, and ``-i`` all but ``i - 1`` CPUs
+        (joblib conventions).
+
+        .. versionadded:: 0.11.0
+
     Returns
     -------
     Bunch
@@ -2784,6 +3021,7 @@ def fetch_neurovault_ids(
         resample=resample,
         vectorize_words=vectorize_words,
         verbose=verbose,
+        n_jobs=n_jobs,
     )
 
 
@@ -782,6 +782,111 @@ def test_fetch_neurovault(tmp_path):
         neurovault.fetch_neurovault(data_dir=tmp_path)
 
 
+@pytest.mark.parametrize("max_images", [1, 17])
+def test_fetch_neurovault_n_jobs(tmp_path, request_mocker, max_images):
+    data = neurovault.fetch_neurovault(
+        max_images=max_images, data_dir=tmp_path / "sequential", verbose=0
+    )
+    n_requests = request_mocker.url_count
+    concurrent_data = neurovault.fetch_neurovault(
+        max_images=max_images,
+        data_dir=tmp_path / "concurrent",
+        verbose=0,
+        n_jobs=4,
+    )
+
+    assert len(concurrent_data.images) == max_images
+    assert [meta["id"] for meta in concurrent_data.images_meta] == [
+        meta["id"] for meta in data.images_meta
+    ]
+    for image in concurrent_data.images:
+        load_img(image)
+    # no more images are downloaded than requested
+    downloaded = [
+        url
+        for url in request_mocker.visited_urls[n_requests:]
+        if url.endswith(".nii.gz")
+    ]
+    assert len(downloaded) == max_images
+
+    image_ids = [meta["id"] for meta in data.images_meta]
+    data = neurovault.fetch_neurovault_ids(
+        image_ids=image_ids,
+        data_dir=tmp_path / "ids",
+        fetch_neurosynth_words=True,
+        verbose=0,
+        n_jobs=3,
+    )
+
+    assert sorted(meta["id"] for meta in data.images_meta) == sorted(image_ids)
+    assert all("ns_words_absolute_path" in meta for meta in data.images_meta)
+
+
+def test_fetch_neurovault_n_jobs_bad_collection(
+    tmp_path, request_mocker, monkeypatch
+):
+    data = neurovault.fetch_neurovault(
+        max_images=None, data_dir=tmp_path / "all", verbose=0
+    )
+    col_ids = [meta["collection_id"] for meta in data.images_meta]
+    bad_col_id = max(col_ids, key=col_ids.count)
+    assert col_ids.count(bad_col_id) > 2
+    request_mocker.url_mapping[f"*media/images/{bad_col_id}/*"] = 500
+    prepare_download_params = neurovault._prepare_download_params
+
+    def _prepare_with_max_fails(download_params):
+        download_params = prepare_download_params(download_params)
+        download_params["max_fails_in_collection"] = 2
+        return download_params
+
+    monkeypatch.setattr(
+        neurovault, "_prepare_download_params", _prepare_with_max_fails
+    )
+
+    results, bad_requests = [], []
+    for n_jobs in [1, 4]:
+        n_requests = request_mocker.url_count
+        results.append(
+            neurovault.fetch_neurovault(
+                max_images=None,
+                data_dir=tmp_path / str(n_jobs),
+                verbose=0,
+                n_jobs=n_jobs,
+            )
+        )
+        bad_requests.append(
+            [
+                url
+                for url in request_mocker.visited_urls[n_requests:]
+                if f"media/images/{bad_col_id}/" in url
+            ]
+        )
+
+    image_ids = [meta["id"] for meta in results[0].images_meta]
+    assert image_ids
+    assert bad_col_id not in [
+        meta["collection_id"] for meta in results[0].images_meta
+    ]
+    assert [meta["id"] for meta in results[1].images_meta] == image_ids
+    # the images left in the bad collection are not downloaded,
+    # only those already downloaded ahead by the other threads
+    assert len(bad_requests[0]) == 2
+    assert len(bad_requests[1]) <= 2 + 4 - 1
+
+
+def test_fetch_neurovault_n_jobs_all_cpus(tmp_path, request_mocker):
+    data = neurovault.fetch_neurovault(
+        max_images=3, data_dir=tmp_path, verbose=0, n_jobs=-1
+    )
+
+    assert len(data.images) == 3
+
+    with pytest.raises(ValueError, match="n_jobs == 0"):
+        neurovault.fetch_neurovault(
+            max_images=3, data_dir=tmp_path, verbose=0, n_jobs=0
+        )
+
+
 def test_fetch_neurovault_errors(capsys, request_mocker):
     """Test that errors are logged when the server returns an error code.
 
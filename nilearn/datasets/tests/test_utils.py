@@ -5,8 +5,11 @@
 import contextlib
 import gzip
 import os
+import re
 import shutil
 import tarfile
+import threading
+import time
 import urllib
 import zipfile
 from tempfile import mkdtemp, mkstemp
@@ -17,6 +20,7 @@ import pytest
 import requests
 
 from nilearn.datasets import utils
+from nilearn.datasets.tests._testing import Response
 from nilearn.image import load_img
 
 currdir = os.path.dirname(os.path.abspath(__file__))
@@ -499,6 +503,113 @@ def test_fetch_files_overwrite(
         assert fp.read() == ""
 
 
+def test_fetch_files_concurrently(tmp_path, request_mocker):
+    threads = set()
+
+    def content(match, request):
+        # latency of the server
+        time.sleep(0.01)
+        threads.add(threading.current_thread().name)
+        return f"content of {match.group(1)}"
+
+    request_mocker.url_mapping[re.compile(r".*example.org/(.*)")] = content
+    files = [
+        (f"{i}.txt", f"http://example.org/{i}.txt", {}) for i in range(20)
+    ]
+
+    fetched = utils._fetch_files(str(tmp_path), files, verbose=0)
+
+    assert request_mocker.url_count == 20
+    assert fetched == [str(tmp_path / file_) for file_, _, _ in files]
+    for i, fil in enumerate(fetched):
+        with open(fil) as fp:
+            assert fp.read() == f"content of {i}.txt"
+    assert len(threads) > 1
+    assert threading.current_thread().name not in threads
+
+    # complete files are not downloaded again
+    utils._fetch_files(str(tmp_path), files, verbose=0)
+
+    assert request_mocker.url_count == 20
+
+
+def test_fetch_files_concurrently_failure(tmp_path, request_mocker):
+    request_mocker.url_mapping["*"] = b"content"
+    request_mocker.url_mapping["*3.txt"] = 404
+    files = [(f"{i}.txt", f"http://example.org/{i}.txt", {}) for i in range(6)]
+
+    with pytest.raises(requests.HTTPError):
+        utils._fetch_files(str(tmp_path), files, verbose=0)
+
+    # downloads which succeeded are kept until the dataset is complete
+    assert not (tmp_path / "0.txt").exists()
+    del request_mocker.url_mapping["*3.txt"]
+    downloaded = set(request_mocker.visited_urls)
+    downloaded.remove("http://example.org/3.txt")
+    n_requests = request_mocker.url_count
+    fetched = utils._fetch_files(str(tmp_path), files, verbose=0)
+
+    assert (
+        "http://example.org/3.txt" in request_mocker.visited_urls[n_requests:]
+    )
+    assert sorted(request_mocker.visited_urls[n_requests:]) == sorted(
+        {url for _, url, _ in files} - downloaded
+    )
+    assert all(os.path.isfile(fil) for fil in fetched)
+
+    files[0] = ("0.txt", "http://example.org/0.txt", {"md5sum": "bad"})
+    files[1] = ("1.txt", "http://example.org/1.txt", {"overwrite": True})
+    with pytest.raises(ValueError, match="checksum"):
+        utils._fetch_files(str(tmp_path / "other"), files, verbose=0)
+
+
+def test_fetch_files_concurrently_same_file_name(tmp_path, request_mocker):
+    # as in fetch_atlas_pauli_2017, urls with the same base name
+    # are downloaded together and then moved to their target
+    def content(match, request):
+        time.sleep(0.01)
+        return f"content of {match.group(1)}" * 1000
+
+    request_mocker.url_mapping[
+        re.compile(r".*osf.io/(\w+)/download")
+    ] = content
+    files = [
+        (name, f"https://osf.io/{name}/download", {"move": name})
+        for name in ["maps", "labels", "other"]
+    ]
+
+    fetched = utils._fetch_files(str(tmp_path), files, verbose=0)
+
+    assert request_mocker.url_count == 3
+    for (name, _, _), fil in zip(files, fetched):
+        with open(fil) as fp:
+            assert fp.read() == f"content of {name}" * 1000
+    assert sorted(os.listdir(tmp_path)) == ["labels", "maps", "other"]
+
+
+def test_fetch_file_resume(tmp_path, request_mocker):
+    content = b"0123456789"
+
+    def partial_content(match, request):
+        start = int(request.headers["Range"].split("=")[1].rstrip("-"))
+        response = Response(content[start:], request.url)
+        response.headers["Content-Range"] = f"bytes {start}-9/10"
+        return response
+
+    request_mocker.url_mapping["*"] = partial_content
+    (tmp_path / "file.txt.part").write_bytes(content[:4])
+
+    fil = utils._fetch_file(
+        "http://example.org/file.txt", str(tmp_path), verbose=0
+    )
+
+    assert request_mocker.url_count == 1
+    assert request_mocker.sent_requests[0].headers["Range"] == "bytes=4-"
+    with open(fil, "rb") as fp:
+        assert fp.read() == content
+    assert not (tmp_path / "file.txt.part").exists()
+
+
 def test_naive_ftp_adapter():
     sender = utils._NaiveFTPAdapter()
     resp = sender.send(requests.Request("GET", "ftp://example.com").prepare())
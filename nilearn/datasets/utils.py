@@ -13,6 +13,7 @@ import time
 import urllib
 import warnings
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import numpy as np
@@ -21,6 +22,7 @@ import requests
 from .._utils import fill_doc
 
 _REQUESTS_TIMEOUT = (15.1, 61)
+_MAX_DOWNLOAD_WORKERS = 8
 
 
 def md5_hash(string):
@@ -612,7 +614,6 @@ def _fetch_file(
     if os.path.exists(temp_full_name) and overwrite:
         os.remove(temp_full_name)
     t0 = time.time()
-    local_file = None
     initial_size = 0
 
     try:
@@ -650,7 +651,7 @@ def _fetch_file(
                     ):
                         raise OSError("Server does not support resuming")
                     initial_size = local_file_size
-                    with open(local_file, "ab") as fh:
+                    with open(temp_full_name, "ab") as fh:
                         _chunk_read_(
                             resp,
                             fh,
@@ -703,12 +704,80 @@ def _fetch_file(
         raise
     if md5sum is not None and _md5_sum_file(full_name) != md5sum:
         raise ValueError(
-            f"File {local_file} checksum verification has failed."
+            f"File {full_name} checksum verification has failed."
             " Dataset fetching aborted."
         )
     return full_name
 
 
+@fill_doc
+def _fetch_files_concurrently(data_dir, downloads, verbose=1, session=None):
+    """Download several files with a pool of threads sharing a session.
+
+    Downloads are waiting for the server most of the time, so downloading
+    many small files concurrently is much faster than one after the other.
+    The requests share the connection pool of the session. Each url is
+    downloaded in a subdirectory of data_dir named after its hash, so that
+    urls with the same file name do not write to the same file.
+
+    Parameters
+    ----------
+    %(data_dir)s
+    downloads : dict
+        Maps each url to the keyword arguments of :func:`_fetch_file` for this
+        url, e.g. ``resume``, ``md5sum`` or ``overwrite``.
+    %(verbose)s
+    session : requests.Session
+        Session to use to send requests.
+
+    Returns
+    -------
+    files : dict
+        Maps each url to the absolute path of the downloaded file.
+
+    Notes
+    -----
+    If a download fails, the downloads which have not started are cancelled,
+    the others are completed and the error is raised. Completed files and
+    partial downloads are kept in data_dir, so that fetching again does not
+    download them from scratch.
+
+    """
+    if verbose > 0:
+        print(f"Downloading {len(downloads)} files ...")
+    files = {}
+    with ThreadPoolExecutor(
+        max_workers=min(_MAX_DOWNLOAD_WORKERS, len(downloads))
+    ) as executor:
+        futures = {
+            executor.submit(
+                # progress reports of concurrent downloads would mix
+                _fetch_file,
+                url,
+                os.path.join(data_dir, md5_hash(url)),
+                verbose=0,
+                session=session,
+                **kwargs,
+            ): url
+            for url, kwargs in downloads.items()
+        }
+        try:
+            for future in as_completed(futures):
+                files[futures[future]] = future.result()
+                if verbose > 0:
+                    sys.stderr.write(
+                        f"\rDownloaded {len(files)} of {len(futures)} files."
+                    )
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            if verbose > 0 and files:
+                sys.stderr.write("\n")
+    return files
+
+
 def _get_dataset_descr(ds_name):
     module_path = os.path.dirname(os.path.abspath(__file__))
 
@@ -825,6 +894,37 @@ def _fetch_files(data_dir, files, resume=True, verbose=1, session=None):
     # Abortion flag, in case of error
     abort = None
 
+    # Files missing from both directories are downloaded concurrently first,
+    # then moved, uncompressed and checked in order. Other files may be
+    # extracted from archives, so only archives are downloaded concurrently
+    # when there are some.
+    archives_only = any("uncompress" in opts for _, _, opts in files)
+    downloads = {}
+    for file_, url, opts in files:
+        if archives_only and "uncompress" not in opts:
+            continue
+        if opts.get("overwrite", False) or (
+            not os.path.exists(os.path.join(data_dir, file_))
+            and not os.path.exists(os.path.join(temp_dir, file_))
+        ):
+            downloads.setdefault(
+                url,
+                dict(
+                    resume=resume,
+                    md5sum=opts.get("md5sum", None),
+                    username=opts.get("username", None),
+                    password=opts.get("password", None),
+                    overwrite=opts.get("overwrite", False),
+                ),
+            )
+    downloaded = {}
+    if len(downloads) > 1 and os.access(data_dir, os.W_OK):
+        if not os.path.exists(temp_dir):
+            os.mkdir(temp_dir)
+        downloaded = _fetch_files_concurrently(
+            temp_dir, downloads, verbose=verbose, session=session
+        )
+
     files_ = []
     for file_, url, opts in files:
         # 3 possibilities:
@@ -859,17 +959,28 @@ def _fetch_files(data_dir, files, resume=True, verbose=1, session=None):
                 os.mkdir(temp_dir)
             md5sum = opts.get("md5sum", None)
 
-            dl_file = _fetch_file(
-                url,
-                temp_dir,
-                resume=resume,
-                verbose=verbose,
-                md5sum=md5sum,
-                username=opts.get("username", None),
-                password=opts.get("password", None),
-                session=session,
-                overwrite=overwrite,
-            )
+            dl_file = downloaded.pop(url, None)
+            if dl_file is not None and os.path.exists(dl_file):
+                # Concurrent downloads are processed as if they were
+                # downloaded now in temp_dir
+                dl_dir = os.path.dirname(dl_file)
+                dl_file = shutil.move(
+                    dl_file,
+                    os.path.join(temp_dir, os.path.basename(dl_file)),
+                )
+                shutil.rmtree(dl_dir)
+            else:
+                dl_file = _fetch_file(
+                    url,
+                    temp_dir,
+                    resume=resume,
+                    verbose=verbose,
+                    md5sum=md5sum,
+                    username=opts.get("username", None),
+                    password=opts.get("password", None),
+                    session=session,
+                    overwrite=overwrite,
+                )
             if "move" in opts:
                 # XXX: here, move is supposed to be a dir, it can be a name
                 move = os.path.join(temp_dir, opts["move"])
@@ -900,6 +1011,9 @@ def _fetch_files(data_dir, files, resume=True, verbose=1, session=None):
                 shutil.rmtree(temp_dir)
             raise OSError(f"Fetching aborted: {abort}")
         files_.append(target_file)
+    # Downloads made useless by an archive uncompressed meanwhile
+    for dl_file in downloaded.values():
+        shutil.rmtree(os.path.dirname(dl_file), ignore_errors=True)
     # If needed, move files from temps directory to final directory.
     if os.path.exists(temp_dir):
         # XXX We could only moved the files requested
@@ -36,12 +36,11 @@ from nilearn.glm.first_level.design_matrix import (
     make_first_level_design_matrix,
 )
 from nilearn.glm.regression import (
-    ARModel,
     OLSModel,
     RegressionResults,
     SimpleRegressionResults,
+    _batch_ar_models,
 )
-from nilearn.image import get_data
 from nilearn.interfaces.bids import get_bids_files, parse_bids_filename
 from nilearn.interfaces.bids._utils import _bids_entities, _check_bids_label
 from nilearn.interfaces.bids.query import (
@@ -83,15 +82,12 @@ def mean_scaling(Y, axis=0):
     return Y, mean
 
 
-def _ar_model_fit(X, val, Y):
-    """Wrap fit method of ARModel to allow joblib parallelization."""
-    return ARModel(X, val).fit(Y)
-
-
-def _yule_walker(x, order):
+def _yule_walker(x, order, mean=None):
     """Compute Yule-Walker (adapted from MNE and statsmodels).
 
     Operates along the last axis of x.
+    The data are centered with ``mean`` if given,
+    otherwise with the mean of x.
     """
     from scipy.linalg import toeplitz
 
@@ -105,7 +101,7 @@ def _yule_walker(x, order):
     denom = x.shape[-1] - np.arange(order + 1)
     n = np.prod(np.array(x.shape[:-1], int))
     r = np.zeros((n, order + 1), np.float64)
-    y = x - x.mean()
+    y = x - (x.mean() if mean is None else mean)
     y.shape = (n, x.shape[-1])  # inplace
     r[:, 0] += (y[:, np.newaxis, :] @ y[:, :, np.newaxis])[:, 0, 0]
     for k in range(1, order + 1):
@@ -117,8 +113,141 @@ def _yule_walker(x, order):
     return rho
 
 
+def _ar_labels(ar_coef_, ar_order, bins, random_state=None):
+    """Quantize the AR coefficients of each voxel into labels.
+
+    AR(1) coefficients are binned, AR(N>1) coefficients are clustered via
+    K-means with ``bins`` clusters.
+
+    Returns
+    -------
+    labels : array of shape (n_voxels,)
+        The label of each voxel.
+
+    ar_coef_ : array of shape (n_voxels,) or (n_voxels, ar_order)
+        The quantized AR coefficients of each voxel.
+
+    """
+    if ar_order == 1:
+        ar_coef_ = (ar_coef_ * bins).astype(int) * 1.0 / bins
+        labels = np.array([str(val) for val in ar_coef_])
+    else:  # AR(N>1) case
+        n_clusters = np.min([bins, ar_coef_.shape[0]])
+        kmeans = KMeans(
+            n_clusters=n_clusters, n_init=10, random_state=random_state
+        ).fit(ar_coef_)
+        ar_coef_ = kmeans.cluster_centers_[kmeans.labels_]
+
+        # Create a set of rounded values for the labels with _ between
+        # each coefficient
+        cluster_labels = kmeans.cluster_centers_.copy()
+        cluster_labels = np.array(
+            ["_".join(map(str, np.round(a, 2))) for a in cluster_labels]
+        )
+        # Create labels and coef per voxel
+        labels = np.array([cluster_labels[i] for i in kmeans.labels_])
+    return labels, ar_coef_
+
+
+def _merge_simple_results(results):
+    """Concatenate the voxels of SimpleRegressionResults \
+    fitted with the same model on different sets of voxels.
+    """
+    merged = results[0]
+    merged.theta = np.concatenate([res.theta for res in results], axis=1)
+    merged.dispersion = np.concatenate([res.dispersion for res in results])
+    return merged
+
+
+def _ar_model_fit_chunk(ar_models, Y, label_indices):
+    """Fit the AR models on a chunk of voxels and only keep \
+    what is needed for contrasts.
+    """
+    Y = np.asarray(Y)
+    return {
+        idx: SimpleRegressionResults(
+            ar_models[idx].fit(Y[:, label_indices == idx])
+        )
+        for idx in np.unique(label_indices)
+    }
+
+
+def _run_glm_chunked(
+    Y, X, ar_order, bins, chunk_size, n_jobs, verbose, random_state
+):
+    """Fit the GLM on consecutive blocks of ``chunk_size`` voxels.
+
+    See run_glm for details.
+    """
+    n_voxels = Y.shape[1]
+    chunks = [
+        slice(start, min(start + chunk_size, n_voxels))
+        for start in range(0, n_voxels, chunk_size)
+    ]
+    ols_model = OLSModel(X)
+
+    if ar_order is None:
+        ols_result = _merge_simple_results(
+            [
+                SimpleRegressionResults(ols_model.fit(np.asarray(Y[:, chunk])))
+                for chunk in chunks
+            ]
+        )
+        return np.zeros(n_voxels), {0.0: ols_result}
+
+    # _yule_walker centers the residuals of all voxels with their global
+    # mean. Since the residuals are (I - X X^+) Y, that mean only requires
+    # the sum of Y across voxels.
+    y_sum = np.zeros(Y.shape[0])
+    for chunk in chunks:
+        y_sum += np.asarray(Y[:, chunk]).sum(axis=1)
+    residuals_weights = 1 - np.dot(X, ols_model.calc_beta).sum(axis=0)
+    residuals_mean = np.dot(residuals_weights, y_sum) / (Y.shape[0] * n_voxels)
+
+    # compute the AR coefficients
+    ar_coef_ = np.concatenate(
+        [
+            _yule_walker(
+                ols_model.fit(np.asarray(Y[:, chunk])).residuals.T,
+                ar_order,
+                mean=residuals_mean,
+            )
+            for chunk in chunks
+        ]
+    )
+    if ar_order == 1:
+        ar_coef_ = ar_coef_[:, 0]
+    labels, ar_coef_ = _ar_labels(ar_coef_, ar_order, bins, random_state)
+
+    unique_labels, first_indices, label_indices = np.unique(
+        labels, return_index=True, return_inverse=True
+    )
+    ar_models = _batch_ar_models(X, ar_coef_[first_indices])
+    chunk_results = Parallel(n_jobs=n_jobs, verbose=verbose)(
+        delayed(_ar_model_fit_chunk)(
+            ar_models, Y[:, chunk], label_indices[chunk]
+        )
+        for chunk in chunks
+    )
+
+    # chunks are ordered so the voxels of each label stay in order
+    results = {}
+    for idx, val in enumerate(unique_labels):
+        results[val] = _merge_simple_results(
+            [res[idx] for res in chunk_results if idx in res]
+        )
+    return labels, results
+
+
 def run_glm(
-    Y, X, noise_model="ar1", bins=100, n_jobs=1, verbose=0, random_state=None
+    Y,
+    X,
+    noise_model="ar1",
+    bins=100,
+    n_jobs=1,
+    verbose=0,
+    random_state=None,
+    chunk_size=None,
 ):
     """:term:`GLM` fit for an :term:`fMRI` data matrix.
 
@@ -126,6 +255,8 @@ def run_glm(
     ----------
     Y : array of shape (n_time_points, n_voxels)
         The :term:`fMRI` data.
+        Can be a :class:`numpy.memmap` when ``chunk_size`` is given,
+        in which case only one chunk of voxels is read at a time.
 
     X : array of shape (n_time_points, n_regressors)
         The design matrix.
@@ -155,6 +286,16 @@ def run_glm(
 
         .. versionadded:: 0.9.1
 
+    chunk_size : int or None, default=None
+        If not None, the model is fitted on blocks of ``chunk_size`` voxels,
+        and only the statistics needed to compute contrasts are kept for
+        each block. This bounds the peak memory usage by the chunk size
+        rather than by the number of voxels.
+        The returned results are then
+        :class:`~nilearn.glm.SimpleRegressionResults`.
+
+        .. versionadded:: 0.11.0
+
     Returns
     -------
     labels : array of shape (n_voxels,),
@@ -178,10 +319,15 @@ def run_glm(
             f"You provided X with shape {X.shape} "
             f"and Y with shape {Y.shape}."
         )
+    if chunk_size is not None and (
+        not isinstance(chunk_size, (int, np.integer)) or chunk_size < 1
+    ):
+        raise ValueError(
+            "chunk_size must be a positive integer or None. "
+            f"You provided {chunk_size}."
+        )
 
-    # Create the model
-    ols_result = OLSModel(X).fit(Y)
-
+    ar_order = None
     if noise_model[:2] == "ar":
         err_msg = (
             "AR order must be a positive integer specified as arN, "
@@ -193,6 +339,15 @@ def run_glm(
         except ValueError:
             raise ValueError(err_msg)
 
+    if chunk_size is not None:
+        return _run_glm_chunked(
+            Y, X, ar_order, bins, chunk_size, n_jobs, verbose, random_state
+        )
+
+    # Create the model
+    ols_result = OLSModel(X).fit(Y)
+
+    if ar_order is not None:
         # compute the AR coefficients
         ar_coef_ = _yule_walker(ols_result.residuals.T, ar_order)
         del ols_result
@@ -200,41 +355,28 @@ def run_glm(
             ar_coef_ = ar_coef_[:, 0]
 
         # Either bin the AR1 coefs or cluster ARN coefs
-        if ar_order == 1:
-            for idx in range(len(ar_coef_)):
-                ar_coef_[idx] = (ar_coef_[idx] * bins).astype(int) * 1.0 / bins
-            labels = np.array([str(val) for val in ar_coef_])
-        else:  # AR(N>1) case
-            n_clusters = np.min([bins, Y.shape[1]])
-            kmeans = KMeans(
-                n_clusters=n_clusters, n_init=10, random_state=random_state
-            ).fit(ar_coef_)
-            ar_coef_ = kmeans.cluster_centers_[kmeans.labels_]
-
-            # Create a set of rounded values for the labels with _ between
-            # each coefficient
-            cluster_labels = kmeans.cluster_centers_.copy()
-            cluster_labels = np.array(
-                ["_".join(map(str, np.round(a, 2))) for a in cluster_labels]
-            )
-            # Create labels and coef per voxel
-            labels = np.array([cluster_labels[i] for i in kmeans.labels_])
+        labels, ar_coef_ = _ar_labels(ar_coef_, ar_order, bins, random_state)
 
-        unique_labels = np.unique(labels)
+        unique_labels, first_indices, label_indices = np.unique(
+            labels, return_index=True, return_inverse=True
+        )
         results = {}
 
-        # Fit the AR model according to current AR(N) estimates
+        # Fit the AR model according to current AR(N) estimates.
+        # The designs of all the models are whitened and pseudo-inverted
+        # in a single batch, so that only the projection of the data
+        # remains to be done for each label.
+        ar_models = _batch_ar_models(X, ar_coef_[first_indices])
         ar_result = Parallel(n_jobs=n_jobs, verbose=verbose)(
-            delayed(_ar_model_fit)(
-                X, ar_coef_[labels == val][0], Y[:, labels == val]
-            )
-            for val in unique_labels
+            delayed(model.fit)(Y[:, label_indices == idx])
+            for idx, model in enumerate(ar_models)
         )
 
         # Converting the key to a string is required for AR(N>1) cases
         for val, result in zip(unique_labels, ar_result):
             results[val] = result
         del unique_labels
+        del ar_models
         del ar_result
 
     else:
@@ -365,6 +507,15 @@ class FirstLevelModel(BaseGLM):
         The number of CPUs to use to do the computation. -1 means
         'all CPUs', -2 'all CPUs but one', and so on.
 
+    n_jobs_runs : integer, default=1
+        The number of runs fitted concurrently, each in its own process.
+        This also bounds the number of runs held in memory at the same time.
+        -1 means 'all CPUs', -2 'all CPUs but one', and so on.
+        Note that ``n_jobs`` still controls the parallelization
+        of the fit of each run.
+
+        .. versionadded:: 0.11.0
+
     minimize_memory : boolean, default=True
         Gets rid of some variables on the model fit results that are not
         necessary for contrast computation and would only be useful for
@@ -419,6 +570,7 @@ class FirstLevelModel(BaseGLM):
         minimize_memory=True,
         subject_label=None,
         random_state=None,
+        n_jobs_runs=1,
     ):
         # design matrix parameters
         if t_r is not None:
@@ -455,6 +607,7 @@ class FirstLevelModel(BaseGLM):
         self.noise_model = noise_model
         self.verbose = verbose
         self.n_jobs = n_jobs
+        self.n_jobs_runs = n_jobs_runs
         self.minimize_memory = minimize_memory
         # attributes
         self.labels_ = None
@@ -623,118 +776,180 @@ class FirstLevelModel(BaseGLM):
         self.labels_, self.results_, self.design_matrices_ = [], [], []
         n_runs = len(run_imgs)
         t0 = time.time()
-        for run_idx, run_img in enumerate(run_imgs):
-            # Report progress
-            if self.verbose > 0:
-                percent = float(run_idx) / n_runs
-                percent = round(percent * 100, 2)
-                dt = time.time() - t0
-                # We use a max to avoid a division by zero
-                if run_idx == 0:
-                    remaining = "go take a coffee, a big one"
-                else:
-                    remaining = (100.0 - percent) / max(0.01, percent) * dt
-                    remaining = f"{int(remaining)} seconds remaining"
-
-                sys.stderr.write(
-                    f"Computing run {run_idx + 1} "
-                    f"out of {n_runs} runs ({remaining})\n"
+        if self.n_jobs_runs == 1 or n_runs == 1:
+            for run_idx, run_img in enumerate(run_imgs):
+                # Report progress
+                if self.verbose > 0:
+                    percent = float(run_idx) / n_runs
+                    percent = round(percent * 100, 2)
+                    dt = time.time() - t0
+                    # We use a max to avoid a division by zero
+                    if run_idx == 0:
+                        remaining = "go take a coffee, a big one"
+                    else:
+                        remaining = (100.0 - percent) / max(0.01, percent) * dt
+                        remaining = f"{int(remaining)} seconds remaining"
+
+                    sys.stderr.write(
+                        f"Computing run {run_idx + 1} "
+                        f"out of {n_runs} runs ({remaining})\n"
+                    )
+                labels, results, design = self._fit_single_run(
+                    run_idx,
+                    run_img,
+                    events,
+                    confounds,
+                    sample_masks,
+                    design_matrices,
+                    bins,
                 )
-
-            # Build the experimental design for the glm
-            run_img = check_niimg(run_img, ensure_ndim=4)
-            if design_matrices is None:
-                n_scans = get_data(run_img).shape[3]
-                if confounds is not None:
-                    confounds_matrix = confounds[run_idx].values
-                    if confounds_matrix.shape[0] != n_scans:
-                        raise ValueError(
-                            "Rows in confounds does not match "
-                            "n_scans in run_img "
-                            f"at index {run_idx}."
-                        )
-                    confounds_names = confounds[run_idx].columns.tolist()
-                else:
-                    confounds_matrix = None
-                    confounds_names = None
-                start_time = self.slice_time_ref * self.t_r
-                end_time = (n_scans - 1 + self.slice_time_ref) * self.t_r
-                frame_times = np.linspace(start_time, end_time, n_scans)
-                design = make_first_level_design_matrix(
-                    frame_times,
-                    events[run_idx],
-                    self.hrf_model,
-                    self.drift_model,
-                    self.high_pass,
-                    self.drift_order,
-                    self.fir_delays,
-                    confounds_matrix,
-                    confounds_names,
-                    self.min_onset,
+                self.labels_.append(labels)
+                self.results_.append(results)
+                self.design_matrices_.append(design)
+        else:
+            # Runs are independent: fit them in separate processes.
+            # pre_dispatch="n_jobs" ensures that no more than n_jobs_runs
+            # runs are loaded in memory at any given time.
+            run_outputs = Parallel(
+                n_jobs=self.n_jobs_runs,
+                pre_dispatch="n_jobs",
+                verbose=self.verbose,
+            )(
+                delayed(self._fit_single_run)(
+                    run_idx,
+                    run_img,
+                    events,
+                    confounds,
+                    sample_masks,
+                    design_matrices,
+                    bins,
                 )
-            else:
-                design = design_matrices[run_idx]
+                for run_idx, run_img in enumerate(run_imgs)
+            )
+            for labels, results, design in run_outputs:
+                self.labels_.append(labels)
+                self.results_.append(results)
+                self.design_matrices_.append(design)
+            del run_outputs
 
-            if sample_masks is not None:
-                sample_mask = sample_masks[run_idx]
-                design = design.iloc[sample_mask, :]
-            else:
-                sample_mask = None
+        # Report progress
+        if self.verbose > 0:
+            sys.stderr.write(
+                f"\nComputation of {n_runs} runs done "
+                f"in {time.time() - t0} seconds.\n\n"
+            )
+        return self
 
-            self.design_matrices_.append(design)
+    def _fit_single_run(
+        self,
+        run_idx,
+        run_img,
+        events,
+        confounds,
+        sample_masks,
+        design_matrices,
+        bins,
+    ):
+        """Build the design, mask the data and fit the GLM of a single run.
 
-            # Mask and prepare data for GLM
-            if self.verbose > 1:
-                t_masking = time.time()
-                sys.stderr.write("Starting masker computation \r")
+        Returns
+        -------
+        labels : array of shape (n_voxels,)
+            A map of values on voxels used to identify
+            the corresponding model.
 
-            Y = self.masker_.transform(run_img, sample_mask=sample_mask)
-            del run_img  # Delete unmasked image to save memory
+        results : dict
+            Regression results of the run, keyed by labels values.
 
-            if self.verbose > 1:
-                t_masking = time.time() - t_masking
-                sys.stderr.write(
-                    f"Masker took {int(t_masking)} seconds       \n"
-                )
+        design : pandas DataFrame
+            The design matrix of the run.
 
-            if self.signal_scaling is not False:
-                Y, _ = mean_scaling(Y, self.signal_scaling)
+        """
+        # Build the experimental design for the glm
+        run_img = check_niimg(run_img, ensure_ndim=4)
+        if design_matrices is None:
+            n_scans = run_img.shape[3]
+            if confounds is not None:
+                confounds_matrix = confounds[run_idx].values
+                if confounds_matrix.shape[0] != n_scans:
+                    raise ValueError(
+                        "Rows in confounds does not match "
+                        "n_scans in run_img "
+                        f"at index {run_idx}."
+                    )
+                confounds_names = confounds[run_idx].columns.tolist()
+            else:
+                confounds_matrix = None
+                confounds_names = None
+            start_time = self.slice_time_ref * self.t_r
+            end_time = (n_scans - 1 + self.slice_time_ref) * self.t_r
+            frame_times = np.linspace(start_time, end_time, n_scans)
             if self.memory:
-                mem_glm = self.memory.cache(run_glm, ignore=["n_jobs"])
+                make_design = self.memory.cache(make_first_level_design_matrix)
             else:
-                mem_glm = run_glm
-
-            # compute GLM
-            if self.verbose > 1:
-                t_glm = time.time()
-                sys.stderr.write("Performing GLM computation\r")
-            labels, results = mem_glm(
-                Y,
-                design.values,
-                noise_model=self.noise_model,
-                bins=bins,
-                n_jobs=self.n_jobs,
-                random_state=self.random_state,
+                make_design = make_first_level_design_matrix
+            design = make_design(
+                frame_times,
+                events[run_idx],
+                self.hrf_model,
+                self.drift_model,
+                self.high_pass,
+                self.drift_order,
+                self.fir_delays,
+                confounds_matrix,
+                confounds_names,
+                self.min_onset,
             )
-            if self.verbose > 1:
-                t_glm = time.time() - t_glm
-                sys.stderr.write(f"GLM took {int(t_glm)} seconds         \n")
-
-            self.labels_.append(labels)
-            # We save memory if inspecting model details is not necessary
-            if self.minimize_memory:
-                for key in results:
-                    results[key] = SimpleRegressionResults(results[key])
-            self.results_.append(results)
-            del Y
+        else:
+            design = design_matrices[run_idx]
 
-        # Report progress
-        if self.verbose > 0:
-            sys.stderr.write(
-                f"\nComputation of {n_runs} runs done "
-                f"in {time.time() - t0} seconds.\n\n"
-            )
-        return self
+        if sample_masks is not None:
+            sample_mask = sample_masks[run_idx]
+            design = design.iloc[sample_mask, :]
+        else:
+            sample_mask = None
+
+        # Mask and prepare data for GLM
+        if self.verbose > 1:
+            t_masking = time.time()
+            sys.stderr.write("Starting masker computation \r")
+
+        Y = self.masker_.transform(run_img, sample_mask=sample_mask)
+        del run_img  # Delete unmasked image to save memory
+
+        if self.verbose > 1:
+            t_masking = time.time() - t_masking
+            sys.stderr.write(f"Masker took {int(t_masking)} seconds       \n")
+
+        if self.signal_scaling is not False:
+            Y, _ = mean_scaling(Y, self.signal_scaling)
+        if self.memory:
+            mem_glm = self.memory.cache(run_glm, ignore=["n_jobs"])
+        else:
+            mem_glm = run_glm
+
+        # compute GLM
+        if self.verbose > 1:
+            t_glm = time.time()
+            sys.stderr.write("Performing GLM computation\r")
+        labels, results = mem_glm(
+            Y,
+            design.values,
+            noise_model=self.noise_model,
+            bins=bins,
+            n_jobs=self.n_jobs,
+            random_state=self.random_state,
+        )
+        if self.verbose > 1:
+            t_glm = time.time() - t_glm
+            sys.stderr.write(f"GLM took {int(t_glm)} seconds         \n")
+        del Y
+
+        # We save memory if inspecting model details is not necessary
+        if self.minimize_memory:
+            for key in results:
+                results[key] = SimpleRegressionResults(results[key])
+        return labels, results, design
 
     def compute_contrast(
         self, contrast_def, stat_type=None, output_type="z_score"
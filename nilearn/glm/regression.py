@@ -17,6 +17,9 @@ General reference for regression models:
 
 __docformat__ = "restructuredtext en"
 
+import hashlib
+import threading
+from collections import OrderedDict
 
 import numpy as np
 import scipy.linalg as spl
@@ -27,6 +30,81 @@ from nilearn.glm._utils import positive_reciprocal
 from nilearn.glm.model import LikelihoodModelResults
 
 
+class _FactorizationCache:
+    """Least recently used cache of design factorizations.
+
+    Entries are tuples of arrays, keyed by the hash of the design
+    and the whitening parameters. The cache is shared by all the models
+    of a process, and bounded by the total size of the stored arrays.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum total size in bytes of the cached arrays.
+
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._n_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the entry stored for key or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        """Store a read-only copy of entry for key, \
+        evicting the least recently used entries.
+        """
+        entry = tuple(_read_only_copy(value) for value in entry)
+        n_bytes = sum(value.nbytes for value in entry)
+        if n_bytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = entry
+            self._n_bytes += n_bytes
+            while self._n_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._n_bytes -= sum(value.nbytes for value in evicted)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._n_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _read_only_copy(value):
+    value = np.array(value)
+    value.setflags(write=False)
+    return value
+
+
+# Subjects of a study often share the same design: their whitened design,
+# pseudo-inverse and rank are only computed once per process.
+_factorization_cache = _FactorizationCache(max_bytes=128 * 1024**2)
+
+
+def _design_key(design, rho=None):
+    """Return a content-based key for a design and its AR coefficients."""
+    design = np.ascontiguousarray(design, dtype=np.float64)
+    key = (design.shape, hashlib.sha1(design.tobytes()).hexdigest())
+    if rho is not None:
+        key += (np.ascontiguousarray(rho, dtype=np.float64).tobytes(),)
+    return key
+
+
 class OLSModel:
     """A simple ordinary least squares model.
 
@@ -85,17 +163,47 @@ class OLSModel:
         # PLEASE don't assume we have a constant...
         # TODO: handle case for noconstant regression
         self.design = design
-        self.whitened_design = self.whiten(self.design)
-        self.calc_beta = spl.pinv(self.whitened_design)
-        self.normalized_cov_beta = np.dot(
-            self.calc_beta, np.transpose(self.calc_beta)
-        )
+        key = self._factorization_key()
+        cached = None if key is None else _factorization_cache.get(key)
+        if cached is None:
+            self.whitened_design = self.whiten(self.design)
+            self.calc_beta = spl.pinv(self.whitened_design)
+            self.normalized_cov_beta = np.dot(
+                self.calc_beta, np.transpose(self.calc_beta)
+            )
+            eps = np.abs(self.design).sum() * np.finfo(np.float64).eps
+            self.df_model = matrix_rank(self.design, eps)
+            if key is not None:
+                _factorization_cache.put(
+                    key,
+                    (
+                        self.whitened_design,
+                        self.calc_beta,
+                        self.normalized_cov_beta,
+                        self.df_model,
+                    ),
+                )
+        else:
+            (
+                self.whitened_design,
+                self.calc_beta,
+                self.normalized_cov_beta,
+                df_model,
+            ) = cached
+            self.df_model = int(df_model)
         self.df_total = self.whitened_design.shape[0]
-
-        eps = np.abs(self.design).sum() * np.finfo(np.float64).eps
-        self.df_model = matrix_rank(self.design, eps)
         self.df_residuals = self.df_total - self.df_model
 
+    def _factorization_key(self):
+        """Return the key of the design factorization in the cache.
+
+        Subclasses may redefine the whitening,
+        so only the factorizations of OLSModel and ARModel are cached.
+        """
+        if type(self) is not OLSModel:
+            return None
+        return _design_key(self.design)
+
     def logL(self, beta, Y, nuisance=None):
         r"""Return the value of the loglikelihood function at beta.
 
@@ -255,6 +363,11 @@ class ARModel(OLSModel):
             self.order = self.rho.shape[0]
         super().__init__(design)
 
+    def _factorization_key(self):
+        if type(self) is not ARModel:
+            return None
+        return _design_key(self.design, self.rho)
+
     def whiten(self, X):
         """Whiten a series of columns according to AR(p) covariance structure.
 
@@ -278,6 +391,84 @@ class ARModel(OLSModel):
         return whitened_X
 
 
+def _batch_ar_models(design, rhos):
+    """Create one ARModel per set of AR coefficients.
+
+    The whitening of the design and the computation of its
+    pseudo-inverse are done for all models at once, on stacked arrays,
+    instead of once per ARModel instance. Factorizations already computed
+    for the same design and coefficients are reused.
+
+    Parameters
+    ----------
+    design : ndarray of shape (n_time_points, n_regressors)
+        The design matrix shared by all models.
+
+    rhos : ndarray of shape (n_models,) or (n_models, order)
+        AR coefficients of each model.
+
+    Returns
+    -------
+    models : list of ARModel
+        The models, in the order of ``rhos``.
+
+    """
+    design = np.asarray(design, np.float64)
+    rhos = np.asarray(rhos, np.float64)
+    if rhos.ndim == 1:
+        rhos = rhos[:, np.newaxis]
+    order = rhos.shape[1]
+
+    design_key = _design_key(design)
+    keys = [design_key + (rho.tobytes(),) for rho in rhos]
+    factorizations = [_factorization_cache.get(key) for key in keys]
+    missing = [i for i, fact in enumerate(factorizations) if fact is None]
+    if missing:
+        missing_rhos = rhos[missing]
+        # equivalent of ARModel.whiten, applied to all models at once
+        whitened_designs = np.repeat(design[np.newaxis], len(missing), axis=0)
+        for i in range(order):
+            whitened_designs[:, (i + 1) :] -= (
+                missing_rhos[:, i, np.newaxis, np.newaxis] * design[: -(i + 1)]
+            )
+        # use the same singular values cutoff as scipy.linalg.pinv
+        rcond = max(design.shape) * np.finfo(np.float64).eps
+        calc_betas = np.linalg.pinv(whitened_designs, rcond=rcond)
+        normalized_cov_betas = calc_betas @ np.swapaxes(calc_betas, 1, 2)
+
+        eps = np.abs(design).sum() * np.finfo(np.float64).eps
+        df_model = matrix_rank(design, eps)
+        for i, whitened_design, calc_beta, normalized_cov_beta in zip(
+            missing, whitened_designs, calc_betas, normalized_cov_betas
+        ):
+            factorizations[i] = (
+                whitened_design,
+                calc_beta,
+                normalized_cov_beta,
+                df_model,
+            )
+            _factorization_cache.put(keys[i], factorizations[i])
+
+    models = []
+    for rho, factorization in zip(rhos, factorizations):
+        # bypass ARModel.__init__ which would redo the factorization
+        model = ARModel.__new__(ARModel)
+        model.order = order
+        model.rho = rho
+        model.design = design
+        (
+            model.whitened_design,
+            model.calc_beta,
+            model.normalized_cov_beta,
+            df_model,
+        ) = factorization
+        model.df_model = int(df_model)
+        model.df_total = model.whitened_design.shape[0]
+        model.df_residuals = model.df_total - model.df_model
+        models.append(model)
+    return models
+
+
 class RegressionResults(LikelihoodModelResults):
     """Summarize the fit of a linear regression model.
 
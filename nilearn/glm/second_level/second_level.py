@@ -749,6 +749,9 @@ def non_parametric_inference(
     verbose=0,
     threshold=None,
     tfce=False,
+    checkpoint_dir=None,
+    checkpoint_every=1000,
+    n_perm_block=None,
 ):
     """Generate p-values corresponding to the contrasts provided \
     based on permutation testing.
@@ -850,6 +853,28 @@ def non_parametric_inference(
 
         .. versionadded:: 0.9.2
 
+    checkpoint_dir : None or :obj:`str` or :obj:`pathlib.Path`, default=None
+        Directory where finished chunks of permutations are saved,
+        so that an interrupted analysis can be resumed, or extended with
+        a larger ``n_perm``, by calling this function again with the same
+        inputs.
+        See :func:`~nilearn.mass_univariate.permuted_ols` for details.
+        If None, no checkpoint is saved.
+
+        .. versionadded:: 0.11.0
+
+    checkpoint_every : :obj:`int`, default=1000
+        Number of permutations per checkpointed chunk.
+        Only used if ``checkpoint_dir`` is not None.
+
+        .. versionadded:: 0.11.0
+
+    n_perm_block : None or :obj:`int`, default=None
+        Number of permutations whose t-scores are computed together.
+        See :func:`~nilearn.mass_univariate.permuted_ols` for details.
+
+        .. versionadded:: 0.11.0
+
     Returns
     -------
     neg_log10_vfwe_pvals_img : :class:`~nibabel.nifti1.Nifti1Image`
@@ -1011,6 +1036,9 @@ def non_parametric_inference(
         threshold=threshold,
         tfce=tfce,
         output_type="dict",
+        checkpoint_dir=checkpoint_dir,
+        checkpoint_every=checkpoint_every,
+        n_perm_block=n_perm_block,
     )
     neg_log10_vfwe_pvals_img = masker.inverse_transform(
         np.ravel(outputs["logp_max_t"])
@@ -35,7 +35,11 @@ from nilearn.glm.first_level.design_matrix import (
     make_first_level_design_matrix,
 )
 from nilearn.glm.first_level.first_level import _check_trial_type, _yule_walker
-from nilearn.glm.regression import ARModel, OLSModel
+from nilearn.glm.regression import (
+    ARModel,
+    OLSModel,
+    SimpleRegressionResults,
+)
 from nilearn.image import get_data
 from nilearn.interfaces.bids import get_bids_files
 from nilearn.maskers import NiftiMasker
@@ -157,6 +161,36 @@ def test_explicit_fixed_effects(tmp_path):
         compute_fixed_effects(contrasts, variance, mask, dofs=[100])
 
 
+def test_high_level_glm_parallel_runs(tmp_path):
+    """Check that fitting runs in parallel gives the same results."""
+    shapes, rk = ((7, 8, 7, 15), (7, 8, 7, 16), (7, 8, 7, 14)), 3
+    mask, fmri_data, design_matrices = write_fake_fmri_data_and_design(
+        shapes, rk, file_path=tmp_path
+    )
+    contrast = np.eye(rk)[1]
+
+    serial_model = FirstLevelModel(mask_img=mask).fit(
+        fmri_data, design_matrices=design_matrices
+    )
+    parallel_model = FirstLevelModel(mask_img=mask, n_jobs_runs=2).fit(
+        fmri_data, design_matrices=design_matrices
+    )
+
+    assert len(parallel_model.labels_) == len(shapes)
+    for labels_serial, labels_parallel in zip(
+        serial_model.labels_, parallel_model.labels_
+    ):
+        assert_array_equal(labels_serial, labels_parallel)
+    for results_serial, results_parallel in zip(
+        serial_model.results_, parallel_model.results_
+    ):
+        assert results_serial.keys() == results_parallel.keys()
+    assert_almost_equal(
+        get_data(serial_model.compute_contrast(contrast)),
+        get_data(parallel_model.compute_contrast(contrast)),
+    )
+
+
 def test_explicit_fixed_effects_without_mask(tmp_path):
     """Test the fixed effects performed manually/explicitly with no mask."""
     shapes, rk = ((7, 8, 7, 15), (7, 8, 7, 16)), 3
@@ -431,6 +465,46 @@ def test_run_glm_ar3(rng):
     assert len(results_ar3[labels_ar3[0]].model.rho) == 3
 
 
+@pytest.mark.parametrize("noise_model", ["ols", "ar1", "ar2"])
+def test_run_glm_chunked(rng, tmp_path, noise_model):
+    """Check that fitting by chunks of voxels from a memmap \
+    gives the same results as fitting all voxels at once.
+    """
+    n, p, q = 53, 80, 10
+    X, Y = rng.standard_normal(size=(p, q)), rng.standard_normal(size=(p, n))
+    Y_memmap = np.memmap(
+        tmp_path / "Y.dat", dtype=Y.dtype, mode="w+", shape=Y.shape
+    )
+    Y_memmap[:] = Y
+    Y_memmap.flush()
+
+    labels, results = run_glm(Y, X, noise_model, bins=10, random_state=0)
+    labels_chunked, results_chunked = run_glm(
+        Y_memmap, X, noise_model, bins=10, random_state=0, chunk_size=10
+    )
+
+    assert_array_equal(labels, labels_chunked)
+    assert results.keys() == results_chunked.keys()
+    for key in results:
+        assert isinstance(results_chunked[key], SimpleRegressionResults)
+        assert_array_almost_equal(
+            results[key].theta, results_chunked[key].theta
+        )
+        assert_array_almost_equal(
+            results[key].dispersion, results_chunked[key].dispersion
+        )
+
+
+def test_run_glm_chunk_size_errors(rng):
+    n, p, q = 33, 80, 10
+    X, Y = rng.standard_normal(size=(p, q)), rng.standard_normal(size=(p, n))
+
+    with pytest.raises(ValueError, match="chunk_size must be a positive"):
+        run_glm(Y, X, chunk_size=0)
+    with pytest.raises(ValueError, match="chunk_size must be a positive"):
+        run_glm(Y, X, chunk_size=2.5)
+
+
 def test_run_glm_errors(rng):
     """Check correct errors are thrown for nonsense noise model requests."""
     n, p, q = 33, 80, 10
@@ -1,9 +1,15 @@
 """Test functions for models.regression"""
 
+import numpy as np
 import pytest
 from numpy.testing import assert_almost_equal, assert_array_almost_equal
 
 from nilearn.glm import ARModel, OLSModel
+from nilearn.glm.regression import (
+    _batch_ar_models,
+    _factorization_cache,
+    _FactorizationCache,
+)
 
 
 @pytest.fixture()
@@ -69,3 +75,92 @@ def test_AR_degenerate(X, Y):
     model = ARModel(design=X, rho=0.9)
     results = model.fit(Y)
     assert results.df_residuals == 31
+
+
+@pytest.mark.parametrize("rhos", [[0.4, -0.2, 0.9], [[0.4, 0.1], [0.2, -0.3]]])
+def test_batch_ar_models(X, Y, rhos):
+    X[:, 0] = X[:, 1] + X[:, 2]
+    _factorization_cache.clear()
+    models = _batch_ar_models(X, np.array(rhos))
+    assert len(models) == len(rhos)
+    _factorization_cache.clear()
+    for rho, model in zip(rhos, models):
+        expected = ARModel(design=X, rho=np.array(rho))
+        assert model.order == expected.order
+        assert model.df_residuals == expected.df_residuals
+        assert_array_almost_equal(model.rho, expected.rho)
+        assert_array_almost_equal(
+            model.whitened_design, expected.whitened_design
+        )
+        assert_array_almost_equal(model.calc_beta, expected.calc_beta)
+        assert_array_almost_equal(
+            model.normalized_cov_beta, expected.normalized_cov_beta
+        )
+        results = model.fit(Y)
+        expected_results = expected.fit(Y)
+        assert_array_almost_equal(results.theta, expected_results.theta)
+        assert_array_almost_equal(
+            results.dispersion, expected_results.dispersion
+        )
+
+
+def test_factorization_cache_hits(X, Y):
+    _factorization_cache.clear()
+
+    model = OLSModel(design=X)
+    cached_model = OLSModel(design=X.copy())
+    assert OLSModel(design=X).calc_beta is cached_model.calc_beta
+    assert not cached_model.calc_beta.flags.writeable
+    assert OLSModel(design=X + 1).calc_beta is not cached_model.calc_beta
+    assert_array_almost_equal(cached_model.calc_beta, model.calc_beta)
+    assert_array_almost_equal(cached_model.fit(Y).theta, model.fit(Y).theta)
+    assert cached_model.df_residuals == model.df_residuals
+
+    # modifying the design of a model does not alter the cache
+    X_copy = X.copy()
+    OLSModel(design=X_copy)
+    X_copy[:] = 0
+    assert_array_almost_equal(OLSModel(design=X).whitened_design, X)
+
+    ARModel(design=X, rho=0.4)
+    ar_model = ARModel(design=X, rho=0.4)
+    assert ARModel(design=X, rho=0.4).calc_beta is ar_model.calc_beta
+    assert ar_model.calc_beta is not cached_model.calc_beta
+    assert ARModel(design=X, rho=0.5).calc_beta is not ar_model.calc_beta
+
+    # batched AR models share the factorizations of ARModel
+    batch_models = _batch_ar_models(X, np.array([0.4, 0.3]))
+    assert batch_models[0].calc_beta is ar_model.calc_beta
+    assert ARModel(design=X, rho=0.3).calc_beta is (
+        _batch_ar_models(X, np.array([0.3]))[0].calc_beta
+    )
+
+    _factorization_cache.clear()
+    assert len(_factorization_cache) == 0
+
+
+def test_factorization_cache_subclass_not_cached(X):
+    class ScaledOLSModel(OLSModel):
+        def whiten(self, X):
+            return 2 * X
+
+    _factorization_cache.clear()
+    ScaledOLSModel(design=X)
+    assert len(_factorization_cache) == 0
+    assert_array_almost_equal(ScaledOLSModel(design=X).whitened_design, 2 * X)
+
+
+def test_factorization_cache_eviction():
+    cache = _FactorizationCache(max_bytes=3 * 8 * 10)
+    for i in range(4):
+        cache.put(i, (np.zeros(10),))
+    assert len(cache) == 3
+    assert cache.get(0) is None
+    # accessing an entry protects it from eviction
+    cache.get(1)
+    cache.put(4, (np.zeros(10),))
+    assert cache.get(1) is not None
+    assert cache.get(2) is None
+    # entries larger than the cache are not stored
+    cache.put(5, (np.zeros(40),))
+    assert cache.get(5) is None
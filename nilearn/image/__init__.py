@@ -22,6 +22,7 @@ from .image import (
     threshold_img,
 )
 from .resampling import (
+    clear_resampling_cache,
     coord_transform,
     reorder_img,
     resample_img,
@@ -50,4 +51,5 @@ __all__ = [
     "get_data",
     "largest_connected_component_img",
     "coord_transform",
+    "clear_resampling_cache",
 ]
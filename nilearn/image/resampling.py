@@ -3,12 +3,14 @@
 See http://nilearn.github.io/stable/manipulating_images/input_output.html
 """
 import numbers
+import threading
 
 # Author: Gael Varoquaux, Alexandre Abraham, Michael Eickenberg
 import warnings
+from collections import OrderedDict
 
 import numpy as np
-from scipy import linalg
+from scipy import linalg, sparse
 from scipy.ndimage import affine_transform, find_objects
 
 from .. import _utils
@@ -330,6 +332,290 @@ def _resample_one_img(
     return out
 
 
+# Maximal number of elements of the chunks of frames resampled at once
+_CHUNK_N_ELEMENTS = 2**23
+
+# Minimal number of frames for which 4D images are resampled with an
+# interpolation operator rather than frame by frame, for nearest and linear
+# interpolation. The operator has one coefficient per target voxel and per
+# source voxel it is interpolated from (8 for linear interpolation): building
+# it costs as much as resampling a few frames.
+_OPERATOR_MIN_N_FRAMES = {0: 4, 1: 16}
+
+
+class _InterpolationOperatorCache:
+    """Least recently used cache of interpolation operators.
+
+    Entries are the (rows, operator) pairs returned by
+    _interpolation_operator, keyed by the source and target geometries. The
+    cache is shared by all the threads of a process, and bounded by the total
+    size of the stored arrays: operators larger than this bound are not
+    stored.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum total size in bytes of the cached arrays.
+
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._n_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the entry stored for key or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        """Store entry for key, evicting the least recently used entries."""
+        n_bytes = _operator_nbytes(entry)
+        if n_bytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = entry
+            self._n_bytes += n_bytes
+            while self._n_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._n_bytes -= _operator_nbytes(evicted)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._n_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _operator_nbytes(entry):
+    rows, operator = entry
+    if sparse.issparse(operator):
+        return (
+            rows.nbytes
+            + operator.data.nbytes
+            + operator.indices.nbytes
+            + operator.indptr.nbytes
+        )
+    return rows.nbytes + operator.nbytes
+
+
+# Images of a dataset usually share the same geometry: the operators
+# resampling them are only computed once per process.
+_interpolation_operator_cache = _InterpolationOperatorCache(
+    max_bytes=256 * 1024**2
+)
+
+
+def clear_resampling_cache():
+    """Clear the cache of interpolation operators used by \
+    :func:`~nilearn.image.resample_img`.
+
+    Images with many frames are resampled with nearest or linear
+    interpolation by applying an interpolation operator to all the frames at
+    once. The operators are kept in memory, up to 256 MB in total, to be
+    reused for images with the same source and target geometries. This
+    function releases this memory.
+
+    .. versionadded:: 0.11.0
+
+    """
+    _interpolation_operator_cache.clear()
+
+
+def _linear_interpolation_weights(
+    rows, source_shape, A, b, target_shape, index_dtype
+):
+    """Compute the 8 source voxels target voxels are linearly interpolated \
+    from, and their weights.
+
+    Returns
+    -------
+    columns : numpy.ndarray of shape (len(rows), 8)
+        Flat (Fortran order) indices of the corners of the cube of source
+        voxels around each target voxel, the first axis varying fastest.
+
+    weights : numpy.ndarray of shape (len(rows), 8)
+        The interpolation weights of these corners.
+
+    """
+    matrix = np.diag(A) if A.ndim == 1 else A
+    coords = matrix.dot(np.unravel_index(rows, target_shape, order="F"))
+    coords += np.reshape(b, (3, 1))
+    lower = np.floor(coords)
+    upper_weights = coords - lower
+    lower = lower.astype(np.intp)
+    # the 2 neighbours along each axis are combined by broadcasting
+    columns, weights = 0, 1
+    stride = 1
+    for axis, size in enumerate(source_shape):
+        corners = np.clip(
+            lower[axis, :, np.newaxis] + [0, 1], 0, size - 1
+        ).astype(index_dtype)
+        corners *= stride
+        axis_weights = np.stack(
+            [1 - upper_weights[axis], upper_weights[axis]], axis=1
+        )
+        new_shape = (-1,) + (1,) * (2 - axis) + (2,) + (1,) * axis
+        columns = corners.reshape(new_shape) + columns
+        weights = axis_weights.reshape(new_shape) * weights
+        stride *= size
+    return columns.reshape(-1, 8), weights.reshape(-1, 8)
+
+
+def _interpolation_operator(
+    source_shape, A, b, target_shape, interpolation_order
+):
+    """Compute the operator resampling volumes, for nearest or linear \
+    interpolation.
+
+    The voxels of the target grid that are in the field of view and the
+    neighbours they are interpolated from are those used by
+    scipy.ndimage.affine_transform. Operators are reused for the same source
+    and target geometries.
+
+    Returns
+    -------
+    rows : numpy.ndarray
+        Flat (Fortran order) indices of the target voxels which are in the
+        field of view.
+
+    operator : numpy.ndarray or scipy.sparse.csr_matrix
+        For nearest interpolation, the flat indices of the source voxels
+        of each target voxel in rows. For linear interpolation, the sparse
+        matrix of interpolation weights, of shape (len(rows), n_voxels).
+
+    """
+    key = (
+        tuple(source_shape),
+        A.shape,
+        A.tobytes(),
+        b.tobytes(),
+        tuple(target_shape),
+        interpolation_order,
+    )
+    entry = _interpolation_operator_cache.get(key)
+    if entry is not None:
+        return entry
+
+    n_voxels = np.prod(source_shape)
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            "ignore", message=".*has changed in SciPy 0.18.*"
+        )
+        if interpolation_order == 0:
+            indices = np.arange(n_voxels, dtype=np.float64).reshape(
+                source_shape, order="F"
+            )
+            indices = affine_transform(
+                indices,
+                A,
+                offset=b,
+                output_shape=target_shape,
+                cval=-1,
+                order=0,
+            ).ravel(order="F")
+            rows = np.flatnonzero(indices >= 0)
+            operator = indices[rows].astype(np.intp)
+        else:
+            in_fov = affine_transform(
+                np.ones(source_shape),
+                A,
+                offset=b,
+                output_shape=target_shape,
+                cval=0,
+                order=1,
+            ).ravel(order="F")
+            rows = np.flatnonzero(in_fov)
+    if interpolation_order == 1:
+        index_dtype = (
+            np.int32
+            if max(n_voxels, 8 * len(rows)) < np.iinfo(np.int32).max
+            else np.intp
+        )
+        columns = np.empty((len(rows), 8), dtype=index_dtype)
+        weights = np.empty((len(rows), 8))
+        # the target voxels are processed in chunks to bound the memory used
+        # by the temporary arrays
+        chunk_size = _CHUNK_N_ELEMENTS // 8
+        for start in range(0, len(rows), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            columns[chunk], weights[chunk] = _linear_interpolation_weights(
+                rows[chunk], source_shape, A, b, target_shape, index_dtype
+            )
+        operator = sparse.csr_matrix(
+            (
+                weights.ravel(),
+                columns.ravel(),
+                np.arange(0, 8 * len(rows) + 1, 8, dtype=index_dtype),
+            ),
+            shape=(len(rows), n_voxels),
+        )
+
+    _interpolation_operator_cache.put(key, (rows, operator))
+    return rows, operator
+
+
+def _resample_frames(
+    data, A, b, target_shape, interpolation_order, out, fill_value=0
+):
+    """Do not use: internal function for resample_img.
+
+    Resample all the frames of finite 4D data, with nearest or linear
+    interpolation, by applying the same interpolation operator to chunks
+    of frames.
+
+    """
+    if (
+        interpolation_order != 0
+        and data.min() == 0
+        and data.max() == 1
+        and np.all((data == 0) | (data == 1))
+    ):
+        warnings.warn(
+            "Resampling binary images with continuous or "
+            "linear interpolation. This might lead to "
+            "unexpected results. You might consider using "
+            "nearest interpolation instead."
+        )
+
+    rows, operator = _interpolation_operator(
+        data.shape[:3], A, b, target_shape, interpolation_order
+    )
+    n_voxels = np.prod(data.shape[:3])
+    n_target_voxels = np.prod(target_shape)
+    n_frames = data.shape[3]
+    chunk_size = max(1, _CHUNK_N_ELEMENTS // max(n_voxels, n_target_voxels))
+    resampled = np.empty(
+        (min(chunk_size, n_frames), n_target_voxels), dtype=out.dtype
+    )
+    for start in range(0, n_frames, chunk_size):
+        frames = data[..., start : start + chunk_size]
+        n_chunk = frames.shape[3]
+        frames = frames.reshape((n_voxels, n_chunk), order="F")
+        chunk = resampled[:n_chunk]
+        chunk.fill(fill_value)
+        if interpolation_order == 0:
+            chunk[:, rows] = frames.T[:, operator]
+        else:
+            chunk[:, rows] = operator.dot(
+                np.asarray(frames, dtype=np.float64, order="C")
+            ).T
+        out[..., start : start + n_chunk] = chunk.T.reshape(
+            tuple(target_shape) + (n_chunk,), order="F"
+        )
+    return out
+
+
 def resample_img(
     img,
     target_affine=None,
@@ -654,20 +940,39 @@ def resample_img(
         # better algorithm.
         if np.all(np.diag(np.diag(A)) == A):
             A = np.diag(A)
-        # Iterate over a set of 3D volumes, as the interpolation problem is
-        # separable in the extra dimensions. This reduces the
-        # computational cost
-        for ind in np.ndindex(*other_shape):
-            _resample_one_img(
-                data[all_img + ind],
+        if (
+            data.ndim == 4
+            and interpolation_order in _OPERATOR_MIN_N_FRAMES
+            and data.shape[3] >= _OPERATOR_MIN_N_FRAMES[interpolation_order]
+            and resampled_data_dtype.kind == "f"
+            and np.isfinite(data).all()
+        ):
+            # The same interpolation is applied to all the frames: compute
+            # it once when there are enough frames to pay for it.
+            _resample_frames(
+                data,
                 A,
                 b,
                 target_shape,
                 interpolation_order,
-                out=resampled_data[all_img + ind],
-                copy=not input_img_is_string,
+                out=resampled_data,
                 fill_value=fill_value,
             )
+        else:
+            # Iterate over a set of 3D volumes, as the interpolation problem
+            # is separable in the extra dimensions. This reduces the
+            # computational cost
+            for ind in np.ndindex(*other_shape):
+                _resample_one_img(
+                    data[all_img + ind],
+                    A,
+                    b,
+                    target_shape,
+                    interpolation_order,
+                    out=resampled_data[all_img + ind],
+                    copy=not input_img_is_string,
+                    fill_value=fill_value,
+                )
 
     if clip:
         # force resampled data to have a range contained in the original data
@@ -15,14 +15,17 @@ from numpy.testing import (
     assert_array_equal,
     assert_equal,
 )
+from scipy import sparse
 
 from nilearn import _utils
 from nilearn._utils import testing
 from nilearn.conftest import _affine_eye, _rng
-from nilearn.image import get_data
+from nilearn.image import get_data, resampling
 from nilearn.image.image import _pad_array, crop_img
 from nilearn.image.resampling import (
     BoundingBoxError,
+    _InterpolationOperatorCache,
+    clear_resampling_cache,
     coord_transform,
     from_matrix_vector,
     get_bounds,
@@ -350,6 +353,97 @@ def test_resampling_warning_binary_image(affine_eye, rng):
         resample_img(img_binary, target_affine=rot, interpolation="linear")
 
 
+@pytest.mark.parametrize("interpolation", ["nearest", "linear"])
+@pytest.mark.parametrize("order", ["F", "C"])
+@pytest.mark.parametrize("fill_value", [0, -2.5])
+def test_resampling_4d_same_as_frames(
+    affine_eye, interpolation, order, fill_value, rng
+):
+    # Resampling all the frames at once should give the same result as
+    # resampling them one by one
+    data = rng.standard_normal((7, 6, 5, 16))
+    source_affine = affine_eye.copy()
+    source_affine[:3, :3] = 1.5 * rotation(np.pi / 5, np.pi / 7)
+    img = Nifti1Image(data, source_affine)
+    target_affine = np.diag((1.2, 1.3, 1.1, 1))
+    target_affine[:3, 3] = -3
+    target_shape = (9, 8, 10)
+
+    resampled = get_data(
+        resample_img(
+            img,
+            target_affine=target_affine,
+            target_shape=target_shape,
+            interpolation=interpolation,
+            order=order,
+            fill_value=fill_value,
+            clip=False,
+        )
+    )
+
+    for i in range(data.shape[3]):
+        frame = get_data(
+            resample_img(
+                Nifti1Image(data[..., i], source_affine),
+                target_affine=target_affine,
+                target_shape=target_shape,
+                interpolation=interpolation,
+                fill_value=fill_value,
+                clip=False,
+            )
+        )
+        assert_allclose(resampled[..., i], frame, atol=1e-12)
+
+
+def test_resampling_4d_reuses_interpolation_operator(affine_eye, rng):
+    clear_resampling_cache()
+    img = Nifti1Image(rng.standard_normal((5, 5, 5, 16)), affine_eye)
+    for interpolation in ["nearest", "linear", "linear"]:
+        resample_img(
+            img,
+            target_affine=2 * affine_eye[:3, :3],
+            interpolation=interpolation,
+        )
+    assert len(resampling._interpolation_operator_cache) == 2
+    clear_resampling_cache()
+    assert len(resampling._interpolation_operator_cache) == 0
+
+
+def test_resampling_4d_few_frames_without_operator(affine_eye, rng):
+    # building the interpolation operator does not pay off for few frames
+    clear_resampling_cache()
+    img = Nifti1Image(rng.standard_normal((5, 5, 5, 3)), affine_eye)
+    resample_img(img, target_affine=2 * affine_eye[:3, :3])
+    assert len(resampling._interpolation_operator_cache) == 0
+
+
+def test_interpolation_operator_cache_eviction():
+    cache = _InterpolationOperatorCache(max_bytes=3 * 2 * 8 * 10)
+    for i in range(4):
+        cache.put(i, (np.zeros(10), np.zeros(10)))
+    assert len(cache) == 3
+    assert cache.get(0) is None
+    # accessing an entry protects it from eviction
+    cache.get(1)
+    cache.put(4, (np.zeros(10), np.zeros(10)))
+    assert cache.get(1) is not None
+    assert cache.get(2) is None
+    # operators larger than the cache are not stored
+    operator = sparse.random(10, 100, density=0.5, format="csr")
+    cache.put(5, (np.arange(10), operator))
+    assert cache.get(5) is None
+
+
+@pytest.mark.parametrize("n_frames", [3, 16])
+def test_resampling_4d_warning_binary_image(affine_eye, rng, n_frames):
+    data_binary = rng.randint(2, size=(4, 4, 4, n_frames)).astype("float64")
+    img_binary = Nifti1Image(data_binary, affine_eye)
+    rot = rotation(0, np.pi / 4)
+
+    with pytest.warns(Warning, match="Resampling binary images with"):
+        resample_img(img_binary, target_affine=rot, interpolation="linear")
+
+
 def test_4d_affine_bounding_box_error(affine_eye):
     bigger_data = np.zeros([10, 10, 10])
     bigger_img = Nifti1Image(bigger_data, affine_eye)
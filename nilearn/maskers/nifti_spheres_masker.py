@@ -21,6 +21,48 @@ from nilearn._utils.niimg_conversions import (
 from nilearn.maskers.base_masker import BaseMasker, _filter_and_extract
 
 
+def _find_rows(table, queries):
+    """Return the index of the first row of table equal to each query.
+
+    Rows are integer coordinates, looked up through their linear index
+    in the bounding box of table, so that all queries are found at once.
+
+    Parameters
+    ----------
+    table : numpy.ndarray
+        Integer coordinates, shape: (number of rows, 3).
+
+    queries : numpy.ndarray
+        Integer coordinates to look up, shape: (number of queries, 3).
+
+    Returns
+    -------
+    indices : numpy.ndarray
+        Index of the first row of table equal to each query,
+        or -1 if there is none.
+
+    """
+    indices = np.full(len(queries), -1)
+    if len(table) == 0 or len(queries) == 0:
+        return indices
+
+    low = table.min(axis=0)
+    extent = table.max(axis=0) - low + 1
+    in_box = np.all((queries >= low) & (queries < low + extent), axis=1)
+
+    table_keys = np.ravel_multi_index((table - low).T, extent)
+    query_keys = np.ravel_multi_index((queries[in_box] - low).T, extent)
+    # stable sort so that the first of equal rows is found
+    order = np.argsort(table_keys, kind='stable')
+    sorted_keys = table_keys[order]
+    positions = np.minimum(
+        np.searchsorted(sorted_keys, query_keys), len(table) - 1
+    )
+    found = sorted_keys[positions] == query_keys
+    indices[in_box] = np.where(found, order[positions], -1)
+    return indices
+
+
 def _apply_mask_and_get_affinity(seeds, niimg, radius, allow_overlap,
                                  mask_img=None):
     """Get only the rows which are occupied by sphere \
@@ -62,13 +104,11 @@ def _apply_mask_and_get_affinity(seeds, niimg, radius, allow_overlap,
         shape: (number of seeds, number of voxels)
 
     """
-    seeds = list(seeds)
+    seeds = np.asarray(list(seeds), dtype=float).reshape((-1, 3))
 
     # Compute world coordinates of all in-mask voxels.
     if niimg is None:
         mask, affine = masking._load_mask_img(mask_img)
-        # Get coordinate for all voxels inside of mask
-        mask_coords = np.asarray(np.nonzero(mask)).T.tolist()
         X = None
 
     elif mask_img is not None:
@@ -81,7 +121,6 @@ def _apply_mask_and_get_affinity(seeds, niimg, radius, allow_overlap,
             interpolation='nearest',
         )
         mask, _ = masking._load_mask_img(mask_img)
-        mask_coords = list(zip(*np.where(mask != 0)))
 
         X = masking._apply_mask_fmri(niimg, mask_img)
 
@@ -96,49 +135,45 @@ def _apply_mask_and_get_affinity(seeds, niimg, radius, allow_overlap,
         else:
             X = safe_get_data(niimg).reshape([-1, niimg.shape[3]]).T
 
-        mask_coords = list(np.ndindex(niimg.shape[:3]))
+        mask = np.ones(niimg.shape[:3], dtype=bool)
 
     else:
         raise ValueError("Either a niimg or a mask_img must be provided.")
 
+    # Voxels of the mask, in the order of the columns of X
+    mask_voxels = np.argwhere(mask)
+
     # For each seed, get coordinates of nearest voxel
-    nearests = []
-    for sx, sy, sz in seeds:
-        nearest = np.round(image.resampling.coord_transform(
-            sx, sy, sz, np.linalg.inv(affine)
-        ))
-        nearest = nearest.astype(int)
-        nearest = (nearest[0], nearest[1], nearest[2])
-        try:
-            nearests.append(mask_coords.index(nearest))
-        except ValueError:
-            nearests.append(None)
-
-    mask_coords = np.asarray(list(zip(*mask_coords)))
+    nearests = image.resampling.coord_transform(
+        seeds[:, 0], seeds[:, 1], seeds[:, 2], np.linalg.inv(affine)
+    )
+    nearests = np.round(np.asarray(nearests).T).astype(int)
+    nearests = _find_rows(mask_voxels, nearests)
+
     mask_coords = image.resampling.coord_transform(
-        mask_coords[0], mask_coords[1], mask_coords[2], affine
+        mask_voxels[:, 0], mask_voxels[:, 1], mask_voxels[:, 2], affine
     )
     mask_coords = np.asarray(mask_coords).T
 
     clf = neighbors.NearestNeighbors(radius=radius)
     A = clf.fit(mask_coords).radius_neighbors_graph(seeds)
-    A = A.tolil()
-    for i, nearest in enumerate(nearests):
-        if nearest is None:
-            continue
-
-        A[i, nearest] = True
 
     # Include the voxel containing the seed itself if not masked
-    mask_coords = mask_coords.astype(int).tolist()
-    for i, seed in enumerate(seeds):
-        try:
-            A[i, mask_coords.index(list(map(int, seed)))] = True
-        except ValueError:
-            # seed is not in the mask
-            pass
-
-    sphere_sizes = np.asarray(A.tocsr().sum(axis=1)).ravel()
+    seed_voxels = _find_rows(mask_coords.astype(int), seeds.astype(int))
+
+    seed_indices = np.arange(len(seeds))
+    rows = np.concatenate(
+        [seed_indices[nearests >= 0], seed_indices[seed_voxels >= 0]]
+    )
+    cols = np.concatenate(
+        [nearests[nearests >= 0], seed_voxels[seed_voxels >= 0]]
+    )
+    A = A + sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=A.shape
+    )
+    A.data[:] = True
+
+    sphere_sizes = np.asarray(A.sum(axis=1)).ravel()
     empty_spheres = np.nonzero(sphere_sizes == 0)[0]
     if len(empty_spheres) != 0:
         raise ValueError(f'These spheres are empty: {empty_spheres}')
@@ -146,7 +181,7 @@ def _apply_mask_and_get_affinity(seeds, niimg, radius, allow_overlap,
     if (not allow_overlap) and np.any(A.sum(axis=0) >= 2):
         raise ValueError('Overlap detected between spheres')
 
-    return X, A
+    return X, A.tolil()
 
 
 def _iter_signals_from_spheres(seeds, niimg, radius, allow_overlap,
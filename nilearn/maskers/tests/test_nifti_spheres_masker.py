@@ -9,6 +9,7 @@ from numpy.testing import assert_array_almost_equal, assert_array_equal
 from nilearn._utils import data_gen
 from nilearn.image import get_data, new_img_like
 from nilearn.maskers import NiftiSpheresMasker
+from nilearn.maskers.nifti_spheres_masker import _find_rows
 
 
 def test_seed_extraction(rng):
@@ -248,6 +249,34 @@ def test_nifti_spheres_masker_inverse_transform(rng):
     assert_array_equal(inverse_map.shape[:3], mask_img.shape)
 
 
+def test_nifti_spheres_masker_inverse_transform_nearest_voxel(rng):
+    """Seeds between voxels use the nearest voxel in inverse_transform \
+    as in transform."""
+    affine = np.diag([2.0, 2.0, 2.0, 1.0])
+    shape = (5, 5, 5)
+    data = rng.random_sample(shape + (3,))
+    img = nibabel.Nifti1Image(data, affine)
+    mask_img = nibabel.Nifti1Image(np.ones(shape, dtype="int8"), affine)
+    masker = NiftiSpheresMasker([(2.4, 2.4, 3.2)], mask_img=mask_img)
+    masker.fit()
+
+    s = masker.transform(img)
+    inverse_map = masker.inverse_transform(s)
+
+    assert_array_almost_equal(s[:, 0], data[1, 1, 2])
+    expected = np.zeros(shape + (3,))
+    expected[1, 1, 2] = s[:, 0]
+    assert_array_almost_equal(get_data(inverse_map), expected)
+
+
+def test_find_rows():
+    table = np.array([[0, 0, 0], [2, 1, 0], [1, 1, 1], [2, 1, 0]])
+    queries = np.array([[2, 1, 0], [1, 1, 1], [1, 0, 0], [5, 0, 0], [0, 0, 0]])
+
+    assert_array_equal(_find_rows(table, queries), [1, 2, -1, -1, 0])
+    assert_array_equal(_find_rows(table[:0], queries), [-1] * 5)
+
+
 def test_nifti_spheres_masker_inverse_overlap(rng):
     # Test overlapping data in inverse_transform
     affine = np.eye(4)
@@ -3,9 +3,12 @@
 import numbers
 import warnings
 
+import nibabel
 import numpy as np
 from joblib import Parallel, delayed
+from nibabel.arrayproxy import ArrayProxy
 from scipy.ndimage import binary_dilation, binary_erosion
+from sklearn.utils import gen_batches
 
 from . import _utils
 from ._utils import fill_doc
@@ -26,6 +29,9 @@ class MaskWarning(UserWarning):
 
 warnings.simplefilter("always", MaskWarning)
 
+# Maximum number of bytes of the scans read at once by apply_mask.
+_MASK_SLAB_SIZE = 2**27
+
 
 def _load_mask_img(mask_img, allow_empty=False):
     """Check that a mask is valid, ie with two values including 0 and load it.
@@ -749,7 +755,12 @@ def compute_multi_brain_mask(
 
 @fill_doc
 def apply_mask(
-    imgs, mask_img, dtype="f", smoothing_fwhm=None, ensure_finite=True
+    imgs,
+    mask_img,
+    dtype="f",
+    smoothing_fwhm=None,
+    ensure_finite=True,
+    out=None,
 ):
     """Extract signals from images using specified mask.
 
@@ -779,6 +790,14 @@ def apply_mask(
         If ensure_finite is True, the non-finite values (NaNs and
         infs) found in the images will be replaced by zeros.
 
+    out : :class:`numpy.ndarray` or None, default=None
+        Array of shape (image number, :term:`voxel` number) in which the
+        series are written, for instance a :class:`numpy.memmap` to keep
+        series that do not fit in memory on disk. ``dtype`` is then ignored.
+        Only for 4D images.
+
+        .. versionadded:: 0.11.0
+
     Returns
     -------
     session_series : :class:`numpy.ndarray`
@@ -788,6 +807,9 @@ def apply_mask(
     -----
     When using smoothing, ``ensure_finite`` is set to True, as non-finite
     values would spread across the image.
+
+    4D images are read by slabs of scans, so that only the masked series
+    are held in memory in addition to one slab.
     """
     mask_img = _utils.check_niimg_3d(mask_img)
     mask, mask_affine = _load_mask_img(mask_img)
@@ -798,11 +820,17 @@ def apply_mask(
         dtype=dtype,
         smoothing_fwhm=smoothing_fwhm,
         ensure_finite=ensure_finite,
+        out=out,
     )
 
 
 def _apply_mask_fmri(
-    imgs, mask_img, dtype="f", smoothing_fwhm=None, ensure_finite=True
+    imgs,
+    mask_img,
+    dtype="f",
+    smoothing_fwhm=None,
+    ensure_finite=True,
+    out=None,
 ):
     """Perform similar action to :func:`nilearn.masking.apply_mask`.
 
@@ -833,28 +861,76 @@ def _apply_mask_fmri(
             f"from img shape:{str(imgs_img.shape[:3])}"
         )
 
-    # All the following has been optimized for C order.
-    # Time that may be lost in conversion here is regained multiple times
-    # afterward, especially if smoothing is applied.
-    series = safe_get_data(imgs_img)
-
-    if dtype == "f":
-        dtype = series.dtype if series.dtype.kind == "f" else np.float32
-
-    series = _utils.as_ndarray(series, dtype=dtype, order="C", copy=True)
-    del imgs_img  # frees a lot of memory
-
     # Delayed import to avoid circular imports
     from .image.image import _smooth_array
 
-    _smooth_array(
-        series,
-        affine,
-        fwhm=smoothing_fwhm,
-        ensure_finite=ensure_finite,
-        copy=False,
+    if len(imgs_img.shape) == 3:
+        if out is not None:
+            raise ValueError("'out' can only be used with 4D images.")
+        series = safe_get_data(imgs_img)
+        if dtype == "f":
+            dtype = series.dtype if series.dtype.kind == "f" else np.float32
+        series = _utils.as_ndarray(series, dtype=dtype, order="C", copy=True)
+        del imgs_img  # frees a lot of memory
+        _smooth_array(
+            series,
+            affine,
+            fwhm=smoothing_fwhm,
+            ensure_finite=ensure_finite,
+            copy=False,
+        )
+        return series[mask_data].T
+
+    n_scans = imgs_img.shape[3]
+    n_voxels = mask_data.sum()
+    if out is not None:
+        dtype = out.dtype
+        if out.shape != (n_scans, n_voxels):
+            raise ValueError(
+                f"'out' has shape {out.shape} instead of "
+                f"{(n_scans, n_voxels)}."
+            )
+
+    # Scans are read by slabs, which are masked into the output, rather than
+    # loading and copying the whole image.
+    dataobj = _sequential_dataobj(imgs_img)
+    scan_size = (
+        mask_data.size
+        * np.dtype(_utils.niimg.img_data_dtype(imgs_img)).itemsize
     )
-    return series[mask_data].T
+    for slab in gen_batches(n_scans, max(1, _MASK_SLAB_SIZE // scan_size)):
+        series = dataobj[..., slab]
+        if dtype == "f":
+            dtype = series.dtype if series.dtype.kind == "f" else np.float32
+        # All the following has been optimized for C order.
+        series = _utils.as_ndarray(series, dtype=dtype, order="C", copy=True)
+        _smooth_array(
+            series,
+            affine,
+            fwhm=smoothing_fwhm,
+            ensure_finite=ensure_finite,
+            copy=False,
+        )
+        if out is None:
+            out = np.empty((n_scans, n_voxels), dtype=dtype)
+        out[slab] = series[mask_data].T
+    return out
+
+
+def _sequential_dataobj(img):
+    """Return an array-like object to read the data of img by slabs.
+
+    Reading slabs of a compressed file from the proxy of an image opens and
+    decompresses the file again for each slab: the file is kept open instead.
+    """
+    if img.in_memory:
+        return get_data(img)
+    dataobj = img.dataobj
+    if isinstance(dataobj, ArrayProxy) and isinstance(dataobj.file_like, str):
+        reopened = nibabel.load(dataobj.file_like, keep_file_open=True)
+        if reopened.shape == img.shape:
+            return reopened.dataobj
+    return dataobj
 
 
 def _unmask_3d(X, mask, order="C"):
@@ -1,7 +1,7 @@
 """Utility functions for the permuted least squares method."""
 import numpy as np
-from scipy import linalg
-from scipy.ndimage import label
+from scipy import linalg, sparse
+from scipy.sparse.csgraph import connected_components
 
 
 def _calculate_tfce(
@@ -67,78 +67,259 @@ def _calculate_tfce(
     for i_regressor in range(arr4d.shape[3]):
         arr3d = arr4d[..., i_regressor]
 
+        # Zero-valued voxels are background for every threshold,
+        # so only the other ones are part of the graph of voxels.
+        nonzero_mask = arr3d != 0
+        tfce_4d[nonzero_mask, i_regressor] = _calculate_tfce_masked(
+            arr3d[nonzero_mask, np.newaxis],
+            _mask_adjacency(nonzero_mask, bin_struct),
+            E=E,
+            H=H,
+            dh=dh,
+            two_sided_test=two_sided_test,
+        )[:, 0]
+
+    return tfce_4d
+
+
+def _calculate_tfce_masked(
+    scores,
+    edges,
+    E=0.5,
+    H=2,
+    dh="auto",
+    two_sided_test=True,
+):
+    """Calculate threshold-free cluster enhancement values for masked scores.
+
+    Same as :func:`_calculate_tfce`, for scores of the voxels of a mask
+    rather than 3D maps.
+
+    Parameters
+    ----------
+    scores : :obj:`numpy.ndarray` of shape (n_voxels, n_regressors)
+        Unthresholded t-statistics of the voxels of the mask.
+    edges : :obj:`numpy.ndarray` of shape (n_edges, 2)
+        Pairs of neighboring voxels, as computed by :func:`_mask_adjacency`.
+    E : :obj:`float`, default=0.5
+        Extent weight.
+    H : :obj:`float`, default=2
+        Height weight.
+    dh : 'auto' or :obj:`float`, default='auto'
+        Step size for TFCE calculation.
+        If set to 'auto', use 100 steps, as is done in fslmaths.
+    two_sided_test : :obj:`bool`, default=True
+        Whether to assess both positive and negative clusters (True) or just
+        positive ones (False).
+
+    Returns
+    -------
+    tfce_arr : :obj:`numpy.ndarray` of shape (n_voxels, n_regressors)
+        :term:`TFCE` values.
+    """
+    tfce = np.zeros(scores.shape)
+
+    for i_regressor in range(scores.shape[1]):
+        regressor_scores = scores[:, i_regressor]
+
         # Get signs / threshs
         if two_sided_test:
             signs = [-1, 1]
-            max_score = np.max(np.abs(arr3d))
+            max_score = np.max(np.abs(regressor_scores), initial=0)
         else:
             signs = [1]
-            max_score = np.max(arr3d)
+            max_score = np.max(regressor_scores, initial=0)
+
+        if max_score == 0:
+            # no cluster for any threshold
+            continue
 
         step = max_score / 100 if dh == "auto" else dh
 
         # Set based on determined step size
         score_threshs = np.arange(step, max_score + step, step)
 
-        # If we apply the sign first...
         for sign in signs:
-            # Init a temp copy of arr3d with the current sign applied,
-            # which can then be re-used by incrementally setting more
-            # voxel's to background, by taking advantage that each score_thresh
-            # is incrementally larger
-            temp_arr3d = arr3d * sign
-
-            # Prep step
-            for score_thresh in score_threshs:
-                temp_arr3d[temp_arr3d < score_thresh] = 0
-
-                # Label into clusters - importantly (for the next step)
-                # this returns clusters labelled ordinally
-                # from 1 to n_clusters+1,
-                # which allows us to use bincount to count
-                # frequencies directly.
-                labeled_arr3d, _ = label(temp_arr3d, bin_struct)
-
-                # Next, we want to replace each label with its cluster
-                # extent, that is, the size of the cluster it is part of
-                # To do this, we will first compute a flattened version of
-                # only the non-zero cluster labels.
-                labeled_arr3d_flat = labeled_arr3d.flatten()
-                non_zero_inds = np.where(labeled_arr3d_flat != 0)[0]
-                labeled_non_zero = labeled_arr3d_flat[non_zero_inds]
-
-                # Count the size of each unique cluster, via its label.
-                # The reason why we pass only the non-zero labels to bincount
-                # is because it includes a bin for zeros, and in our labels
-                # zero represents the background,
-                # which we want to have a TFCE value of 0.
-                cluster_counts = np.bincount(labeled_non_zero)
-
-                # Next, we convert each unique cluster count to its TFCE value.
-                # Where each cluster's tfce value is based
-                # on both its cluster extent and z-value
-                # (via the current score_thresh)
-                # NOTE: We do not multiply by dh, based on fslmaths'
-                # implementation. This differs from the original paper.
-                cluster_tfces = (
-                    sign * (cluster_counts**E) * (score_thresh**H)
-                )
-
-                # Before we can add these values to tfce_4d, we need to
-                # map cluster-wise tfce values back to a voxel-wise array,
-                # including any zero / background voxels.
-                tfce_step_values = np.zeros(labeled_arr3d_flat.shape)
-                tfce_step_values[non_zero_inds] = cluster_tfces[
-                    labeled_non_zero
-                ]
-
-                # Now, we just need to reshape these values back to 3D
-                # and they can be incremented to tfce_4d.
-                tfce_4d[..., i_regressor] += tfce_step_values.reshape(
-                    temp_arr3d.shape
-                )
+            tfce[:, i_regressor] += sign * _calculate_tfce_on_graph(
+                regressor_scores * sign, edges, score_threshs, E=E, H=H
+            )
 
-    return tfce_4d
+    return tfce
+
+
+def _mask_adjacency(mask, bin_struct):
+    """Compute the edges between neighboring voxels of a mask.
+
+    Parameters
+    ----------
+    mask : :obj:`numpy.ndarray` of shape (X, Y, Z)
+        Boolean mask of the voxels.
+    bin_struct : :obj:`numpy.ndarray` of shape (3, 3, 3)
+        Connectivity matrix defining neighbors.
+
+    Returns
+    -------
+    edges : :obj:`numpy.ndarray` of shape (n_edges, 2)
+        Pairs of neighboring voxels, as indices into ``mask[mask]``
+        (i.e. in the order used by :func:`nilearn.masking.apply_mask`).
+        Each pair is listed once.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    indices = np.full(mask.shape, -1, dtype=np.intp)
+    indices[mask] = np.arange(np.count_nonzero(mask))
+
+    center = np.array(bin_struct.shape) // 2
+    edges = [np.empty((0, 2), dtype=np.intp)]
+    for offset in np.argwhere(bin_struct) - center:
+        # only keep one of the two opposite offsets
+        if tuple(offset) <= (0,) * mask.ndim:
+            continue
+        source = tuple(
+            slice(max(0, -o), s - max(0, o))
+            for o, s in zip(offset, mask.shape)
+        )
+        target = tuple(
+            slice(max(0, o), s - max(0, -o))
+            for o, s in zip(offset, mask.shape)
+        )
+        source_indices, target_indices = indices[source], indices[target]
+        valid = (source_indices >= 0) & (target_indices >= 0)
+        edges.append(
+            np.stack([source_indices[valid], target_indices[valid]], axis=1)
+        )
+    return np.concatenate(edges)
+
+
+def _calculate_tfce_on_graph(scores, edges, score_threshs, E=0.5, H=2):
+    """Calculate TFCE values for the scores of a graph of voxels.
+
+    Equivalent to labeling clusters of voxels with scores above each
+    threshold and summing ``extent ** E * threshold ** H`` for each voxel
+    over the thresholds (see :func:`_calculate_tfce`).
+
+    Rather than labeling clusters from scratch for each threshold,
+    thresholds are swept in decreasing order while clusters are grown
+    with a union-find structure:
+    voxels and edges are added when the sweep reaches their score,
+    and the contribution of each threshold is accumulated once per
+    cluster rather than once per voxel.
+
+    Parameters
+    ----------
+    scores : :obj:`numpy.ndarray` of shape (n_voxels,)
+        Scores of the voxels.
+    edges : :obj:`numpy.ndarray` of shape (n_edges, 2)
+        Pairs of neighboring voxels.
+    score_threshs : :obj:`numpy.ndarray` of shape (n_threshs,)
+        Thresholds, as computed in :func:`_calculate_tfce`.
+    E : :obj:`float`, default=0.5
+        Extent weight.
+    H : :obj:`float`, default=2
+        Height weight.
+
+    Returns
+    -------
+    tfce : :obj:`numpy.ndarray` of shape (n_voxels,)
+        :term:`TFCE` values.
+    """
+    n_voxels = scores.shape[0]
+    n_threshs = len(score_threshs)
+    if n_voxels == 0 or n_threshs == 0:
+        return np.zeros(n_voxels)
+
+    # Voxels below a threshold are discarded for all the following ones,
+    # so a voxel belongs to the foreground while its score is above
+    # all the thresholds applied so far.
+    levels = np.maximum.accumulate(score_threshs)
+
+    # Index of the last threshold for which each voxel / edge is part of
+    # the foreground (-1 if never), used to add them during the sweep.
+    voxel_steps = np.searchsorted(levels, scores, side="right") - 1
+    # zero-valued voxels are background, as for scipy.ndimage.label
+    voxel_steps[scores == 0] = -1
+    edge_steps = np.minimum(voxel_steps[edges[:, 0]], voxel_steps[edges[:, 1]])
+    voxel_order = np.argsort(voxel_steps, kind="stable")
+    voxel_bounds = np.searchsorted(
+        voxel_steps[voxel_order], np.arange(n_threshs + 1)
+    )
+    edge_order = np.argsort(edge_steps, kind="stable")
+    edge_bounds = np.searchsorted(
+        edge_steps[edge_order], np.arange(n_threshs + 1)
+    )
+
+    # Union-find forest: the TFCE value of a voxel is the sum of
+    # the weights on its path to the root of its cluster.
+    parents = np.arange(n_voxels)
+    sizes = np.ones(n_voxels)
+    weights = np.zeros(n_voxels)
+    is_root = np.zeros(n_voxels, dtype=bool)
+
+    for step in range(n_threshs - 1, -1, -1):
+        is_root[
+            voxel_order[voxel_bounds[step] : voxel_bounds[step + 1]]
+        ] = True
+
+        new_edges = edges[
+            edge_order[edge_bounds[step] : edge_bounds[step + 1]]
+        ]
+        first = _find_roots(parents, new_edges[:, 0])
+        second = _find_roots(parents, new_edges[:, 1])
+        merged = first != second
+        if merged.any():
+            # merge the clusters linked by the new edges
+            roots, pairs = np.unique(
+                np.concatenate([first[merged], second[merged]]),
+                return_inverse=True,
+            )
+            n_merged = np.count_nonzero(merged)
+            graph = sparse.coo_matrix(
+                (np.ones(n_merged), (pairs[:n_merged], pairs[n_merged:])),
+                shape=(len(roots), len(roots)),
+            )
+            _, components = connected_components(graph, directed=False)
+            # union by size: the largest cluster of each component
+            # becomes the root of the others
+            order = np.lexsort((-sizes[roots], components))
+            _, first_in_component = np.unique(
+                components[order], return_index=True
+            )
+            new_roots = roots[order[first_in_component]][components]
+            attached = roots != new_roots
+            attached_roots = roots[attached]
+            new_sizes = np.bincount(components, weights=sizes[roots])
+            sizes[new_roots] = new_sizes[components]
+            weights[attached_roots] -= weights[new_roots[attached]]
+            parents[attached_roots] = new_roots[attached]
+            is_root[attached_roots] = False
+
+        # NOTE: We do not multiply by dh, based on fslmaths'
+        # implementation. This differs from the original paper.
+        active_roots = np.flatnonzero(is_root)
+        weights[active_roots] += (sizes[active_roots] ** E) * (
+            score_threshs[step] ** H
+        )
+
+    # sum the weights along the path of each voxel to its root
+    tfce = weights.copy()
+    ancestors = parents.copy()
+    voxels = np.flatnonzero(ancestors != np.arange(n_voxels))
+    while voxels.size:
+        tfce[voxels] += weights[ancestors[voxels]]
+        next_ancestors = parents[ancestors[voxels]]
+        not_root = next_ancestors != ancestors[voxels]
+        ancestors[voxels] = next_ancestors
+        voxels = voxels[not_root]
+    return tfce
+
+
+def _find_roots(parents, voxels):
+    """Find the root of each voxel in a union-find forest."""
+    roots = parents[voxels]
+    while True:
+        grand_parents = parents[roots]
+        if np.array_equal(grand_parents, roots):
+            return roots
+        roots = grand_parents
 
 
 def _null_to_p(test_values, null_array, alternative="two-sided"):
@@ -246,44 +427,86 @@ def _calculate_cluster_measures(
     max_masses = np.zeros(n_regressors, float)
 
     for i_regressor in range(n_regressors):
-        arr3d = arr4d[..., i_regressor].copy()
+        arr3d = arr4d[..., i_regressor]
+        nonzero_mask = arr3d != 0
+        max_size, max_mass = _calculate_cluster_measures_masked(
+            arr3d[nonzero_mask, np.newaxis],
+            threshold,
+            _mask_adjacency(nonzero_mask, bin_struct),
+            two_sided_test=two_sided_test,
+        )
+        max_sizes[i_regressor], max_masses[i_regressor] = max_size, max_mass
 
-        if two_sided_test:
-            arr3d[np.abs(arr3d) <= threshold] = 0
-        else:
-            arr3d[arr3d <= threshold] = 0
+    return max_sizes, max_masses
 
-        labeled_arr3d, _ = label(arr3d > 0, bin_struct)
 
-        if two_sided_test:
-            # Label positive and negative clusters separately
-            n_positive_clusters = np.max(labeled_arr3d)
-            temp_labeled_arr3d, _ = label(
-                arr3d < 0,
-                bin_struct,
-            )
-            temp_labeled_arr3d[temp_labeled_arr3d > 0] += n_positive_clusters
-            labeled_arr3d = labeled_arr3d + temp_labeled_arr3d
-            del temp_labeled_arr3d
+def _calculate_cluster_measures_masked(
+    scores,
+    threshold,
+    edges,
+    two_sided_test=False,
+):
+    """Calculate maximum cluster mass and size for masked scores.
 
-        clust_vals, clust_sizes = np.unique(labeled_arr3d, return_counts=True)
-        assert clust_vals[0] == 0
+    Same as :func:`_calculate_cluster_measures`, for scores of the voxels
+    of a mask rather than 3D maps.
 
-        clust_vals = clust_vals[1:]  # First cluster is zeros in matrix
-        clust_sizes = clust_sizes[1:]
+    Parameters
+    ----------
+    scores : :obj:`numpy.ndarray` of shape (n_voxels, n_regressors)
+        Unthresholded t-statistics of the voxels of the mask.
+    threshold : :obj:`float`
+        Uncorrected t-statistic threshold for defining clusters.
+    edges : :obj:`numpy.ndarray` of shape (n_edges, 2)
+        Pairs of neighboring voxels, as computed by :func:`_mask_adjacency`.
+    two_sided_test : :obj:`bool`, default=False
+        Whether to assess both positive and negative clusters (True) or just
+        positive ones (False).
 
-        # Cluster mass-based inference
-        max_mass = 0
-        for unique_val in clust_vals:
-            ss_vals = np.abs(arr3d[labeled_arr3d == unique_val]) - threshold
-            max_mass = np.maximum(max_mass, np.sum(ss_vals))
+    Returns
+    -------
+    max_size, max_mass : :obj:`numpy.ndarray` of shape (n_regressors,)
+        Maximum cluster size and mass from the matrix, for each regressor.
+    """
+    n_voxels, n_regressors = scores.shape
+
+    max_sizes = np.zeros(n_regressors, int)
+    max_masses = np.zeros(n_regressors, float)
+
+    for i_regressor in range(n_regressors):
+        regressor_scores = scores[:, i_regressor]
+
+        # Positive and negative clusters are labeled separately:
+        # edges are only kept between voxels of the same sign.
+        signs = np.zeros(n_voxels, dtype=np.int8)
+        signs[regressor_scores > threshold] = 1
+        if two_sided_test:
+            signs[regressor_scores < -threshold] = -1
+
+        in_cluster = signs != 0
+        if not in_cluster.any():
+            continue
+
+        source_signs = signs[edges[:, 0]]
+        cluster_edges = edges[
+            (source_signs != 0) & (source_signs == signs[edges[:, 1]])
+        ]
+        graph = sparse.coo_matrix(
+            (
+                np.ones(len(cluster_edges)),
+                (cluster_edges[:, 0], cluster_edges[:, 1]),
+            ),
+            shape=(n_voxels, n_voxels),
+        )
+        _, labels = connected_components(graph, directed=False)
+        labels = labels[in_cluster]
 
         # Cluster size-based inference
-        max_size = 0
-        if clust_sizes.size:
-            max_size = np.max(clust_sizes)
+        max_sizes[i_regressor] = np.bincount(labels).max()
 
-        max_sizes[i_regressor], max_masses[i_regressor] = max_size, max_mass
+        # Cluster mass-based inference
+        ss_vals = np.abs(regressor_scores[in_cluster]) - threshold
+        max_masses[i_regressor] = np.bincount(labels, weights=ss_vals).max()
 
     return max_sizes, max_masses
 
@@ -420,3 +643,62 @@ def _t_score_with_covars_and_normalized_design(
         a2 = np.sum(beta_targetvars_covars**2, 1)
         rss = 1 - a2[:, np.newaxis] - beta_targetvars_testedvars**2
     return beta_targetvars_testedvars * np.sqrt((dof - 1.0) / rss)
+
+
+def _t_score_with_covars_and_normalized_design_block(
+    tested_vars, target_vars, covars_orthonormalized=None
+):
+    """t-scores for a block of permuted tested variates.
+
+    Same as :func:`_t_score_with_covars_and_normalized_design`,
+    for several permutations (or sign swaps) of the tested variates and
+    covariates at once: the products with the target variates of
+    all the permutations are computed with a single matrix product.
+
+    Parameters
+    ----------
+    tested_vars : array-like, shape=(n_perm_block, n_samples, n_tested_vars)
+        Permuted explanatory variates.
+
+    target_vars : array-like, shape=(n_samples, n_target_vars)
+        Targets variates. F-ordered is better for efficient computation.
+
+    covars_orthonormalized : array-like, \
+            shape=(n_perm_block, n_samples, n_covars) or None, optional
+        Permuted confounding variates.
+
+    Returns
+    -------
+    score : numpy.ndarray, shape=(n_perm_block, n_target_vars, n_tested_vars)
+        t-scores associated with the tests of each explanatory variate against
+        each target variate (in the presence of covars), for each permutation.
+
+    """
+    n_perm_block, n_samples, n_tested_vars = tested_vars.shape
+    n_target_vars = target_vars.shape[1]
+    if covars_orthonormalized is None:
+        lost_dof = 0
+    else:
+        lost_dof = covars_orthonormalized.shape[2]
+    # Tested variates are fitted independently,
+    # so lost_dof is unrelated to n_tested_vars.
+    dof = n_samples - lost_dof
+    # The permutations are stacked as columns of the design, and the scores
+    # are computed in (n_target_vars, n_perm_block, n_tested_vars) layout
+    # to work on contiguous arrays.
+    beta_targetvars_testedvars = np.dot(
+        target_vars.T,
+        tested_vars.transpose(1, 0, 2).reshape(n_samples, -1),
+    ).reshape(n_target_vars, n_perm_block, n_tested_vars)
+    rss = beta_targetvars_testedvars**2
+    if covars_orthonormalized is not None:
+        beta_targetvars_covars = np.dot(
+            target_vars.T,
+            covars_orthonormalized.transpose(1, 0, 2).reshape(n_samples, -1),
+        ).reshape(n_target_vars, n_perm_block, -1)
+        rss += np.sum(beta_targetvars_covars**2, 2)[:, :, np.newaxis]
+    np.subtract(1, rss, out=rss)
+    score = np.divide(dof - 1.0, rss, out=rss)
+    np.sqrt(score, out=score)
+    score *= beta_targetvars_testedvars
+    return score.transpose(1, 0, 2)
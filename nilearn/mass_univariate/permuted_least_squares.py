@@ -2,28 +2,57 @@
 with OLS and permutation test."""
 # Author: Benoit Da Mota, <benoit.da_mota@inria.fr>, sept. 2011
 #         Virgile Fritsch, <virgile.fritsch@inria.fr>, jan. 2014
+import os
+import shutil
 import sys
+import tempfile
 import time
 import warnings
+from contextlib import contextmanager
+from pathlib import Path
 
 import joblib
-import nibabel as nib
 import numpy as np
 from scipy import stats
 from scipy.ndimage import generate_binary_structure, label
 from sklearn.utils import check_random_state
 
 from nilearn import image
-from nilearn.masking import apply_mask
+from nilearn.masking import _load_mask_img, apply_mask
 from nilearn.mass_univariate._utils import (
-    _calculate_cluster_measures,
-    _calculate_tfce,
+    _calculate_cluster_measures_masked,
+    _calculate_tfce_masked,
+    _mask_adjacency,
     _normalize_matrix_on_axis,
     _null_to_p,
     _orthonormalize_matrix,
     _t_score_with_covars_and_normalized_design,
+    _t_score_with_covars_and_normalized_design_block,
 )
 
+# Memory budget (in bytes) of the scores computed at once for a block of
+# permutations, and minimal number of permutations of a block.
+# Larger blocks do not make the matrix products faster, and use more memory.
+_PERM_BLOCK_MAX_BYTES = 2**25
+_PERM_BLOCK_MIN_SIZE = 8
+
+
+def _default_n_perm_block(n_descriptors, n_regressors, n_covars=0):
+    """Return the number of permutations whose scores fit in \
+    ``_PERM_BLOCK_MAX_BYTES``, and at least ``_PERM_BLOCK_MIN_SIZE``."""
+    bytes_per_perm = 8 * max(n_descriptors * (n_regressors + n_covars), 1)
+    return max(_PERM_BLOCK_MAX_BYTES // bytes_per_perm, _PERM_BLOCK_MIN_SIZE)
+
+
+def _check_n_perm_block(n_perm_block):
+    if n_perm_block is not None and (
+        not isinstance(n_perm_block, (int, np.integer)) or n_perm_block < 1
+    ):
+        raise ValueError(
+            "'n_perm_block' should be None or a positive integer. "
+            f"Got {n_perm_block!r}."
+        )
+
 
 def _permuted_ols_on_chunk(
     scores_original_data,
@@ -32,7 +61,7 @@ def _permuted_ols_on_chunk(
     thread_id,
     threshold=None,
     confounding_vars=None,
-    masker=None,
+    mask_edges=None,
     n_perm=10000,
     n_perm_chunk=10000,
     intercept_test=True,
@@ -41,6 +70,7 @@ def _permuted_ols_on_chunk(
     tfce_original_data=None,
     random_state=None,
     verbose=0,
+    n_perm_block=None,
 ):
     """Perform massively univariate analysis with permuted OLS on a data chunk.
 
@@ -63,23 +93,18 @@ def _permuted_ols_on_chunk(
     threshold : :obj:`float`
         Cluster-forming threshold in t-scale.
         This is only used for cluster-level inference.
-        If ``threshold`` is not None, but ``masker`` is, an exception will be
-        raised.
+        If ``threshold`` is not None, ``mask_edges`` must be provided.
 
         .. versionadded:: 0.9.2
 
     confounding_vars : array-like, shape=(n_samples, n_covars), optional
         Clinical data (covariates).
 
-    masker : None or :class:`~nilearn.maskers.NiftiMasker` or \
-            :class:`~nilearn.maskers.MultiNiftiMasker`, optional
-        A mask to be used on the data.
+    mask_edges : None or array-like, shape=(n_edges, 2), optional
+        Pairs of neighboring descriptors in the mask, as computed by
+        :func:`~nilearn.mass_univariate._utils._mask_adjacency`.
         This is used for cluster-level inference and :term:`TFCE`-based
         inference, if either is enabled.
-        If ``threshold`` is not None, but ``masker`` is, an exception will be
-        raised.
-
-        .. versionadded:: 0.9.2
 
     n_perm : int, default=10000
         Total number of permutations to perform, only used for
@@ -121,6 +146,13 @@ def _permuted_ols_on_chunk(
     verbose : int, default=0
         Defines the verbosity level.
 
+    n_perm_block : int or None, default=None
+        Number of permutations whose t-scores are computed together,
+        with a single matrix product.
+        If None, it is set so that the scores of a block take about
+        ``_PERM_BLOCK_MAX_BYTES`` bytes, with at least
+        ``_PERM_BLOCK_MIN_SIZE`` permutations per block.
+
     Returns
     -------
     scores_as_ranks_part : array-like, shape=(n_regressors, n_descriptors)
@@ -137,7 +169,7 @@ def _permuted_ols_on_chunk(
     h0_csfwe_part, h0_cmfwe_part : array-like, \
             shape=(n_perm_chunk, n_regressors)
         Distribution of max cluster sizes/masses under the null hypothesis.
-        Only calculated if ``masker`` is not None.
+        Only calculated if ``threshold`` is not None.
         Otherwise, these will both be None.
 
         .. versionadded:: 0.9.2
@@ -187,11 +219,38 @@ def _permuted_ols_on_chunk(
     else:
         h0_csfwe_part, h0_cmfwe_part = None, None
 
-    for i_perm in range(n_perm_chunk):
+    if n_perm_block is None:
+        n_covars = 0 if confounding_vars is None else confounding_vars.shape[1]
+        n_perm_block = _default_n_perm_block(
+            n_descriptors, n_regressors, n_covars
+        )
+    n_perm_block = int(np.clip(n_perm_block, 1, max(n_perm_chunk, 1)))
+
+    # Permutations are drawn one at a time, in the same order as if the
+    # tested variates were permuted (or the target variates sign-swapped)
+    # repeatedly, but the t-scores of a block of permutations
+    # are computed together.
+    if intercept_test:
+        signs = np.ones(n_samples)
+    else:
+        shuffle_idx = np.arange(n_samples)
+
+    for block_start in range(0, n_perm_chunk, n_perm_block):
+        block_stop = min(block_start + n_perm_block, n_perm_chunk)
         if intercept_test:
             # sign swap (random multiplication by 1 or -1)
-            target_vars = target_vars * (
-                rng.randint(2, size=(n_samples, 1)) * 2 - 1
+            # Swapping the signs of the target variates is equivalent to
+            # swapping those of the (much smaller) design.
+            block_signs = np.empty((block_stop - block_start, n_samples))
+            for i_block in range(block_stop - block_start):
+                signs = signs * (rng.randint(2, size=n_samples) * 2 - 1)
+                block_signs[i_block] = signs
+            block_signs = block_signs[:, :, np.newaxis]
+            block_tested_vars = block_signs * tested_vars
+            block_confounding_vars = (
+                None
+                if confounding_vars is None
+                else block_signs * confounding_vars
             )
 
         else:
@@ -200,16 +259,20 @@ def _permuted_ols_on_chunk(
             # and covars rather than fmri_signal.
             # Also, it is important to shuffle tested_vars and covars
             # jointly to simplify t-scores computation (null dot product).
-            shuffle_idx = rng.permutation(n_samples)
-            tested_vars = tested_vars[shuffle_idx]
-            if confounding_vars is not None:
-                confounding_vars = confounding_vars[shuffle_idx]
+            block_idx = np.empty((block_stop - block_start, n_samples), int)
+            for i_block in range(block_stop - block_start):
+                shuffle_idx = shuffle_idx[rng.permutation(n_samples)]
+                block_idx[i_block] = shuffle_idx
+            block_tested_vars = tested_vars[block_idx]
+            block_confounding_vars = (
+                None
+                if confounding_vars is None
+                else confounding_vars[block_idx]
+            )
 
         # OLS regression on randomized data
-        perm_scores = np.asfortranarray(
-            _t_score_with_covars_and_normalized_design(
-                tested_vars, target_vars, confounding_vars
-            )
+        perm_scores_block = _t_score_with_covars_and_normalized_design_block(
+            block_tested_vars, target_vars, block_confounding_vars
         )
 
         # find the rank of the original scores in h0_fmax_part
@@ -220,70 +283,70 @@ def _permuted_ols_on_chunk(
         # NOTE: This is not done for the cluster-level methods.
         if two_sided_test:
             # Get maximum absolute value for voxel-level FWE
-            h0_fmax_part[:, i_perm] = np.nanmax(np.fabs(perm_scores), axis=0)
-            scores_as_ranks_part += (
-                h0_fmax_part[:, i_perm].reshape((-1, 1))
-                < np.fabs(scores_original_data).T
-            )
+            h0_fmax_block = np.nanmax(np.fabs(perm_scores_block), axis=1).T
+            original_scores = np.fabs(scores_original_data).T
         else:
             # Get maximum value for voxel-level FWE
-            h0_fmax_part[:, i_perm] = np.nanmax(perm_scores, axis=0)
-            scores_as_ranks_part += (
-                h0_fmax_part[:, i_perm].reshape((-1, 1))
-                < scores_original_data.T
-            )
+            h0_fmax_block = np.nanmax(perm_scores_block, axis=1).T
+            original_scores = scores_original_data.T
+        h0_fmax_part[:, block_start:block_stop] = h0_fmax_block
+        scores_as_ranks_part += np.sum(
+            h0_fmax_block[:, :, np.newaxis]
+            < original_scores[:, np.newaxis, :],
+            axis=1,
+        )
 
-        # Prepare data for cluster thresholding
-        if tfce or (threshold is not None):
-            arr4d = masker.inverse_transform(perm_scores.T).get_fdata()
-            bin_struct = generate_binary_structure(3, 1)
+        for i_block, i_perm in enumerate(range(block_start, block_stop)):
+            # Clusters are computed directly on the masked scores
+            perm_scores = perm_scores_block[i_block]
+
+            if tfce:
+                # The TFCE map will contain positive and negative values
+                # if two_sided_test is True, or positive only if it's False.
+                # In either case, the maximum absolute value is the one
+                # we want.
+                h0_tfce_part[:, i_perm] = np.nanmax(
+                    np.fabs(
+                        _calculate_tfce_masked(
+                            perm_scores,
+                            mask_edges,
+                            two_sided_test=two_sided_test,
+                        )
+                    ),
+                    axis=0,
+                )
+                tfce_scores_as_ranks_part += h0_tfce_part[:, i_perm].reshape(
+                    (-1, 1)
+                ) < np.fabs(tfce_original_data.T)
+
+            if threshold is not None:
+                (
+                    h0_csfwe_part[:, i_perm],
+                    h0_cmfwe_part[:, i_perm],
+                ) = _calculate_cluster_measures_masked(
+                    perm_scores,
+                    threshold,
+                    mask_edges,
+                    two_sided_test=two_sided_test,
+                )
 
-        if tfce:
-            # The TFCE map will contain positive and negative values if
-            # two_sided_test is True, or positive only if it's False.
-            # In either case, the maximum absolute value is the one we want.
-            h0_tfce_part[:, i_perm] = np.nanmax(
-                np.fabs(
-                    _calculate_tfce(
-                        arr4d,
-                        bin_struct=bin_struct,
-                        two_sided_test=two_sided_test,
+            if verbose > 0:
+                step = 11 - min(verbose, 10)
+                if i_perm % step == 0:
+                    # If there is only one job, progress information is fixed
+                    crlf = "\n"
+                    if n_perm == n_perm_chunk:
+                        crlf = "\r"
+
+                    percent = float(i_perm) / n_perm_chunk
+                    percent = round(percent * 100, 2)
+                    dt = time.time() - t0
+                    remaining = (100.0 - percent) / max(0.01, percent) * dt
+                    sys.stderr.write(
+                        f"Job #{thread_id}, processed {i_perm}/{n_perm_chunk} "
+                        f"permutations ({percent:0.2f}%, {remaining} seconds "
+                        f"remaining){crlf}"
                     )
-                ),
-                axis=(0, 1, 2),
-            )
-            tfce_scores_as_ranks_part += h0_tfce_part[:, i_perm].reshape(
-                (-1, 1)
-            ) < np.fabs(tfce_original_data.T)
-
-        if threshold is not None:
-            (
-                h0_csfwe_part[:, i_perm],
-                h0_cmfwe_part[:, i_perm],
-            ) = _calculate_cluster_measures(
-                arr4d,
-                threshold,
-                bin_struct,
-                two_sided_test=two_sided_test,
-            )
-
-        if verbose > 0:
-            step = 11 - min(verbose, 10)
-            if i_perm % step == 0:
-                # If there is only one job, progress information is fixed
-                crlf = "\n"
-                if n_perm == n_perm_chunk:
-                    crlf = "\r"
-
-                percent = float(i_perm) / n_perm_chunk
-                percent = round(percent * 100, 2)
-                dt = time.time() - t0
-                remaining = (100.0 - percent) / max(0.01, percent) * dt
-                sys.stderr.write(
-                    f"Job #{thread_id}, processed {i_perm}/{n_perm_chunk} "
-                    f"permutations ({percent:0.2f}%, {remaining} seconds "
-                    f"remaining){crlf}"
-                )
 
     return (
         scores_as_ranks_part,
@@ -295,6 +358,221 @@ def _permuted_ols_on_chunk(
     )
 
 
+def _n_perm_chunks(n_perm, n_jobs):
+    """Split permutations in one chunk per job."""
+    if n_perm > n_jobs:
+        n_perm_chunks = np.asarray([n_perm / n_jobs] * n_jobs, dtype=int)
+        n_perm_chunks[-1] += n_perm % n_jobs
+        return n_perm_chunks
+
+    warnings.warn(
+        f"The specified number of permutations is {n_perm} and the number "
+        f"of jobs to be performed in parallel has set to {n_jobs}. "
+        f"This is incompatible so only {n_perm} jobs will be running. "
+        "You may want to perform more permutations in order to take the "
+        "most of the available computing resources."
+    )
+    return np.ones(n_perm, dtype=int)
+
+
+@contextmanager
+def _shared_memmap(array, n_jobs):
+    """Provide a read-only memory-mapped copy of an array to share it \
+    between parallel workers.
+
+    joblib sends memory-mapped arrays to worker processes as references to
+    their file, so all the workers read the same buffer instead of
+    receiving their own copy.
+    The file is placed in ``JOBLIB_TEMP_FOLDER`` if it is set,
+    or in shared memory (``/dev/shm``) when it has enough free space,
+    and removed when exiting the context.
+
+    Parameters
+    ----------
+    array : :class:`numpy.ndarray`
+        Array to share.
+
+    n_jobs : :obj:`int`
+        Number of parallel workers.
+        If 1, ``array`` is provided as is.
+
+    Yields
+    ------
+    shared_array : :class:`numpy.memmap` or :class:`numpy.ndarray`
+        Read-only memory-mapped copy of ``array``,
+        with the same memory layout.
+    """
+    if n_jobs == 1:
+        yield array
+        return
+
+    temp_folder = os.environ.get("JOBLIB_TEMP_FOLDER")
+    if (
+        temp_folder is None
+        and os.path.isdir("/dev/shm")
+        and shutil.disk_usage("/dev/shm").free > 2 * array.nbytes
+    ):
+        temp_folder = "/dev/shm"
+    temp_folder = tempfile.mkdtemp(prefix="nilearn_", dir=temp_folder)
+    try:
+        filename = os.path.join(temp_folder, "shared.npy")
+        np.save(filename, array)
+        yield np.load(filename, mmap_mode="r")
+    finally:
+        shutil.rmtree(temp_folder, ignore_errors=True)
+
+
+def _dump_checkpoint(value, filename):
+    """Save a value with joblib, replacing the file atomically."""
+    tmp_filename = filename.with_name(f"{filename.name}.tmp")
+    joblib.dump(value, tmp_filename)
+    os.replace(tmp_filename, filename)
+
+
+def _permuted_ols_on_checkpointed_chunk(chunk_file, *args, **kwargs):
+    """Run :func:`_permuted_ols_on_chunk` and save its outputs to a file."""
+    outputs = _permuted_ols_on_chunk(*args, **kwargs)
+    _dump_checkpoint(
+        {
+            "n_perm_chunk": kwargs["n_perm_chunk"],
+            "random_state": kwargs["random_state"],
+            "outputs": outputs,
+        },
+        chunk_file,
+    )
+    return outputs
+
+
+def _permuted_ols_with_checkpoints(
+    checkpoint_dir,
+    checkpoint_every,
+    scores_original_data,
+    tested_vars,
+    target_vars,
+    rng,
+    n_jobs=1,
+    **kwargs,
+):
+    """Perform permutations by chunks saved in a checkpoint directory.
+
+    Permutations are split in chunks of ``checkpoint_every`` permutations,
+    each seeded from ``rng``.
+    The seeds and the state of ``rng`` are saved in ``checkpoint_dir``,
+    along with the outputs of each chunk once it is finished,
+    so that finished chunks are reused by later calls on the same data.
+
+    Parameters
+    ----------
+    checkpoint_dir : :obj:`str` or :obj:`pathlib.Path`
+        Directory where the checkpoints are saved.
+
+    checkpoint_every : :obj:`int`
+        Number of permutations per chunk.
+
+    scores_original_data, tested_vars, target_vars : array-like
+        See :func:`_permuted_ols_on_chunk`.
+
+    rng : :class:`numpy.random.RandomState`
+        Random number generator used to seed the chunks,
+        unless a checkpoint already exists.
+
+    n_jobs : :obj:`int`, default=1
+        Number of chunks processed in parallel.
+
+    **kwargs
+        Other parameters of :func:`_permuted_ols_on_chunk`.
+
+    Returns
+    -------
+    outputs : :obj:`list` of :obj:`tuple`
+        Outputs of :func:`_permuted_ols_on_chunk` for each chunk.
+    """
+    checkpoint_dir = Path(checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    n_perm = kwargs["n_perm"]
+    n_chunks = -(-n_perm // checkpoint_every)
+
+    # Checkpoints can only be reused for the same data and options
+    key = joblib.hash(
+        (
+            scores_original_data,
+            tested_vars,
+            target_vars,
+            checkpoint_every,
+            {
+                name: value
+                for name, value in kwargs.items()
+                if name not in ("n_perm", "verbose", "n_perm_block")
+            },
+        )
+    )
+    state_file = checkpoint_dir / "permuted_ols_state.joblib"
+    if state_file.exists():
+        state = joblib.load(state_file)
+        if state["key"] != key:
+            raise ValueError(
+                f"The checkpoint in '{checkpoint_dir}' was obtained with "
+                "different data or options. "
+                "Please use another 'checkpoint_dir'."
+            )
+        rng = np.random.RandomState()
+        rng.set_state(state["rng_state"])
+    else:
+        state = {"key": key, "seeds": []}
+
+    # Seeds of new chunks are drawn after the ones of previous calls,
+    # so that extending the number of permutations reuses finished chunks.
+    seeds = state["seeds"]
+    if len(seeds) < n_chunks:
+        seeds.extend(
+            rng.randint(1, np.iinfo(np.int32).max - 1)
+            for _ in range(n_chunks - len(seeds))
+        )
+        state["rng_state"] = rng.get_state()
+        _dump_checkpoint(state, state_file)
+
+    outputs = [None] * n_chunks
+    todo = []
+    for i_chunk in range(n_chunks):
+        n_perm_chunk = min(
+            checkpoint_every, n_perm - i_chunk * checkpoint_every
+        )
+        chunk_file = checkpoint_dir / f"permuted_ols_chunk_{i_chunk}.joblib"
+        if chunk_file.exists():
+            chunk = joblib.load(chunk_file)
+            if (chunk["n_perm_chunk"], chunk["random_state"]) == (
+                n_perm_chunk,
+                seeds[i_chunk],
+            ):
+                outputs[i_chunk] = chunk["outputs"]
+                continue
+        todo.append((i_chunk, n_perm_chunk, chunk_file))
+
+    if kwargs["verbose"] > 0 and len(todo) < n_chunks:
+        sys.stderr.write(
+            f"Reusing {n_chunks - len(todo)}/{n_chunks} chunks of "
+            f"permutations from '{checkpoint_dir}'.\n"
+        )
+
+    computed = joblib.Parallel(n_jobs=n_jobs, verbose=kwargs["verbose"])(
+        joblib.delayed(_permuted_ols_on_checkpointed_chunk)(
+            chunk_file,
+            scores_original_data,
+            tested_vars,
+            target_vars,
+            thread_id=i_chunk + 1,
+            n_perm_chunk=n_perm_chunk,
+            random_state=seeds[i_chunk],
+            **kwargs,
+        )
+        for i_chunk, n_perm_chunk, chunk_file in todo
+    )
+    for (i_chunk, _, _), chunk_outputs in zip(todo, computed):
+        outputs[i_chunk] = chunk_outputs
+
+    return outputs
+
+
 def permuted_ols(
     tested_vars,
     target_vars,
@@ -309,6 +587,9 @@ def permuted_ols(
     tfce=False,
     threshold=None,
     output_type="legacy",
+    checkpoint_dir=None,
+    checkpoint_every=1000,
+    n_perm_block=None,
 ):
     """Massively univariate group analysis with permuted OLS.
 
@@ -384,6 +665,8 @@ def permuted_ols(
         If -1 is provided, all CPUs are used.
         A negative number indicates that all the CPUs except (abs(n_jobs) - 1)
         ones will be used.
+        When several workers are used, they share a single memory-mapped
+        copy of the target variates.
 
     verbose : :obj:`int`, default=0
         verbosity level (0 means no message).
@@ -445,6 +728,41 @@ def permuted_ols(
 
         .. versionadded:: 0.9.2
 
+    checkpoint_dir : None or :obj:`str` or :obj:`pathlib.Path`, default=None
+        Directory where the null distributions of finished chunks of
+        ``checkpoint_every`` permutations are saved, along with the state
+        of the random number generator.
+        Calling this function again with the same data, options and
+        ``checkpoint_dir`` reuses the finished chunks, so that an
+        interrupted analysis can be resumed, or extended with a larger
+        ``n_perm``.
+        The random state of the first call is used for all the following
+        ones.
+        If None, no checkpoint is saved.
+
+        .. note::
+
+            The permutations depend on the chunks, so results obtained
+            with and without checkpoints differ for a given
+            ``random_state``.
+
+        .. versionadded:: 0.11.0
+
+    checkpoint_every : :obj:`int`, default=1000
+        Number of permutations per checkpointed chunk.
+        Only used if ``checkpoint_dir`` is not None.
+
+        .. versionadded:: 0.11.0
+
+    n_perm_block : None or :obj:`int`, default=None
+        Number of permutations whose t-scores are computed together,
+        with a single matrix product. Larger blocks are faster but use
+        more memory. The results do not depend on it.
+        If None, blocks are sized so that their scores take about 32 MB,
+        with at least 8 permutations per block.
+
+        .. versionadded:: 0.11.0
+
     Returns
     -------
     pvals : array-like, shape=(n_regressors, n_descriptors)
@@ -630,6 +948,16 @@ def permuted_ols(
             'If "threshold" is not None, masker must be defined as well.'
         )
 
+    if checkpoint_dir is not None and (
+        not isinstance(checkpoint_every, (int, np.integer))
+        or checkpoint_every < 1
+    ):
+        raise ValueError(
+            "'checkpoint_every' should be a positive integer. "
+            f"Got {checkpoint_every!r}."
+        )
+    _check_n_perm_block(n_perm_block)
+
     # Resolve the output_type as well
     if tfce and output_type == "legacy":
         warnings.warn(
@@ -798,24 +1126,21 @@ def permuted_ols(
 
     # Define connectivity for TFCE and/or cluster measures
     bin_struct = generate_binary_structure(3, 1)
+    if tfce or (threshold is not None):
+        # Neighboring voxels of the mask, computed once so that clusters
+        # can be found on the masked scores of each permutation.
+        mask_edges = _mask_adjacency(
+            _load_mask_img(masker.mask_img_)[0], bin_struct
+        )
+    else:
+        mask_edges = None
 
     if tfce:
-        scores_4d = masker.inverse_transform(
-            scores_original_data.T
-        ).get_fdata()
-        tfce_original_data = _calculate_tfce(
-            scores_4d,
-            bin_struct=bin_struct,
+        tfce_original_data = _calculate_tfce_masked(
+            scores_original_data,
+            mask_edges,
             two_sided_test=two_sided_test,
         )
-        tfce_original_data = apply_mask(
-            nib.Nifti1Image(
-                tfce_original_data,
-                masker.mask_img_.affine,
-                masker.mask_img_.header,
-            ),
-            masker.mask_img_,
-        ).T
 
     else:
         tfce_original_data = None
@@ -830,22 +1155,22 @@ def permuted_ols(
     else:
         threshold_t = None
 
-    # Permutations
-    # parallel computing units perform a reduced number of permutations each
-    if n_perm > n_jobs:
-        n_perm_chunks = np.asarray([n_perm / n_jobs] * n_jobs, dtype=int)
-        n_perm_chunks[-1] += n_perm % n_jobs
+    chunk_kwargs = dict(
+        threshold=threshold_t,
+        confounding_vars=covars_orthonormalized,
+        mask_edges=mask_edges,
+        n_perm=n_perm,
+        intercept_test=intercept_test,
+        two_sided_test=two_sided_test,
+        tfce=tfce,
+        tfce_original_data=tfce_original_data,
+        verbose=verbose,
+        n_perm_block=n_perm_block,
+    )
 
-    elif n_perm > 0:
-        warnings.warn(
-            f"The specified number of permutations is {n_perm} and the number "
-            f"of jobs to be performed in parallel has set to {n_jobs}. "
-            f"This is incompatible so only {n_perm} jobs will be running. "
-            "You may want to perform more permutations in order to take the "
-            "most of the available computing resources."
-        )
-        n_perm_chunks = np.ones(n_perm, dtype=int)
-    else:  # 0 or negative number of permutations => original data scores only
+    # Permutations
+    if n_perm <= 0:
+        # 0 or negative number of permutations => original data scores only
         if output_type == "legacy":
             return np.asarray([]), scores_original_data.T, np.asarray([])
 
@@ -855,28 +1180,40 @@ def permuted_ols(
 
         return out
 
-    # actual permutations, seeded from a random integer between 0 and maximum
-    # value represented by np.int32 (to have a large entropy).
-    ret = joblib.Parallel(n_jobs=n_jobs, verbose=verbose)(
-        joblib.delayed(_permuted_ols_on_chunk)(
-            scores_original_data,
-            testedvars_resid_covars,
-            targetvars_resid_covars.T,
-            thread_id=thread_id + 1,
-            threshold=threshold_t,
-            confounding_vars=covars_orthonormalized,
-            masker=masker,
-            n_perm=n_perm,
-            n_perm_chunk=n_perm_chunk,
-            intercept_test=intercept_test,
-            two_sided_test=two_sided_test,
-            tfce=tfce,
-            tfce_original_data=tfce_original_data,
-            random_state=rng.randint(1, np.iinfo(np.int32).max - 1),
-            verbose=verbose,
-        )
-        for thread_id, n_perm_chunk in enumerate(n_perm_chunks)
-    )
+    # The workers share a single memory-mapped copy of the target variates
+    # rather than each receiving its own copy.
+    with _shared_memmap(targetvars_resid_covars.T, n_jobs) as shared_targets:
+        if checkpoint_dir is not None:
+            ret = _permuted_ols_with_checkpoints(
+                checkpoint_dir,
+                checkpoint_every,
+                scores_original_data,
+                testedvars_resid_covars,
+                shared_targets,
+                rng=rng,
+                n_jobs=n_jobs,
+                **chunk_kwargs,
+            )
+
+        else:
+            # parallel computing units perform a reduced number of
+            # permutations each
+            n_perm_chunks = _n_perm_chunks(n_perm, n_jobs)
+
+            # actual permutations, seeded from a random integer between 0 and
+            # maximum value represented by np.int32 (to have a large entropy).
+            ret = joblib.Parallel(n_jobs=n_jobs, verbose=verbose)(
+                joblib.delayed(_permuted_ols_on_chunk)(
+                    scores_original_data,
+                    testedvars_resid_covars,
+                    shared_targets,
+                    thread_id=thread_id + 1,
+                    n_perm_chunk=n_perm_chunk,
+                    random_state=rng.randint(1, np.iinfo(np.int32).max - 1),
+                    **chunk_kwargs,
+                )
+                for thread_id, n_perm_chunk in enumerate(n_perm_chunks)
+            )
 
     # reduce results
     (
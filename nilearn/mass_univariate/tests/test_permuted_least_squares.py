@@ -2,6 +2,8 @@
 
 # Author: Virgile Fritsch, <virgile.fritsch@inria.fr>, Feb. 2014
 
+import contextlib
+
 import nibabel as nib
 import numpy as np
 import pytest
@@ -14,7 +16,16 @@ from scipy import stats
 
 from nilearn.conftest import _rng
 from nilearn.maskers import NiftiMasker
-from nilearn.mass_univariate import permuted_ols
+from nilearn.mass_univariate import permuted_least_squares, permuted_ols
+from nilearn.mass_univariate._utils import (
+    _normalize_matrix_on_axis,
+    _orthonormalize_matrix,
+    _t_score_with_covars_and_normalized_design,
+)
+from nilearn.mass_univariate.permuted_least_squares import (
+    _permuted_ols_on_chunk,
+    _shared_memmap,
+)
 
 N_COVARS = 2
 
@@ -269,6 +280,186 @@ def test_permuted_ols_check_h0_noeffect_signswap(rng):
 # Tests for labels swapping permutation scheme
 
 
+def _reference_h0_fmax(
+    tested_vars, target_vars, covars, n_perm, intercept_test, random_state
+):
+    """Permute the data one permutation at a time."""
+    rng = np.random.RandomState(random_state)
+    n_samples = tested_vars.shape[0]
+    h0 = []
+    for _ in range(n_perm):
+        if intercept_test:
+            target_vars = target_vars * (
+                rng.randint(2, size=(n_samples, 1)) * 2 - 1
+            )
+        else:
+            shuffle_idx = rng.permutation(n_samples)
+            tested_vars = tested_vars[shuffle_idx]
+            if covars is not None:
+                covars = covars[shuffle_idx]
+        scores = _t_score_with_covars_and_normalized_design(
+            tested_vars, target_vars, covars
+        )
+        h0.append(np.nanmax(np.fabs(scores), axis=0))
+    return np.array(h0).T
+
+
+@pytest.mark.parametrize("intercept_test", [True, False])
+@pytest.mark.parametrize("n_covars", [0, 2])
+@pytest.mark.parametrize("n_perm_block", [None, 1, 3])
+def test_permuted_ols_on_chunk_blocks(
+    rng, intercept_test, n_covars, n_perm_block
+):
+    """Check that permutations computed by blocks give the same null \
+    distribution as permutations computed one at a time.
+    """
+    n_samples, n_descriptors, n_regressors, n_perm = 20, 30, 2, 10
+    target_vars = _normalize_matrix_on_axis(
+        rng.randn(n_samples, n_descriptors)
+    )
+    tested_vars = _normalize_matrix_on_axis(rng.randn(n_samples, n_regressors))
+    covars = None
+    if n_covars:
+        covars = _orthonormalize_matrix(rng.randn(n_samples, n_covars))
+        tested_vars = _normalize_matrix_on_axis(
+            tested_vars - covars @ (covars.T @ tested_vars)
+        )
+    scores_original_data = _t_score_with_covars_and_normalized_design(
+        tested_vars, target_vars, covars
+    )
+
+    scores_as_ranks, h0_fmax, *_ = _permuted_ols_on_chunk(
+        scores_original_data,
+        tested_vars,
+        target_vars,
+        thread_id=1,
+        confounding_vars=covars,
+        n_perm=n_perm,
+        n_perm_chunk=n_perm,
+        intercept_test=intercept_test,
+        random_state=0,
+        n_perm_block=n_perm_block,
+    )
+
+    expected_h0_fmax = _reference_h0_fmax(
+        tested_vars, target_vars, covars, n_perm, intercept_test, 0
+    )
+    assert_array_almost_equal(h0_fmax, expected_h0_fmax)
+    assert_array_almost_equal(
+        scores_as_ranks,
+        np.sum(
+            expected_h0_fmax[:, :, np.newaxis]
+            < np.fabs(scores_original_data).T[:, np.newaxis, :],
+            axis=1,
+        ),
+    )
+
+
+def test_default_n_perm_block():
+    # whole-brain analyses are computed by blocks of permutations
+    n_perm_block = permuted_least_squares._default_n_perm_block(200_000, 1)
+    assert 1 < n_perm_block <= 32
+    assert permuted_least_squares._default_n_perm_block(
+        200_000, 1, n_covars=10
+    ) == (permuted_least_squares._PERM_BLOCK_MIN_SIZE)
+    assert permuted_least_squares._default_n_perm_block(100, 2) > 1000
+
+
+@pytest.mark.parametrize("n_perm_block", [None, 3])
+def test_permuted_ols_n_perm_block(rng, monkeypatch, n_perm_block):
+    """Check that permutations are computed by blocks of several \
+    permutations for realistic numbers of descriptors.
+    """
+    n_samples, n_descriptors, n_perm = 20, 100_000, 50
+    tested_var = rng.randn(n_samples, 1)
+    target_var = rng.randn(n_samples, n_descriptors)
+
+    block_sizes = []
+    block_scores = (
+        permuted_least_squares._t_score_with_covars_and_normalized_design_block
+    )
+
+    def recording_block_scores(tested_vars, *args, **kwargs):
+        block_sizes.append(tested_vars.shape[0])
+        return block_scores(tested_vars, *args, **kwargs)
+
+    monkeypatch.setattr(
+        permuted_least_squares,
+        "_t_score_with_covars_and_normalized_design_block",
+        recording_block_scores,
+    )
+    permuted_ols(
+        tested_var,
+        target_var,
+        model_intercept=False,
+        n_perm=n_perm,
+        random_state=0,
+        n_perm_block=n_perm_block,
+    )
+
+    assert sum(block_sizes) == n_perm
+    if n_perm_block is None:
+        default = permuted_least_squares._default_n_perm_block(
+            n_descriptors, 1
+        )
+        assert 1 < default < n_perm
+        assert block_sizes == [default, n_perm - default]
+    else:
+        assert block_sizes == [3] * 16 + [2]
+
+
+def test_permuted_ols_n_perm_block_error(rng):
+    with pytest.raises(ValueError, match="'n_perm_block' should be"):
+        permuted_ols(
+            rng.randn(N_SAMPLES, 1),
+            rng.randn(N_SAMPLES, 5),
+            n_perm=N_PERM,
+            n_perm_block=0,
+        )
+
+
+def test_shared_memmap(rng, tmp_path, monkeypatch):
+    array = np.asfortranarray(rng.standard_normal((20, 30)))
+
+    with _shared_memmap(array, n_jobs=1) as shared:
+        assert shared is array
+
+    monkeypatch.setenv("JOBLIB_TEMP_FOLDER", str(tmp_path))
+    with _shared_memmap(array, n_jobs=2) as shared:
+        assert isinstance(shared, np.memmap)
+        assert not shared.flags.writeable
+        assert shared.strides == array.strides
+        assert_array_almost_equal(shared, array)
+        assert len(list(tmp_path.iterdir())) == 1
+    assert not list(tmp_path.iterdir())
+
+
+def test_permuted_ols_n_jobs_shared_memmap(design, monkeypatch):
+    """Check that workers sharing memory-mapped data give the same results."""
+    target_var, tested_var, *_ = design
+    kwargs = dict(
+        model_intercept=False,
+        n_perm=N_PERM,
+        random_state=0,
+        output_type="dict",
+        n_jobs=2,
+    )
+
+    shared = permuted_ols(tested_var, target_var, **kwargs)
+
+    @contextlib.contextmanager
+    def not_shared_memmap(array, n_jobs):
+        yield array
+
+    monkeypatch.setattr(
+        permuted_least_squares, "_shared_memmap", not_shared_memmap
+    )
+    not_shared = permuted_ols(tested_var, target_var, **kwargs)
+
+    for key in shared:
+        assert_array_almost_equal(shared[key], not_shared[key])
+
+
 def test_permuted_ols_no_covar(design, rng):
     target_var, tested_var, *_ = design
     output = permuted_ols(
@@ -921,3 +1112,94 @@ def test_cluster_level_parameters_smoke(cluster_level_design, masker, rng):
     assert out["h0_max_t"].size == n_perm
     assert out["h0_max_size"].size == n_perm
     assert out["h0_max_mass"].size == n_perm
+
+
+def test_permuted_ols_checkpoint_resume(
+    cluster_level_design, masker, tmp_path, monkeypatch
+):
+    """Check that checkpointed chunks are reused when resuming."""
+    target_var, tested_var = cluster_level_design
+    kwargs = dict(
+        model_intercept=False,
+        two_sided_test=True,
+        random_state=0,
+        threshold=0.001,
+        tfce=True,
+        masker=masker,
+        output_type="dict",
+        checkpoint_every=4,
+    )
+
+    permuted_ols(
+        tested_var,
+        target_var,
+        n_perm=10,
+        checkpoint_dir=tmp_path / "resumed",
+        **kwargs,
+    )
+    # simulate an interrupted run
+    (tmp_path / "resumed" / "permuted_ols_chunk_1.joblib").unlink()
+
+    n_calls = []
+
+    def counting_chunk(*args, **kwargs):
+        n_calls.append(kwargs["n_perm_chunk"])
+        return _permuted_ols_on_chunk(*args, **kwargs)
+
+    monkeypatch.setattr(
+        permuted_least_squares, "_permuted_ols_on_chunk", counting_chunk
+    )
+    # resume the interrupted chunk and extend to more permutations
+    resumed = permuted_ols(
+        tested_var,
+        target_var,
+        n_perm=15,
+        checkpoint_dir=tmp_path / "resumed",
+        **kwargs,
+    )
+
+    # chunk 0 is reused, chunk 1 is recomputed, chunk 2 is extended
+    # from 2 to 4 permutations and chunk 3 is new
+    assert n_calls == [4, 4, 3]
+
+    expected = permuted_ols(
+        tested_var,
+        target_var,
+        n_perm=15,
+        checkpoint_dir=tmp_path / "fresh",
+        **kwargs,
+    )
+    assert resumed.keys() == expected.keys()
+    for key in expected:
+        assert_array_almost_equal(resumed[key], expected[key])
+
+
+def test_permuted_ols_checkpoint_errors(cluster_level_design, tmp_path):
+    target_var, tested_var = cluster_level_design
+
+    with pytest.raises(ValueError, match="positive integer"):
+        permuted_ols(
+            tested_var,
+            target_var,
+            n_perm=N_PERM,
+            output_type="dict",
+            checkpoint_dir=tmp_path,
+            checkpoint_every=0,
+        )
+
+    permuted_ols(
+        tested_var,
+        target_var,
+        n_perm=N_PERM,
+        output_type="dict",
+        checkpoint_dir=tmp_path,
+    )
+    with pytest.raises(ValueError, match="different data or options"):
+        permuted_ols(
+            tested_var,
+            target_var,
+            n_perm=N_PERM,
+            two_sided_test=False,
+            output_type="dict",
+            checkpoint_dir=tmp_path,
+        )
@@ -4,7 +4,7 @@ import math
 import numpy as np
 import pytest
 from numpy.testing import assert_array_almost_equal
-from scipy.ndimage import generate_binary_structure
+from scipy.ndimage import generate_binary_structure, label
 
 from nilearn.mass_univariate import _utils
 from nilearn.mass_univariate.tests._testing import (
@@ -74,6 +74,64 @@ def test_calculate_tfce(two_sided_test, dh, true_max_tfce):
     assert np.max(np.abs(test_tfce_arr4d)) == true_max_tfce
 
 
+def _reference_tfce(arr3d, bin_struct, score_threshs, E, H):
+    """Compute one-sided TFCE by labeling clusters at each threshold."""
+    tfce = np.zeros(arr3d.shape)
+    temp_arr3d = arr3d.copy()
+    for score_thresh in score_threshs:
+        temp_arr3d[temp_arr3d < score_thresh] = 0
+        labels, _ = label(temp_arr3d, bin_struct)
+        cluster_counts = np.bincount(labels.ravel())
+        cluster_counts[0] = 0
+        tfce += (cluster_counts[labels] ** E) * (score_thresh**H)
+    return tfce
+
+
+@pytest.mark.parametrize("connectivity", [1, 2, 3])
+@pytest.mark.parametrize("two_sided_test", [True, False])
+def test_calculate_tfce_matches_labeling(rng, connectivity, two_sided_test):
+    """Check union-find TFCE against labeling clusters at each threshold."""
+    bin_struct = generate_binary_structure(3, connectivity)
+    arr4d = rng.standard_normal((8, 9, 7, 1))
+    arr4d[:2] = 0
+
+    tfce = _utils._calculate_tfce(
+        arr4d,
+        bin_struct=bin_struct,
+        dh=0.2,
+        two_sided_test=two_sided_test,
+    )
+
+    max_score = np.abs(arr4d).max() if two_sided_test else arr4d.max()
+    score_threshs = np.arange(0.2, max_score + 0.2, 0.2)
+    expected = _reference_tfce(
+        arr4d[..., 0], bin_struct, score_threshs, 0.5, 2
+    )
+    if two_sided_test:
+        expected -= _reference_tfce(
+            -arr4d[..., 0], bin_struct, score_threshs, 0.5, 2
+        )
+    assert_array_almost_equal(tfce[..., 0], expected)
+
+
+def test_mask_adjacency():
+    mask = np.zeros((3, 3, 3), dtype=bool)
+    mask[1, 1, :] = True
+    mask[0, 0, 0] = True
+
+    edges = _utils._mask_adjacency(mask, generate_binary_structure(3, 1))
+    # voxels are indexed in C order: (0, 0, 0) first
+    assert sorted(map(tuple, np.sort(edges, axis=1))) == [(1, 2), (2, 3)]
+
+    edges = _utils._mask_adjacency(mask, generate_binary_structure(3, 3))
+    assert sorted(map(tuple, np.sort(edges, axis=1))) == [
+        (0, 1),
+        (0, 2),
+        (1, 2),
+        (2, 3),
+    ]
+
+
 @pytest.mark.parametrize(
     "test_values, expected_p_value", [(9, 0.95), (-9, 0.15), (0, 0.4)]
 )
@@ -222,6 +280,57 @@ def test_calculate_cluster_measures_on_empty_array():
     assert test_mass[0] == true_mass
 
 
+@pytest.mark.parametrize("two_sided_test", [True, False])
+def test_calculate_cluster_measures_masked(test_arr4d, two_sided_test):
+    """Check that masked cluster measures match the ones of 3D maps."""
+    bin_struct = generate_binary_structure(3, 1)
+    mask = np.ones(test_arr4d.shape[:3], dtype=bool)
+    mask[9] = False
+
+    expected = _utils._calculate_cluster_measures(
+        test_arr4d * mask[..., np.newaxis],
+        threshold=0.001,
+        bin_struct=bin_struct,
+        two_sided_test=two_sided_test,
+    )
+    max_size, max_mass = _utils._calculate_cluster_measures_masked(
+        test_arr4d[mask],
+        threshold=0.001,
+        edges=_utils._mask_adjacency(mask, bin_struct),
+        two_sided_test=two_sided_test,
+    )
+
+    assert_array_almost_equal(max_size, expected[0])
+    assert_array_almost_equal(max_mass, expected[1])
+
+
+@pytest.mark.parametrize("two_sided_test", [True, False])
+def test_calculate_tfce_masked(rng, two_sided_test):
+    """Check that masked TFCE values match the ones of 3D maps."""
+    bin_struct = generate_binary_structure(3, 1)
+    mask = rng.random_sample((8, 9, 7)) > 0.3
+    arr4d = rng.standard_normal((8, 9, 7, 2)) * mask[..., np.newaxis]
+
+    expected = _utils._calculate_tfce(
+        arr4d, bin_struct=bin_struct, two_sided_test=two_sided_test
+    )
+    tfce = _utils._calculate_tfce_masked(
+        arr4d[mask],
+        _utils._mask_adjacency(mask, bin_struct),
+        two_sided_test=two_sided_test,
+    )
+
+    assert_array_almost_equal(tfce, expected[mask])
+
+
+def test_calculate_tfce_masked_no_positive_score():
+    tfce = _utils._calculate_tfce_masked(
+        -np.ones((3, 1)), np.array([[0, 1], [1, 2]]), two_sided_test=False
+    )
+
+    assert_array_almost_equal(tfce, np.zeros((3, 1)))
+
+
 def test_t_score_with_covars_and_normalized_design_nocovar(rng):
     """Test t-scores computation without covariates."""
     # Normalized data
@@ -263,3 +372,42 @@ def test_t_score_with_covars_and_normalized_design_withcovar(rng):
     # compute t-scores with linalg or statmodels
     ref_score = get_tvalue_with_alternative_library(var1, var2, covars)
     assert_array_almost_equal(own_score, ref_score)
+
+
+@pytest.mark.parametrize("n_covars", [0, 2])
+def test_t_score_with_covars_and_normalized_design_block(rng, n_covars):
+    """Test block t-scores against t-scores of each permutation."""
+    n_samples, n_descriptors, n_regressors, n_perm_block = 20, 7, 2, 5
+
+    target_vars = _utils._normalize_matrix_on_axis(
+        rng.randn(n_samples, n_descriptors)
+    )
+    tested_vars = _utils._normalize_matrix_on_axis(
+        rng.randn(n_samples, n_regressors)
+    )
+    covars = None
+    if n_covars:
+        covars = _utils._orthonormalize_matrix(rng.randn(n_samples, n_covars))
+        tested_vars = _utils._normalize_matrix_on_axis(
+            tested_vars - covars @ (covars.T @ tested_vars)
+        )
+    block_idx = np.array(
+        [rng.permutation(n_samples) for _ in range(n_perm_block)]
+    )
+
+    block_scores = _utils._t_score_with_covars_and_normalized_design_block(
+        tested_vars[block_idx],
+        target_vars,
+        None if covars is None else covars[block_idx],
+    )
+
+    assert block_scores.shape == (n_perm_block, n_descriptors, n_regressors)
+    for idx, scores in zip(block_idx, block_scores):
+        assert_array_almost_equal(
+            scores,
+            _utils._t_score_with_covars_and_normalized_design(
+                tested_vars[idx],
+                target_vars,
+                None if covars is None else covars[idx],
+            ),
+        )
@@ -2,20 +2,24 @@
 import copy
 import json
 import os
+import threading
 import warnings
 from base64 import b64encode
+from collections import OrderedDict
 from io import BytesIO
 
+import joblib
 import matplotlib
 import numpy as np
 from matplotlib.image import imsave
 from nibabel.affines import apply_affine
+from PIL import Image
 
 from nilearn.plotting.html_document import HTMLDocument
 
 from .._utils import fill_doc
 from .._utils.extmath import fast_abs_percentile
-from .._utils.niimg import safe_get_data
+from .._utils.niimg import _get_data, safe_get_data
 from .._utils.niimg_conversions import check_niimg_3d
 from .._utils.param_validation import check_threshold
 from ..datasets import load_mni152_template
@@ -40,24 +44,25 @@ def _data_to_sprite(data):
         If each sagittal slice is nz (height) x ny (width) pixels, the sprite
         size is (M x nz) x (N x ny), where M and N are computed to be roughly
         equal. All slices are pasted together row by row, from top left to
-        bottom right. The last row is completed with empty slices.
+        bottom right. The last row is completed with empty slices. The sprite
+        has the same dtype as ``data``.
 
     """
     nx, ny, nz = data.shape
     nrows = int(np.ceil(np.sqrt(nx)))
     ncolumns = int(np.ceil(nx / float(nrows)))
 
-    sprite = np.zeros((nrows * nz, ncolumns * ny))
-    indrow, indcol = np.where(np.ones((nrows, ncolumns)))
+    # each slice is flipped in the z axis and transposed, so that it is nz
+    # (height) x ny (width) pixels
+    slices = np.zeros((nrows * ncolumns, nz, ny), dtype=data.dtype)
+    slices[:nx] = data[:, :, ::-1].transpose(0, 2, 1)
 
-    for xx in range(nx):
-        # we need to flip the image in the x axis
-        sprite[
-            (indrow[xx] * nz) : ((indrow[xx] + 1) * nz),
-            (indcol[xx] * ny) : ((indcol[xx] + 1) * ny),
-        ] = data[xx, :, ::-1].transpose()
-
-    return sprite
+    # paste the slices row by row
+    return (
+        slices.reshape(nrows, ncolumns, nz, ny)
+        .transpose(0, 2, 1, 3)
+        .reshape(nrows * nz, ncolumns * ny)
+    )
 
 
 def _threshold_data(data, threshold=None):
@@ -115,6 +120,63 @@ def _threshold_data(data, threshold=None):
     return data, mask, threshold
 
 
+def _colormap_lookup(data, vmin, vmax, cmap):
+    """Quantize data to entries of the lookup table of a colormap.
+
+    The data are normalized and mapped to colors the same way as
+    :func:`matplotlib.image.imsave`, including the colors for values under
+    ``vmin``, over ``vmax`` and for masked values.
+
+    Returns
+    -------
+    indices : 2D numpy array of int
+        Index of the color of each pixel in ``lut``.
+
+    lut : numpy array of shape (n_colors, 4)
+        RGBA colors as uint8.
+
+    """
+    cmap = matplotlib.pyplot.get_cmap(cmap)
+    n_colors = cmap.N
+    lut = np.concatenate(
+        [
+            cmap(np.arange(n_colors), bytes=True),
+            cmap(np.array([-1, n_colors]), bytes=True),
+            cmap(np.array([np.nan]), bytes=True),
+        ]
+    )
+    normed = matplotlib.colors.Normalize(vmin, vmax)(data)
+    scaled = np.ma.getdata(normed) * n_colors
+    # the maximum value belongs to the last color, not to the over color
+    scaled[scaled == n_colors] = n_colors - 1
+    with np.errstate(invalid="ignore"):
+        indices = scaled.astype(np.intp)
+    indices[scaled < 0] = n_colors
+    indices[scaled >= n_colors] = n_colors + 1
+    indices[np.ma.getmaskarray(normed) | np.isnan(scaled)] = n_colors + 2
+    return indices, lut
+
+
+def _save_colormapped(output, data, vmin, vmax, cmap, format="png"):
+    """Save a 2D array as an image, mapping its values to colors.
+
+    Images with no more than 256 distinct colors, such as thresholded maps
+    and anatomical images, are saved with a palette of uint8 indices,
+    which is faster to encode and smaller than RGBA pixels.
+
+    """
+    indices, lut = _colormap_lookup(data, vmin, vmax, cmap)
+    used = np.flatnonzero(np.bincount(indices.ravel(), minlength=len(lut)))
+    if len(used) > 256:
+        Image.fromarray(lut[indices], mode="RGBA").save(output, format=format)
+        return
+    palette = np.zeros(len(lut), dtype=np.uint8)
+    palette[used] = np.arange(len(used))
+    image = Image.fromarray(palette[indices], mode="P")
+    image.putpalette(lut[used, :3].ravel())
+    image.save(output, format=format, transparency=lut[used, 3].tobytes())
+
+
 def _save_sprite(
     data, output_sprite, vmax, vmin, mask=None, cmap="Greys", format="png"
 ):
@@ -155,9 +217,7 @@ def _save_sprite(
         sprite = np.ma.array(sprite, mask=mask)
 
     # Save the sprite
-    imsave(
-        output_sprite, sprite, vmin=vmin, vmax=vmax, cmap=cmap, format=format
-    )
+    _save_colormapped(output_sprite, sprite, vmin, vmax, cmap, format)
 
     return sprite
 
@@ -183,6 +243,11 @@ def _save_cm(output_cmap, cmap, format="png", n_colors=256):
     imsave(output_cmap, data, cmap=cmap, format=format)
 
 
+_BG_SPRITE_CACHE_SIZE = 4
+_bg_sprite_cache = OrderedDict()
+_bg_sprite_cache_lock = threading.Lock()
+
+
 class StatMapView(HTMLDocument):  # noqa: D101
     pass
 
@@ -350,6 +415,41 @@ def _get_bg_mask_and_cmap(bg_img, black_bg):
     return bg_mask, bg_cmap
 
 
+def _bg_sprite_base64(bg_img, bg_min, bg_max, black_bg):
+    """Get the base64 sprite of a background image.
+
+    The background is usually the same across calls to
+    :func:`view_img`, so recently built sprites are reused.
+
+    """
+    # the key is computed from the data in its native type, so that cache
+    # hits skip the float conversion and the mask computation
+    data = _get_data(bg_img)
+    key = joblib.hash(
+        (
+            np.ma.getdata(data),
+            np.ma.getmaskarray(data),
+            bg_min,
+            bg_max,
+            black_bg,
+        )
+    )
+    with _bg_sprite_cache_lock:
+        if key in _bg_sprite_cache:
+            _bg_sprite_cache.move_to_end(key)
+            return _bg_sprite_cache[key]
+    bg_data = safe_get_data(bg_img, ensure_finite=True).astype(float)
+    bg_mask, bg_cmap = _get_bg_mask_and_cmap(bg_img, black_bg)
+    bg_sprite = BytesIO()
+    _save_sprite(bg_data, bg_sprite, bg_max, bg_min, bg_mask, bg_cmap, "png")
+    bg_base64 = _bytesIO_to_base64(bg_sprite)
+    with _bg_sprite_cache_lock:
+        _bg_sprite_cache[key] = bg_base64
+        while len(_bg_sprite_cache) > _BG_SPRITE_CACHE_SIZE:
+            _bg_sprite_cache.popitem(last=False)
+    return bg_base64
+
+
 def _json_view_data(
     bg_img,
     stat_map_img,
@@ -379,11 +479,9 @@ def _json_view_data(
     )
 
     # Create a base64 sprite for the background
-    bg_sprite = BytesIO()
-    bg_data = safe_get_data(bg_img, ensure_finite=True).astype(float)
-    bg_mask, bg_cmap = _get_bg_mask_and_cmap(bg_img, black_bg)
-    _save_sprite(bg_data, bg_sprite, bg_max, bg_min, bg_mask, bg_cmap, "png")
-    json_view["bg_base64"] = _bytesIO_to_base64(bg_sprite)
+    json_view["bg_base64"] = _bg_sprite_base64(
+        bg_img, bg_min, bg_max, black_bg
+    )
 
     # Create a base64 sprite for the stat map
     stat_map_sprite = BytesIO()
@@ -1,5 +1,6 @@
 import base64
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 import numpy as np
@@ -132,6 +133,95 @@ def test_save_sprite(rng):
     assert np.allclose(img, cmapped, atol=0.1)
 
 
+@pytest.mark.parametrize("cmap", ["Greys", "cold_hot", "tab10"])
+@pytest.mark.parametrize("vmin, vmax", [(-1, 1), (-0.5, 0.5), (0, 0)])
+@pytest.mark.parametrize("shape", [(7, 5, 4), (20, 15, 10)])
+def test_save_sprite_matches_imsave(rng, cmap, vmin, vmax, shape):
+    """Check the colors of sprites with a palette or with RGBA pixels."""
+    data = rng.standard_normal(shape)
+    mask = np.abs(data) < 0.3
+    for mask in [None, mask]:
+        sprite_io = BytesIO()
+        sprite = html_stat_map._save_sprite(
+            data, sprite_io, vmax, vmin, mask=mask, cmap=cmap
+        )
+        expected_io = BytesIO()
+        plt.imsave(
+            expected_io, sprite, vmin=vmin, vmax=vmax, cmap=cmap, format="png"
+        )
+        sprite_io.seek(0)
+        expected_io.seek(0)
+        assert np.array_equal(
+            plt.imread(sprite_io, format="png"),
+            plt.imread(expected_io, format="png"),
+        )
+
+
+def test_bg_sprite_cache(monkeypatch):
+    bg_img, _ = _simulate_img()
+    html_stat_map._bg_sprite_cache.clear()
+    bg_base64 = html_stat_map._bg_sprite_base64(bg_img, 0, 1, False)
+
+    n_sprites = []
+    n_masks = []
+    get_bg_mask_and_cmap = html_stat_map._get_bg_mask_and_cmap
+
+    def _save_sprite(*args, **kwargs):
+        n_sprites.append(1)
+
+    def _get_bg_mask_and_cmap(*args, **kwargs):
+        n_masks.append(1)
+        return get_bg_mask_and_cmap(*args, **kwargs)
+
+    monkeypatch.setattr(html_stat_map, "_save_sprite", _save_sprite)
+    monkeypatch.setattr(
+        html_stat_map, "_get_bg_mask_and_cmap", _get_bg_mask_and_cmap
+    )
+    assert html_stat_map._bg_sprite_base64(bg_img, 0, 1, False) == bg_base64
+    # cache hits do not prepare the sprite inputs
+    assert not n_sprites
+    assert not n_masks
+    html_stat_map._bg_sprite_base64(bg_img, 0, 1, True)
+    assert len(n_sprites) == 1
+    assert len(n_masks) == 1
+    for _ in range(html_stat_map._BG_SPRITE_CACHE_SIZE):
+        html_stat_map._bg_sprite_base64(
+            new_img_like(bg_img, get_data(bg_img) + len(n_sprites)),
+            0,
+            1,
+            False,
+        )
+    assert (
+        len(html_stat_map._bg_sprite_cache)
+        == html_stat_map._BG_SPRITE_CACHE_SIZE
+    )
+
+
+def test_bg_sprite_cache_threads():
+    bg_img, _ = _simulate_img()
+    bg_imgs = [
+        new_img_like(bg_img, get_data(bg_img) + i)
+        for i in range(2 * html_stat_map._BG_SPRITE_CACHE_SIZE)
+    ]
+    html_stat_map._bg_sprite_cache.clear()
+    expected = [
+        html_stat_map._bg_sprite_base64(img, 0, 1, False) for img in bg_imgs
+    ]
+    html_stat_map._bg_sprite_cache.clear()
+    with ThreadPoolExecutor(4) as executor:
+        sprites = list(
+            executor.map(
+                lambda img: html_stat_map._bg_sprite_base64(img, 0, 1, False),
+                bg_imgs * 3,
+            )
+        )
+    assert sprites == expected * 3
+    assert (
+        len(html_stat_map._bg_sprite_cache)
+        == html_stat_map._BG_SPRITE_CACHE_SIZE
+    )
+
+
 @pytest.mark.parametrize("cmap", ["tab10", "cold_hot"])
 @pytest.mark.parametrize("n_colors", [7, 20])
 def test_save_cmap(cmap, n_colors):
@@ -8,7 +8,8 @@ or as weights in one image per region (maps).
 import warnings
 
 import numpy as np
-from scipy import linalg, ndimage
+from scipy import linalg, sparse
+from sklearn.utils import gen_batches
 
 from .. import _utils, masking
 from .._utils.niimg import safe_get_data
@@ -16,6 +17,10 @@ from ..image import new_img_like
 
 INF = 1000 * np.finfo(np.float32).eps
 
+# Maximum number of values of the blocks of signals reduced at once by
+# img_to_signals_labels.
+_LABELS_BLOCK_SIZE = 2**22
+
 
 def _check_shape_compatibility(img1, img2, dim=None):
     """Check that shapes match for dimensions going from 0 to dim-1.
@@ -236,6 +241,122 @@ def _check_reduction_strategy(strategy: str):
         )
 
 
+def _labels_index(labels_data, labels, order="F"):
+    """Return the position in labels of the label of each voxel.
+
+    Parameters
+    ----------
+    labels_data : :class:`numpy.ndarray`
+        3D array of labels.
+
+    labels : :obj:`list`
+        Labels to extract, in increasing order.
+
+    order : {"C", "F"}, default="F"
+        Order in which the voxels are flattened.
+
+    Returns
+    -------
+    index : :class:`numpy.ndarray`
+        For each voxel of the flattened labels_data, the position of its
+        label in labels, or ``len(labels)`` if its label is not in labels.
+    """
+    flat_labels = labels_data.ravel(order=order)
+    labels = np.asarray(labels)
+    index = np.searchsorted(labels, flat_labels)
+    in_labels = index < len(labels)
+    in_labels[in_labels] = labels[index[in_labels]] == flat_labels[in_labels]
+    index[~in_labels] = len(labels)
+    return index
+
+
+def _reduce_labels(data, index, n_labels, strategy, signals):
+    """Reduce the voxels of each label with strategy, for all scans.
+
+    The grouping of the voxels by label, given by index,
+    is computed once for all the scans, and blocks of scans are reduced
+    at once.
+
+    Parameters
+    ----------
+    data : :class:`numpy.ndarray`
+        2D array of shape (number of voxels, number of scans).
+
+    index : :class:`numpy.ndarray`
+        Position of the label of each voxel, see :func:`_labels_index`.
+
+    n_labels : :obj:`int`
+        Number of labels.
+
+    strategy : :obj:`str`
+        Name of the reduction, see :func:`img_to_signals_labels`.
+
+    signals : :class:`numpy.ndarray`
+        Array of shape (number of scans, n_labels) in which signals are
+        written. Signals of labels without voxels are zero.
+    """
+    counts = np.bincount(index, minlength=n_labels + 1)[:n_labels]
+    non_empty = counts > 0
+    signals[:] = 0
+    n_scans = max(1, _LABELS_BLOCK_SIZE // max(1, len(index)))
+
+    if strategy in ("sum", "mean", "variance", "standard_deviation"):
+        # Sums over the voxels of each label are computed for a block of
+        # scans with a single product by a sparse indicator matrix,
+        # accumulated in float64.
+        in_labels = np.flatnonzero(index < n_labels)
+        indicator = sparse.csc_matrix(
+            (np.ones(len(in_labels)), (index[in_labels], in_labels)),
+            shape=(n_labels, len(index)),
+        )
+        for batch in gen_batches(data.shape[1], n_scans):
+            scans = np.asarray(data[:, batch], dtype=np.float64, order="C")
+            sums = indicator.dot(scans)
+            if strategy == "sum":
+                signals[batch] = sums.T
+                continue
+            means = sums / np.maximum(counts, 1)[:, np.newaxis]
+            if strategy == "mean":
+                signals[batch] = means.T
+                continue
+            residuals = np.vstack([means, np.zeros(means.shape[1])]).take(
+                index, axis=0
+            )
+            np.subtract(scans, residuals, out=residuals)
+            residuals **= 2
+            variances = (
+                indicator.dot(residuals)[non_empty]
+                / counts[non_empty, np.newaxis]
+            )
+            if strategy == "standard_deviation":
+                np.sqrt(variances, out=variances)
+            signals[batch, non_empty] = variances.T
+        return signals
+
+    if not non_empty.any():
+        return signals
+
+    # The voxels of each label are gathered in contiguous segments,
+    # by blocks of scans to limit memory usage.
+    voxels = np.argsort(index, kind="stable")[: counts.sum()]
+    starts = np.cumsum(counts)[non_empty] - counts[non_empty]
+    for batch in gen_batches(data.shape[1], n_scans):
+        series = data.T[batch].take(voxels, axis=1)
+        if strategy == "median":
+            reduced = np.stack(
+                [
+                    np.median(series[:, start : start + count], axis=1)
+                    for start, count in zip(starts, counts[non_empty])
+                ],
+                axis=1,
+            )
+        else:
+            ufunc = np.minimum if strategy == "minimum" else np.maximum
+            reduced = ufunc.reduceat(series, starts, axis=1)
+        signals[batch, non_empty] = reduced
+    return signals
+
+
 # FIXME: naming scheme is not really satisfying. Any better idea appreciated.
 @_utils.fill_doc
 def img_to_signals_labels(
@@ -323,17 +444,14 @@ def img_to_signals_labels(
     signals = np.ndarray(
         (data.shape[-1], len(labels)), order=order, dtype=target_datatype
     )
-    reduction_function = getattr(ndimage, strategy)
-    for n, img in enumerate(np.rollaxis(data, -1)):
-        signals[n] = np.asarray(
-            reduction_function(img, labels=labels_data, index=labels)
-        )
-    # Set to zero signals for missing labels. Workaround for Scipy behaviour
-    if keep_masked_labels:
-        missing_labels = set(labels) - set(np.unique(labels_data))
-        labels_index = {l: n for n, l in enumerate(labels)}
-        for this_label in missing_labels:
-            signals[:, labels_index[this_label]] = 0
+    if not labels:
+        return signals, labels
+
+    # The voxels of each region are grouped once for all the scans.
+    data_order = "C" if data.flags.c_contiguous else "F"
+    data = data.reshape((-1, data.shape[-1]), order=data_order)
+    index = _labels_index(labels_data, labels, order=data_order)
+    _reduce_labels(data, index, len(labels), strategy, signals)
     return signals, labels
 
 
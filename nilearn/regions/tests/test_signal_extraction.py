@@ -7,6 +7,7 @@ import numpy as np
 import pytest
 from nibabel import Nifti1Image
 from numpy.testing import assert_almost_equal, assert_equal
+from scipy import ndimage
 
 from nilearn._utils.data_gen import (
     generate_fake_fmri,
@@ -19,6 +20,7 @@ from nilearn._utils.testing import write_imgs_to_path
 from nilearn.conftest import _affine_eye, _shape_3d_default
 from nilearn.image import get_data, new_img_like
 from nilearn.maskers import NiftiLabelsMasker
+from nilearn.regions import signal_extraction
 from nilearn.regions.signal_extraction import (
     _check_shape_and_affine_compatibility,
     _trim_maps,
@@ -630,6 +632,58 @@ def test_signal_extraction_nans_in_regions_are_replaced_with_zeros():
     assert np.all(labels_signals[:, labels_labels.index(2)] == 0.0)
 
 
+@pytest.mark.parametrize(
+    "strategy",
+    [
+        "mean",
+        "median",
+        "sum",
+        "minimum",
+        "maximum",
+        "standard_deviation",
+        "variance",
+    ],
+)
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_img_to_signals_labels_strategies(
+    monkeypatch, affine_eye, rng, strategy, order
+):
+    """All the scans are reduced at once as by scipy.ndimage."""
+    shape = (6, 7, 8)
+    labels_data = rng.randint(0, 6, size=shape).astype("int16")
+    data = np.asarray(
+        rng.standard_normal(size=shape + (N_TIMEPOINTS,)), order=order
+    )
+    mask_data = (labels_data != 3).astype("int8")
+    # a few scans are reduced at once
+    monkeypatch.setattr(
+        signal_extraction, "_LABELS_BLOCK_SIZE", labels_data.size * 3
+    )
+
+    with pytest.warns(DeprecationWarning, match="keep_masked_labels"):
+        signals, labels = img_to_signals_labels(
+            Nifti1Image(data, affine_eye),
+            Nifti1Image(labels_data, affine_eye),
+            mask_img=Nifti1Image(mask_data, affine_eye),
+            strategy=strategy,
+        )
+
+    assert labels == [1, 2, 3, 4, 5]
+    masked_labels_data = np.where(mask_data, labels_data, 0)
+    reduction_function = getattr(ndimage, strategy)
+    for n, label in enumerate(labels):
+        # signals of regions outside the mask are zero
+        expected = 0
+        if label != 3:
+            expected = [
+                reduction_function(
+                    scan, labels=masked_labels_data, index=label
+                )
+                for scan in np.rollaxis(data, -1)
+            ]
+        assert_almost_equal(signals[:, n], expected)
+
+
 def test_trim_maps(shape_3d_default):
     # maps
     maps_data = np.zeros(shape_3d_default + (N_REGIONS,), dtype=np.float32)
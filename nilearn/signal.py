@@ -6,13 +6,14 @@ features
 """
 # Authors: Alexandre Abraham, Gael Varoquaux, Philippe Gervais
 
+import functools
 import warnings
 
 import numpy as np
 import pandas as pd
 from scipy import linalg, signal as sp_signal
 from scipy.interpolate import CubicSpline
-from sklearn.utils import as_float_array, gen_even_slices
+from sklearn.utils import as_float_array, gen_batches, gen_even_slices
 
 from nilearn._utils import fill_doc, stringify_path
 from nilearn._utils.numpy_conversions import as_ndarray, csv_to_array
@@ -20,6 +21,13 @@ from nilearn._utils.param_validation import check_run_sample_masks
 
 availiable_filters = ["butterworth", "cosine"]
 
+# Maximum number of values of the blocks of signals cleaned at once by clean.
+_CLEAN_BLOCK_SIZE = 2**20
+
+# Signals with at most this number of samples are filtered with a matrix
+# product, which is faster than recursive filtering for short runs.
+_FILTER_MATRIX_MAX_SAMPLES = 64
+
 
 def _standardize(signals, detrend=False, standardize="zscore"):
     """Center and standardize a given signal (time is along first axis).
@@ -53,70 +61,102 @@ def _standardize(signals, detrend=False, standardize="zscore"):
     std_signals : :class:`numpy.ndarray`
         Copy of signals, standardized.
     """
+    apply_standardize = _check_standardize(signals.shape[0], standardize)
+
+    signals = _detrend(signals, inplace=False) if detrend else signals.copy()
+
+    if apply_standardize:
+        signals, invalid_ix = _standardize_signals(
+            signals, standardize=standardize, centered=detrend
+        )
+        _warn_invalid_psc(invalid_ix)
+
+    return signals
+
+
+def _check_standardize(n_samples, standardize):
+    """Check a standardize strategy and tell if it should be applied."""
     if standardize not in [True, False, "psc", "zscore", "zscore_sample"]:
         raise ValueError(f"{standardize} is no valid standardize strategy.")
 
-    signals = _detrend(signals, inplace=False) if detrend else signals.copy()
+    if not standardize:
+        return False
 
-    if standardize:
-        if signals.shape[0] == 1:
-            warnings.warn(
-                "Standardization of 3D signal has been requested but "
-                "would lead to zero values. Skipping."
-            )
-            return signals
-
-        elif standardize == "zscore_sample":
-            if not detrend:
-                # remove mean if not already detrended
-                signals = signals - signals.mean(axis=0)
-
-            std = signals.std(axis=0, ddof=1)
-            # avoid numerical problems
-            std[std < np.finfo(np.float64).eps] = 1.0
-            signals /= std
-
-        elif (standardize == "zscore") or (standardize is True):
-            std_strategy_default = (
-                "The default strategy for standardize is currently 'zscore' "
-                "which incorrectly uses population std to calculate sample "
-                "zscores. The new strategy 'zscore_sample' corrects this "
-                "behavior by using the sample std. In release 0.13, the "
-                "default strategy will be replaced by the new strategy and "
-                "the 'zscore' option will be removed. Please use "
-                "'zscore_sample' instead."
-            )
-            warnings.warn(
-                category=DeprecationWarning,
-                message=std_strategy_default,
-                stacklevel=3,
-            )
+    if n_samples == 1:
+        warnings.warn(
+            "Standardization of 3D signal has been requested but "
+            "would lead to zero values. Skipping."
+        )
+        return False
 
-            if not detrend:
-                # remove mean if not already detrended
-                signals = signals - signals.mean(axis=0)
+    if (standardize == "zscore") or (standardize is True):
+        std_strategy_default = (
+            "The default strategy for standardize is currently 'zscore' "
+            "which incorrectly uses population std to calculate sample "
+            "zscores. The new strategy 'zscore_sample' corrects this "
+            "behavior by using the sample std. In release 0.13, the "
+            "default strategy will be replaced by the new strategy and "
+            "the 'zscore' option will be removed. Please use "
+            "'zscore_sample' instead."
+        )
+        warnings.warn(
+            category=DeprecationWarning,
+            message=std_strategy_default,
+            stacklevel=4,
+        )
+    return True
 
-            std = signals.std(axis=0)
-            # avoid numerical problems
-            std[std < np.finfo(np.float64).eps] = 1.0
 
-            signals /= std
+def _standardize_signals(signals, standardize, centered=False):
+    """Standardize signals, without checking parameters.
 
-        elif standardize == "psc":
-            mean_signal = signals.mean(axis=0)
-            invalid_ix = np.absolute(mean_signal) < np.finfo(np.float64).eps
-            signals = (signals - mean_signal) / np.absolute(mean_signal)
-            signals *= 100
+    Parameters
+    ----------
+    signals : :class:`numpy.ndarray`
+        Timeseries to standardize. Modified inplace if possible.
 
-            if np.any(invalid_ix):
-                warnings.warn(
-                    "psc standardization strategy is meaningless "
-                    "for features that have a mean of 0. "
-                    "These time series are set to 0."
-                )
-                signals[:, invalid_ix] = 0
+    standardize : {'zscore_sample', 'zscore', 'psc', True}
+        Strategy to standardize the signal, see :func:`_standardize`.
 
-    return signals
+    centered : :obj:`bool`, default=False
+        Whether signals already have a zero mean.
+
+    Returns
+    -------
+    std_signals : :class:`numpy.ndarray`
+        Standardized signals.
+
+    invalid_ix : :class:`numpy.ndarray` or None
+        Signals with a zero mean, set to 0 by the 'psc' strategy.
+    """
+    if standardize == "psc":
+        mean_signal = signals.mean(axis=0)
+        invalid_ix = np.absolute(mean_signal) < np.finfo(np.float64).eps
+        signals = (signals - mean_signal) / np.absolute(mean_signal)
+        signals *= 100
+        signals[:, invalid_ix] = 0
+        return signals, invalid_ix
+
+    if not centered:
+        # remove mean if not already detrended
+        signals = signals - signals.mean(axis=0)
+
+    ddof = 1 if standardize == "zscore_sample" else 0
+    std = signals.std(axis=0, ddof=ddof)
+    # avoid numerical problems
+    std[std < np.finfo(np.float64).eps] = 1.0
+    signals /= std
+    return signals, None
+
+
+def _warn_invalid_psc(invalid_ix):
+    """Warn if some signals could not be scaled to percent signal change."""
+    if invalid_ix is not None and np.any(invalid_ix):
+        warnings.warn(
+            "psc standardization strategy is meaningless "
+            "for features that have a mean of 0. "
+            "These time series are set to 0."
+        )
 
 
 def _mean_of_squares(signals, n_batches=20):
@@ -309,60 +349,30 @@ def _check_wn(btype, freq, nyq):
     return freq
 
 
-@fill_doc
-def butterworth(
-    signals,
-    sampling_rate,
-    low_pass=None,
-    high_pass=None,
-    order=5,
-    padtype="odd",
-    padlen=None,
-    copy=False,
-):
-    """Apply a low-pass, high-pass or band-pass \
-    `Butterworth filter <https://en.wikipedia.org/wiki/Butterworth_filter>`_.
-
-    Apply a filter to remove signal below the `low` frequency and above the
-    `high` frequency.
+def _butterworth_design(sampling_rate, low_pass=None, high_pass=None, order=5):
+    """Check the parameters of the Butterworth filter used by \
+    :func:`butterworth`.
 
     Parameters
     ----------
-    signals : :class:`numpy.ndarray` (1D sequence or n_samples x n_sources)
-        Signals to be filtered. A signal is assumed to be a column
-        of `signals`.
-
     sampling_rate : :obj:`float`
         Number of samples per second (sample frequency, in Hertz).
-    %(low_pass)s
-    %(high_pass)s
-    order : :obj:`int`, default=5
-        Order of the `Butterworth filter
-        <https://en.wikipedia.org/wiki/Butterworth_filter>`_.
-        When filtering signals, the filter has a decay to avoid ringing.
-        Increasing the order sharpens this decay. Be aware that very high
-        orders can lead to numerical instability.
 
-    padtype : {"odd", "even", "constant", None}, optional
-        Type of padding to use for the Butterworth filter.
-        For more information about this, see :func:`scipy.signal.filtfilt`.
-
-    padlen : :obj:`int` or None, optional
-        The size of the padding to add to the beginning and end of ``signals``.
-        If None, the default value from :func:`scipy.signal.filtfilt` will be
-        used.
+    low_pass, high_pass : :obj:`float` or None, default=None
+        Cutoff frequencies, in Hertz.
 
-    copy : :obj:`bool`, optional
-        If False, `signals` is modified inplace, and memory consumption is
-        lower than for ``copy=True``, though computation time is higher.
+    order : :obj:`int`, default=5
+        Order of the filter.
 
     Returns
     -------
-    filtered_signals : :class:`numpy.ndarray`
-        Signals filtered according to the given parameters.
+    design : :obj:`tuple` or None
+        Order, critical frequencies, type and sampling rate of the filter,
+        usable as a key to cache the filter,
+        or None if signals must be returned unfiltered.
     """
     if low_pass is None and high_pass is None:
-        return signals.copy() if copy else signals
+        return None
 
     if (
         low_pass is not None
@@ -399,54 +409,170 @@ def butterworth(
                 "frequencies are equal. Please check that inputs for "
                 "sampling_rate, low_pass, and high_pass are valid."
             )
-            return signals.copy() if copy else signals
+            return None
+        critical_freq = tuple(float(freq) for freq in critical_freq)
     else:
-        critical_freq = critical_freq[0]
+        critical_freq = float(critical_freq[0])
+
+    return int(order), critical_freq, btype, float(sampling_rate)
+
 
-    b, a = sp_signal.butter(
+@functools.lru_cache(maxsize=32)
+def _butterworth_sos(order, critical_freq, btype, sampling_rate):
+    """Return the second-order sections of a Butterworth filter.
+
+    Maskers clean many subjects with the same filter,
+    so the filter is only designed once per process.
+    """
+    return sp_signal.butter(
         order,
         critical_freq,
         btype=btype,
-        output="ba",
+        output="sos",
         fs=sampling_rate,
     )
-    if signals.ndim == 1:
-        # 1D case
-        output = sp_signal.filtfilt(
-            b,
-            a,
-            signals,
-            padtype=padtype,
-            padlen=padlen,
-        )
-        if copy:  # filtfilt does a copy in all cases.
-            signals = output
-        else:
-            signals[...] = output
-    elif copy:
-        # No way to save memory when a copy has been requested,
-        # because filtfilt does out-of-place processing
-        signals = sp_signal.filtfilt(
-            b,
-            a,
+
+
+@functools.lru_cache(maxsize=32)
+def _butterworth_operator(design, n_samples, padtype, padlen):
+    """Return the matrix applying the forward-backward filter \
+    to signals of n_samples samples.
+
+    Forward-backward filtering, including the padding and the initial
+    conditions, is linear: its matrix is the filtered identity.
+    """
+    operator = sp_signal.sosfiltfilt(
+        _butterworth_sos(*design),
+        np.eye(n_samples),
+        axis=0,
+        padtype=padtype,
+        padlen=padlen,
+    )
+    operator.setflags(write=False)
+    return operator
+
+
+def _butterworth_filter(signals, design, padtype="odd", padlen=None):
+    """Apply the Butterworth filter described by design \
+    forward and backward to signals.
+
+    The filter is applied as second-order sections,
+    which are numerically more stable than its transfer function.
+    Signals with at most ``_FILTER_MATRIX_MAX_SAMPLES`` samples are filtered
+    with a single matrix product.
+
+    Returns
+    -------
+    filtered_signals : :class:`numpy.ndarray`
+        Filtered signals, in float64.
+    """
+    if padlen is None:
+        # default of scipy.signal.filtfilt, which was used before:
+        # three times the number of coefficients of the transfer function
+        order, _, btype, _ = design
+        padlen = 3 * (2 * order + 1 if btype == "band" else order + 1)
+
+    n_samples = signals.shape[0]
+    try:
+        if signals.ndim == 2 and n_samples <= _FILTER_MATRIX_MAX_SAMPLES:
+            operator = _butterworth_operator(
+                design, n_samples, padtype, padlen
+            )
+            return operator.dot(signals)
+
+        return sp_signal.sosfiltfilt(
+            _butterworth_sos(*design),
             signals,
             axis=0,
             padtype=padtype,
             padlen=padlen,
         )
-    else:
-        # Lesser memory consumption, slower.
-        for timeseries in signals.T:
-            timeseries[:] = sp_signal.filtfilt(
-                b,
-                a,
-                timeseries,
-                padtype=padtype,
-                padlen=padlen,
-            )
+    except np.linalg.LinAlgError:
+        # The initial conditions of a section with a pole at 1,
+        # when a cutoff frequency was set to eps, cannot be computed.
+        order, critical_freq, btype, sampling_rate = design
+        b, a = sp_signal.butter(
+            order, critical_freq, btype=btype, fs=sampling_rate
+        )
+        return sp_signal.filtfilt(
+            b, a, signals, axis=0, padtype=padtype, padlen=padlen
+        )
 
-        # results returned in-place
 
+@fill_doc
+def butterworth(
+    signals,
+    sampling_rate,
+    low_pass=None,
+    high_pass=None,
+    order=5,
+    padtype="odd",
+    padlen=None,
+    copy=False,
+):
+    """Apply a low-pass, high-pass or band-pass \
+    `Butterworth filter <https://en.wikipedia.org/wiki/Butterworth_filter>`_.
+
+    Apply a filter to remove signal below the `low` frequency and above the
+    `high` frequency.
+
+    Parameters
+    ----------
+    signals : :class:`numpy.ndarray` (1D sequence or n_samples x n_sources)
+        Signals to be filtered. A signal is assumed to be a column
+        of `signals`.
+
+    sampling_rate : :obj:`float`
+        Number of samples per second (sample frequency, in Hertz).
+    %(low_pass)s
+    %(high_pass)s
+    order : :obj:`int`, default=5
+        Order of the `Butterworth filter
+        <https://en.wikipedia.org/wiki/Butterworth_filter>`_.
+        When filtering signals, the filter has a decay to avoid ringing.
+        Increasing the order sharpens this decay. Be aware that very high
+        orders can lead to numerical instability.
+
+    padtype : {"odd", "even", "constant", None}, optional
+        Type of padding to use for the Butterworth filter.
+        For more information about this, see :func:`scipy.signal.filtfilt`.
+
+    padlen : :obj:`int` or None, optional
+        The size of the padding to add to the beginning and end of ``signals``.
+        If None, the default value from :func:`scipy.signal.filtfilt` will be
+        used.
+
+    copy : :obj:`bool`, optional
+        If False, `signals` is modified inplace, and memory consumption is
+        lower than for ``copy=True``, though computation time is higher.
+
+    Returns
+    -------
+    filtered_signals : :class:`numpy.ndarray`
+        Signals filtered according to the given parameters.
+    """
+    design = _butterworth_design(
+        sampling_rate, low_pass=low_pass, high_pass=high_pass, order=order
+    )
+    if design is None:
+        return signals.copy() if copy else signals
+
+    if copy or signals.ndim == 1:
+        output = _butterworth_filter(
+            signals, design, padtype=padtype, padlen=padlen
+        )
+        if copy:
+            return output
+        signals[...] = output
+        return signals
+
+    # Lesser memory consumption: signals are filtered by blocks,
+    # results returned in-place
+    batch_size = max(1, _CLEAN_BLOCK_SIZE // max(1, signals.shape[0]))
+    for batch in gen_batches(signals.shape[1], batch_size):
+        signals[:, batch] = _butterworth_filter(
+            signals[:, batch], design, padtype=padtype, padlen=padlen
+        )
     return signals
 
 
@@ -729,81 +855,185 @@ def clean(
         )
 
     # Interpolation / censoring
+    if sample_mask is not None and filter_type == "butterworth":
+        # censored volumes are interpolated inplace
+        signals = signals.copy()
     signals, confounds, sample_mask = _handle_scrubbed_volumes(
         signals, confounds, sample_mask, filter_type, t_r, extrapolate
     )
-    # Detrend
+    butterworth_kwargs = {
+        k.replace("butterworth__", ""): v
+        for k, v in kwargs.items()
+        if k.startswith("butterworth__")
+    }
+
     # Detrend and filtering should apply to confounds, if confound presents
     # keep filters orthogonal (according to Lindquist et al. (2018))
+    confounds_basis = _confounds_basis(
+        confounds,
+        detrend,
+        standardize_confounds,
+        filter_type,
+        low_pass,
+        high_pass,
+        t_r,
+        sample_mask,
+        butterworth_kwargs,
+    )
+
     # Restrict the signal to the orthogonal of the confounds
+    return _clean_signals_by_blocks(
+        signals,
+        confounds_basis,
+        detrend,
+        standardize,
+        filter_type,
+        low_pass,
+        high_pass,
+        t_r,
+        sample_mask,
+        butterworth_kwargs,
+    )
+
+
+def _confounds_basis(
+    confounds,
+    detrend,
+    standardize_confounds,
+    filter_type,
+    low_pass,
+    high_pass,
+    t_r,
+    sample_mask,
+    butterworth_kwargs,
+):
+    """Detrend and filter confounds as signals, and orthonormalize them.
+
+    Returns
+    -------
+    confounds_basis : :class:`numpy.ndarray` or None
+        Orthonormal basis of the space spanned by the confounds,
+        or None if there are no confounds.
+    """
+    if confounds is None:
+        return None
+
     if detrend:
-        mean_signals = signals.mean(axis=0)
-        signals = _standardize(signals, standardize=False, detrend=detrend)
-        if confounds is not None:
-            confounds = _standardize(
-                confounds, standardize=False, detrend=detrend
-            )
+        confounds = _standardize(confounds, standardize=False, detrend=detrend)
 
-    # Butterworth filtering
     if filter_type == "butterworth":
-        butterworth_kwargs = {
-            k.replace("butterworth__", ""): v
-            for k, v in kwargs.items()
-            if k.startswith("butterworth__")
-        }
-        signals = butterworth(
-            signals,
+        # Apply low- and high-pass filters to keep filters orthogonal
+        # (according to Lindquist et al. (2018))
+        confounds = butterworth(
+            confounds,
             sampling_rate=1.0 / t_r,
             low_pass=low_pass,
             high_pass=high_pass,
             **butterworth_kwargs,
         )
-        if confounds is not None:
-            # Apply low- and high-pass filters to keep filters orthogonal
-            # (according to Lindquist et al. (2018))
-            confounds = butterworth(
-                confounds,
-                sampling_rate=1.0 / t_r,
-                low_pass=low_pass,
-                high_pass=high_pass,
-                **butterworth_kwargs,
-            )
-
-        # apply sample_mask to remove censored volumes after signal filtering
+        # apply sample_mask to remove censored volumes after filtering
         if sample_mask is not None:
-            signals, confounds = _censor_signals(
-                signals, confounds, sample_mask
-            )
+            confounds = confounds[sample_mask, :]
 
-    # Remove confounds
-    if confounds is not None:
-        confounds = _standardize(
-            confounds, standardize=standardize_confounds, detrend=False
-        )
-        if not standardize_confounds:
-            # Improve numerical stability by controlling the range of
-            # confounds. We don't rely on _standardize as it removes any
-            # constant contribution to confounds.
-            confound_max = np.max(np.abs(confounds), axis=0)
-            confound_max[confound_max == 0] = 1
-            confounds /= confound_max
-
-        # Pivoting in qr decomposition was added in scipy 0.10
-        Q, R, _ = linalg.qr(confounds, mode="economic", pivoting=True)
-        Q = Q[:, np.abs(np.diag(R)) > np.finfo(np.float64).eps * 100.0]
-        signals -= Q.dot(Q.T).dot(signals)
-
-    # Standardize
-    if detrend and (standardize == "psc"):
-        # If the signal is detrended, we have to know the original mean
-        # signal to calculate the psc.
-        signals = _standardize(
-            signals + mean_signals, standardize=standardize, detrend=False
+    confounds = _standardize(
+        confounds, standardize=standardize_confounds, detrend=False
+    )
+    if not standardize_confounds:
+        # Improve numerical stability by controlling the range of
+        # confounds. We don't rely on _standardize as it removes any
+        # constant contribution to confounds.
+        confound_max = np.max(np.abs(confounds), axis=0)
+        confound_max[confound_max == 0] = 1
+        confounds /= confound_max
+
+    # Pivoting in qr decomposition was added in scipy 0.10
+    Q, R, _ = linalg.qr(confounds, mode="economic", pivoting=True)
+    return Q[:, np.abs(np.diag(R)) > np.finfo(np.float64).eps * 100.0]
+
+
+def _clean_signals_by_blocks(
+    signals,
+    confounds_basis,
+    detrend,
+    standardize,
+    filter_type,
+    low_pass,
+    high_pass,
+    t_r,
+    sample_mask,
+    butterworth_kwargs,
+):
+    """Detrend, filter, remove confounds from and standardize signals.
+
+    All these steps are applied to each signal independently,
+    so they are performed in a single pass over blocks of signals.
+    Only one block is processed at a time, rather than making a copy of all
+    the signals at each step, which limits the memory used in addition to
+    the cleaned signals.
+    The data type of the signals is preserved.
+
+    Returns
+    -------
+    cleaned_signals : :class:`numpy.ndarray`
+        Cleaned signals.
+    """
+    # Checks and warnings that do not depend on the signals are done once
+    filter_design = None
+    filter_kwargs = {}
+    if filter_type == "butterworth":
+        filter_kwargs = butterworth_kwargs.copy()
+        # signals are filtered by blocks, not inplace
+        filter_kwargs.pop("copy", None)
+        filter_design = _butterworth_design(
+            1.0 / t_r,
+            low_pass=low_pass,
+            high_pass=high_pass,
+            order=filter_kwargs.pop("order", 5),
         )
     else:
-        signals = _standardize(signals, standardize=standardize, detrend=False)
+        # volumes have already been censored
+        sample_mask = None
+    n_samples = signals.shape[0] if sample_mask is None else len(sample_mask)
+    apply_standardize = _check_standardize(n_samples, standardize)
+
+    cleaned_signals = np.empty((n_samples, signals.shape[1]), signals.dtype)
+    batch_size = max(1, _CLEAN_BLOCK_SIZE // max(1, signals.shape[0]))
+    invalid_ix = []
+    for batch in gen_batches(signals.shape[1], batch_size):
+        block = signals[:, batch]
+        if detrend:
+            mean_block = block.mean(axis=0)
+            block = _detrend(block, inplace=False)
+        else:
+            block = block.copy()
 
-    return signals
+        if filter_design is not None:
+            block = _butterworth_filter(
+                block, filter_design, **filter_kwargs
+            ).astype(signals.dtype, copy=False)
+
+        if sample_mask is not None:
+            block = block[sample_mask, :]
+
+        if confounds_basis is not None:
+            block -= confounds_basis.dot(confounds_basis.T.dot(block))
+
+        if apply_standardize:
+            if detrend and (standardize == "psc"):
+                # If the signal is detrended, we have to know the original
+                # mean signal to calculate the psc.
+                block += mean_block
+            block, invalid_block_ix = _standardize_signals(
+                block, standardize=standardize, centered=False
+            )
+            invalid_ix.append(invalid_block_ix)
+
+        cleaned_signals[:, batch] = block
+
+    if apply_standardize and standardize == "psc":
+        _warn_invalid_psc(np.concatenate(invalid_ix))
+
+    return cleaned_signals
 
 
 def _handle_scrubbed_volumes(
@@ -1117,12 +1347,14 @@ def _sanitize_signals(signals, ensure_finite):
             "'ensure_finite' must be boolean type True or False "
             f"but you provided ensure_finite={ensure_finite}"
         )
-    signals = signals.copy()
+    # signals are only copied when modified, as cleaning does not modify
+    # them inplace
     if not isinstance(signals, np.ndarray):
         signals = as_ndarray(signals)
     if ensure_finite:
         mask = np.logical_not(np.isfinite(signals))
         if mask.any():
+            signals = signals.copy()
             signals[mask] = 0
     return _ensure_float(signals)
 
@@ -1,17 +1,19 @@
 """Functions for surface manipulation."""
 
 import gzip
+import itertools
 import os
 import warnings
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from collections.abc import Mapping
 
+import joblib
 import nibabel
 import numpy as np
 import sklearn.cluster
 import sklearn.preprocessing
 from nibabel import freesurfer as fs, gifti
-from scipy import interpolate, sparse
+from scipy import sparse
 
 from nilearn import _utils, datasets
 from nilearn._utils import stringify_path
@@ -301,6 +303,210 @@ def _masked_indices(sample_locations, img_shape, mask=None):
     return ~kept
 
 
+def _sparse_dot(matrix, data):
+    """Multiply a sparse matrix with a dense array without copying it."""
+    if data.ndim == 1 or data.flags.c_contiguous:
+        return matrix.dot(data)
+    # scipy would copy the whole array to C order: use its columns instead
+    result = np.empty((matrix.shape[0], data.shape[1]), order='F',
+                      dtype=np.result_type(matrix.dtype, data.dtype))
+    for i, column in enumerate(data.T):
+        result[:, i] = matrix.dot(column)
+    return result
+
+
+_PROJECTION_CACHE_SIZE = 4
+_projection_cache = OrderedDict()
+
+# corners of the voxel cube used for trilinear interpolation
+_CUBE_CORNERS = np.asarray(list(itertools.product((0, 1), repeat=3)))
+
+
+class _ProjectionOperator:
+    """Sparse operator projecting volume data onto mesh vertices.
+
+    Each sample location is expressed as a sparse combination of voxels
+    (the nearest voxel, or the 8 neighbours weighted for trilinear
+    interpolation), and the samples of each vertex are averaged, so that
+    projecting any number of images is a single sparse-dense product.
+    Operators with the same ``key`` are equal, so they can be cached.
+
+    Parameters
+    ----------
+    sample_locations : :obj:`numpy.ndarray`, shape (n_vertices, n_points, 3)
+        The locations, in voxel space, from which to draw samples.
+
+    img_shape : 3-tuple of :obj:`int`
+        The shape of the images to be projected.
+
+    interpolation : {'linear', 'nearest'}, default='nearest'
+        How the image intensity is measured at a sample point.
+
+    mask : :obj:`numpy.ndarray` of shape img_shape or `None`, optional
+        Part of the image to be masked. If `None`, don't apply any mask.
+
+    key : hashable or `None`, optional
+        Identifies the sampling parameters used to build the operator.
+
+    Attributes
+    ----------
+    matrix : :obj:`scipy.sparse.csr_matrix`
+        Shape (n_mesh_vertices, n_voxels). Averages the samples drawn around
+        each vertex.
+
+    empty : :obj:`numpy.ndarray` of :obj:`bool`, shape (n_mesh_vertices,)
+        True for vertices whose samples all fall outside of the image or of
+        the mask.
+
+    """
+
+    def __init__(self, sample_locations, img_shape, interpolation='nearest',
+                 mask=None, key=None):
+        img_shape = tuple(img_shape)
+        n_vertices, n_points, _ = sample_locations.shape
+        locations = sample_locations.reshape((-1, 3))
+        if interpolation == 'nearest':
+            locations = np.asarray(np.round(locations), dtype=int)
+            corners = locations[:, np.newaxis, :]
+            weights = np.ones((len(locations), 1))
+        else:
+            # Same weights as scipy's RegularGridInterpolator, which
+            # extrapolates from the last cell between size - 1 and size.
+            sizes = np.asarray(img_shape)
+            lower = np.clip(np.floor(locations), 0, np.maximum(sizes - 2, 0))
+            offsets = locations - lower
+            offsets[:, sizes == 1] = 0
+            corners = lower.astype(int)[:, np.newaxis, :] + _CUBE_CORNERS
+            weights = np.where(_CUBE_CORNERS, offsets[:, np.newaxis, :],
+                               1 - offsets[:, np.newaxis, :]).prod(axis=2)
+        masked = _masked_indices(locations, img_shape, mask=mask)
+        n_corners = corners.shape[1]
+        kept = np.repeat(~masked, n_corners)
+        columns = np.ravel_multi_index(
+            corners.reshape(-1, 3).T, img_shape, mode='clip')[kept]
+        weights = weights.ravel()[kept]
+        # samples are rows of n_corners voxels, or empty rows if masked
+        indptr = np.zeros(len(locations) + 1, dtype=int)
+        np.cumsum(np.where(masked, 0, n_corners), out=indptr[1:])
+        n_kept = np.diff(indptr[::n_points]) // n_corners
+        self.key = key
+        self.img_shape = img_shape
+        self.interpolation = interpolation
+        self.empty = n_kept == 0
+        vertices = np.repeat(np.arange(n_vertices), n_kept * n_corners)
+        self.matrix = sparse.csr_matrix(
+            (weights, (vertices, columns)),
+            shape=(n_vertices, np.prod(img_shape)))
+        # average the samples of each vertex
+        self.matrix.data /= np.repeat(n_kept, np.diff(self.matrix.indptr))
+        self._n_points = n_points
+        self._masked = masked
+        self._samples = None
+        if interpolation != 'nearest':
+            # kept to average the samples that are not nan
+            self._samples = sparse.csr_matrix(
+                (weights, columns, indptr),
+                shape=(len(locations), np.prod(img_shape)))
+        self._reordered_matrices = {
+            ('matrix', 'C'): self.matrix, ('_samples', 'C'): self._samples}
+
+    def __hash__(self):
+        if self.key is None:
+            return object.__hash__(self)
+        return hash(self.key)
+
+    def __eq__(self, other):
+        if not isinstance(other, _ProjectionOperator):
+            return NotImplemented
+        if self.key is None or other.key is None:
+            return self is other
+        return self.key == other.key
+
+    def _reordered(self, name, order):
+        """Get the matrix attribute name for voxels raveled in order."""
+        if (name, order) not in self._reordered_matrices:
+            matrix = getattr(self, name)
+            indices = np.ravel_multi_index(
+                np.unravel_index(matrix.indices, self.img_shape),
+                self.img_shape, order=order)
+            self._reordered_matrices[name, order] = sparse.csr_matrix(
+                (matrix.data, indices, matrix.indptr), shape=matrix.shape)
+        return self._reordered_matrices[name, order]
+
+    def project(self, data, order='C'):
+        """Project images onto the mesh.
+
+        Parameters
+        ----------
+        data : :obj:`numpy.ndarray`, shape (n_voxels, n_images)
+            The images, with one column per image.
+
+        order : {'C', 'F'}, default='C'
+            The order in which the voxels of each image are raveled.
+
+        Returns
+        -------
+        texture : :obj:`numpy.ndarray`, shape (n_mesh_vertices, n_images)
+            The projection of each image; ``numpy.nan`` for empty vertices.
+
+        """
+        texture = _sparse_dot(self._reordered('matrix', order), data)
+        # if all samples around a mesh vertex are outside the image,
+        # there is no reasonable value to assign to this vertex.
+        # in this case we return NaN for this vertex.
+        texture[self.empty] = np.nan
+        if (self._samples is not None
+                and np.isnan(texture[~self.empty]).any()):
+            # interpolated samples which are nan are ignored
+            samples = _sparse_dot(self._reordered('_samples', order), data)
+            samples[self._masked] = np.nan
+            samples = samples.reshape((len(texture), self._n_points, -1))
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                texture = np.nanmean(samples, axis=1)
+        return texture
+
+
+def _projection_operator(mesh, affine, img_shape, interpolation='nearest',
+                         kind='auto', radius=3., n_points=None, mask=None,
+                         inner_mesh=None, depth=None):
+    """Get a projection operator, reusing it if it was recently built.
+
+    Operators are cached in memory according to the mesh, the affine, the
+    image shape and the sampling parameters, so that projecting several
+    images with the same geometry does not rebuild them.
+    See documentation of vol_to_surf for details on the parameters.
+
+    Returns
+    -------
+    operator : :class:`_ProjectionOperator`
+
+    """
+    mesh = load_surf_mesh(mesh)
+    if inner_mesh is not None:
+        inner_mesh = load_surf_mesh(inner_mesh)
+    # the hash of an array depends on its memory layout
+    arrays = [*mesh, affine, img_shape, mask, depth,
+              *(inner_mesh or (None, None))]
+    key = joblib.hash((
+        [None if array is None else np.ascontiguousarray(array)
+         for array in arrays],
+        interpolation, _choose_kind(kind, inner_mesh), float(radius),
+        n_points))
+    operator = _projection_cache.pop(key, None)
+    if operator is None:
+        sample_locations = _sample_locations(
+            mesh, affine, kind=kind, radius=radius, n_points=n_points,
+            inner_mesh=inner_mesh, depth=depth)
+        operator = _ProjectionOperator(
+            sample_locations, img_shape, interpolation=interpolation,
+            mask=mask, key=key)
+    _projection_cache[key] = operator
+    while len(_projection_cache) > _PROJECTION_CACHE_SIZE:
+        _projection_cache.popitem(last=False)
+    return operator
+
+
 def _projection_matrix(mesh, affine, img_shape, kind='auto', radius=3.,
                        n_points=None, mask=None, inner_mesh=None, depth=None):
     """Get a sparse matrix that projects volume data onto a mesh.
@@ -386,22 +592,9 @@ def _projection_matrix(mesh, affine, img_shape, kind='auto', radius=3.,
     sample_locations = _sample_locations(
         mesh, affine, kind=kind, radius=radius, n_points=n_points,
         inner_mesh=inner_mesh, depth=depth)
-    sample_locations = np.asarray(np.round(sample_locations), dtype=int)
-    n_vertices, n_points, _ = sample_locations.shape
-    masked = _masked_indices(np.vstack(sample_locations), img_shape, mask=mask)
-    sample_locations = np.rollaxis(sample_locations, -1)
-    sample_indices = np.ravel_multi_index(
-        sample_locations, img_shape, mode='clip').ravel()
-    row_indices, _ = np.mgrid[:n_vertices, :n_points]
-    row_indices = row_indices.ravel()
-    row_indices = row_indices[~masked]
-    sample_indices = sample_indices[~masked]
-    weights = np.ones(len(row_indices))
-    proj = sparse.csr_matrix(
-        (weights, (row_indices, sample_indices.ravel())),
-        shape=(n_vertices, np.prod(img_shape)))
-    proj = sklearn.preprocessing.normalize(proj, axis=1, norm='l1')
-    return proj
+    return _ProjectionOperator(
+        sample_locations, img_shape, interpolation='nearest',
+        mask=mask).matrix
 
 
 def _nearest_voxel_sampling(images, mesh, affine, kind='auto', radius=3.,
@@ -415,16 +608,12 @@ def _nearest_voxel_sampling(images, mesh, affine, kind='auto', radius=3.,
     See documentation of vol_to_surf for details.
 
     """
-    proj = _projection_matrix(
-        mesh, affine, images[0].shape, kind=kind, radius=radius,
-        n_points=n_points, mask=mask, inner_mesh=inner_mesh, depth=depth)
+    operator = _projection_operator(
+        mesh, affine, images[0].shape, interpolation='nearest', kind=kind,
+        radius=radius, n_points=n_points, mask=mask, inner_mesh=inner_mesh,
+        depth=depth)
     data = np.asarray(images).reshape(len(images), -1).T
-    texture = proj.dot(data)
-    # if all samples around a mesh vertex are outside the image,
-    # there is no reasonable value to assign to this vertex.
-    # in this case we return NaN for this vertex.
-    texture[np.asarray(proj.sum(axis=1) == 0).ravel()] = np.nan
-    return texture.T
+    return operator.project(data).T
 
 
 def _interpolation_sampling(images, mesh, affine, kind='auto', radius=3,
@@ -439,29 +628,12 @@ def _interpolation_sampling(images, mesh, affine, kind='auto', radius=3,
     See documentation of vol_to_surf for details.
 
     """
-    sample_locations = _sample_locations(
-        mesh, affine, kind=kind, radius=radius, n_points=n_points,
-        inner_mesh=inner_mesh, depth=depth)
-    n_vertices, n_points, _ = sample_locations.shape
-    grid = [np.arange(size) for size in images[0].shape]
-    interp_locations = np.vstack(sample_locations)
-    masked = _masked_indices(interp_locations, images[0].shape, mask=mask)
-    # loop over images rather than building a big array to use less memory
-    all_samples = []
-    for img in images:
-        interpolator = interpolate.RegularGridInterpolator(
-            grid, img,
-            bounds_error=False, method='linear', fill_value=None)
-        samples = interpolator(interp_locations)
-        # if all samples around a mesh vertex are outside the image,
-        # there is no reasonable value to assign to this vertex.
-        # in this case we return NaN for this vertex.
-        samples[masked] = np.nan
-        all_samples.append(samples)
-    all_samples = np.asarray(all_samples)
-    all_samples = all_samples.reshape((len(images), n_vertices, n_points))
-    texture = np.nanmean(all_samples, axis=2)
-    return texture
+    operator = _projection_operator(
+        mesh, affine, images[0].shape, interpolation='linear', kind=kind,
+        radius=radius, n_points=n_points, mask=mask, inner_mesh=inner_mesh,
+        depth=depth)
+    data = np.asarray(images).reshape(len(images), -1).T
+    return operator.project(data).T
 
 
 def vol_to_surf(img, surf_mesh,
@@ -495,9 +667,8 @@ def vol_to_surf(img, surf_mesh,
         - 'nearest':
             Use the intensity of the nearest voxel.
 
-        For one image, the speed difference is small, 'linear' takes about x1.5
-        more time. For many images, 'nearest' scales much better, up to x20
-        faster.
+        'linear' takes about x2 more time, for one image as well as for
+        many images.
 
     kind : {'auto', 'depth', 'line', 'ball'}, default='auto'
         The strategy used to sample image intensities around each vertex.
@@ -602,14 +773,18 @@ def vol_to_surf(img, surf_mesh,
     voxel, and 'linear' performs trilinear interpolation of neighbouring
     voxels. 'linear' may give better results - for example, the projected
     values are more stable when resampling the 3d image or applying affine
-    transformations to it. For one image, the speed difference is small,
-    'linear' takes about x1.5 more time. For many images, 'nearest' scales much
-    better, up to x20 faster.
+    transformations to it. 'linear' takes about x2 more time.
 
     Once the 3d image has been interpolated at each sample point, the
     interpolated values are averaged to produce the value associated to this
     particular mesh vertex.
 
+    The interpolation and the averaging are linear, so they are stored in a
+    sparse matrix which projects all the images at once. The last few
+    matrices are kept in memory, so projecting other images with the same
+    shape and affine onto the same mesh, with the same parameters, does not
+    compute them again.
+
     Examples
     --------
     When both the pial and white matter surface are available, the recommended
@@ -626,11 +801,9 @@ def vol_to_surf(img, surf_mesh,
      ... )
 
     """
-    sampling_schemes = {'linear': _interpolation_sampling,
-                        'nearest': _nearest_voxel_sampling}
-    if interpolation not in sampling_schemes:
+    if interpolation not in ('linear', 'nearest'):
         raise ValueError("'interpolation' should be one of "
-                         f"{tuple(sampling_schemes.keys())}")
+                         f"{('linear', 'nearest')}")
     img = load_img(img)
     if mask_img is not None:
         mask_img = _utils.check_niimg(mask_img)
@@ -640,17 +813,18 @@ def vol_to_surf(img, surf_mesh,
         mask = None
     original_dimension = len(img.shape)
     img = _utils.check_niimg(img, atleast_4d=True)
-    frames = np.rollaxis(get_data(img), -1)
-    mesh = load_surf_mesh(surf_mesh)
-    if inner_mesh is not None:
-        inner_mesh = load_surf_mesh(inner_mesh)
-    sampling = sampling_schemes[interpolation]
-    texture = sampling(
-        frames, mesh, img.affine, radius=radius, kind=kind,
-        n_points=n_samples, mask=mask, inner_mesh=inner_mesh, depth=depth)
+    operator = _projection_operator(
+        surf_mesh, img.affine, img.shape[:3], interpolation=interpolation,
+        kind=kind, radius=radius, n_points=n_samples, mask=mask,
+        inner_mesh=inner_mesh, depth=depth)
+    data = get_data(img)
+    # avoid copying images stored in Fortran order
+    order = 'F' if np.isfortran(data) else 'C'
+    texture = operator.project(
+        data.reshape((-1, data.shape[-1]), order=order), order=order)
     if original_dimension == 3:
-        texture = texture[0]
-    return texture.T
+        texture = texture[:, 0]
+    return texture
 
 
 def _load_surf_files_gifti_gzip(surf_file):
@@ -9,6 +9,7 @@ import numpy as np
 import pytest
 from nibabel import gifti
 from numpy.testing import assert_array_almost_equal, assert_array_equal
+from scipy import interpolate
 from scipy.spatial import Delaunay
 from scipy.stats import pearsonr
 
@@ -730,6 +731,60 @@ def test_sampling_between_surfaces(projection, affine_eye):
         projection.ravel(), img[:, :, 1:4].mean(axis=-1).ravel())
 
 
+@pytest.mark.parametrize("projection", ["linear", "nearest"])
+def test_projection_operator(projection, affine_eye, rng):
+    mesh = flat_mesh(5, 7, 4)
+    img = rng.standard_normal((5, 7, 13, 3))
+    img[2, 3, 4:6, 1] = np.nan
+    # samples beyond the last voxel are extrapolated
+    sample_locations = rng.uniform(-.5, 6.5, size=(20, 4, 3))
+    operator = surface._ProjectionOperator(
+        sample_locations, img.shape[:3], interpolation=projection)
+    data = img.reshape((-1, 3))
+    texture = operator.project(data)
+    assert texture.shape == (20, 3)
+    assert_array_almost_equal(
+        operator.project(img.reshape((-1, 3), order="F"), order="F"),
+        texture)
+    masked = surface._masked_indices(
+        sample_locations.reshape((-1, 3)), img.shape[:3])
+    if projection == "linear":
+        grid = [np.arange(size) for size in img.shape[:3]]
+        expected = np.empty((20, 4, 3))
+        for i in range(3):
+            expected[..., i] = interpolate.RegularGridInterpolator(
+                grid, img[..., i], bounds_error=False, fill_value=None)(
+                    sample_locations)
+        expected[masked.reshape((20, 4))] = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            expected = np.nanmean(expected, axis=1)
+        assert_array_almost_equal(texture, expected)
+    assert_array_equal(
+        operator.empty, masked.reshape((20, 4)).all(axis=1))
+    assert np.isnan(texture[operator.empty]).all()
+
+    # operators are cached according to the sampling parameters
+    surface._projection_cache.clear()
+    operator = surface._projection_operator(
+        mesh, affine_eye, img.shape[:3], interpolation=projection,
+        radius=2.)
+    same_operator = surface._projection_operator(
+        [mesh[0].copy(), mesh[1]], affine_eye, img.shape[:3],
+        interpolation=projection, radius=2)
+    assert same_operator is operator
+    other_operator = surface._projection_operator(
+        mesh, affine_eye, img.shape[:3], interpolation=projection,
+        radius=1.)
+    assert other_operator != operator
+    assert len({operator, same_operator, other_operator}) == 2
+    assert_array_almost_equal(
+        surface.vol_to_surf(
+            nb.Nifti1Image(img, affine_eye), mesh, radius=2.,
+            interpolation=projection),
+        operator.project(data))
+
+
 def test_choose_kind():
     kind = surface._choose_kind("abc", None)
     assert kind == "abc"
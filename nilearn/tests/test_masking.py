@@ -341,6 +341,44 @@ def test_apply_mask(affine_eye, tmp_path):
         masking.apply_mask(Nifti1Image(data, affine), mask_img)
 
 
+@pytest.mark.parametrize("file_name", [None, "img.nii", "img.nii.gz"])
+def test_apply_mask_by_slabs(
+    monkeypatch, rng, affine_eye, tmp_path, file_name
+):
+    """Images are masked by slabs of scans into the output."""
+    data = rng.standard_normal((7, 8, 9, 11)).astype("float32")
+    data[2, 3, 4, 5] = np.nan
+    mask = rng.randint(2, size=data.shape[:3]).astype("int8")
+    mask[0, 0, 0] = 1
+    img = Nifti1Image(data, affine_eye)
+    if file_name is not None:
+        img.to_filename(tmp_path / file_name)
+        img = str(tmp_path / file_name)
+    mask_img = Nifti1Image(mask, affine_eye)
+    expected = np.nan_to_num(data[mask.astype(bool)].T)
+
+    # slabs of 2 scans
+    monkeypatch.setattr(masking, "_MASK_SLAB_SIZE", mask.size * 4 * 2)
+    series = masking.apply_mask(img, mask_img)
+
+    assert series.dtype == np.float32
+    assert_array_equal(series, expected)
+
+    out = np.lib.format.open_memmap(
+        tmp_path / "series.npy",
+        mode="w+",
+        dtype="float64",
+        shape=expected.shape,
+    )
+    series = masking.apply_mask(img, mask_img, out=out)
+
+    assert series is out
+    assert_array_equal(np.load(tmp_path / "series.npy"), expected)
+
+    with pytest.raises(ValueError, match="'out' has shape"):
+        masking.apply_mask(img, mask_img, out=out[1:])
+
+
 def test_unmask(rng, affine_eye, tmp_path):
     # A delta in 3D
     shape = (10, 20, 30, 40)
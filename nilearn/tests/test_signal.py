@@ -233,6 +233,67 @@ def test_butterworth(rng):
         )
 
 
+@pytest.mark.parametrize("padtype", ["odd", "constant", None])
+@pytest.mark.parametrize(
+    "low_pass, high_pass", [(0.1, 0.01), (0.1, None), (None, 0.01)]
+)
+def test_butterworth_matrix_form(rng, low_pass, high_pass, padtype):
+    """Short signals filtered with a matrix give the same results \
+    as recursive filtering."""
+    n_samples = nisignal._FILTER_MATRIX_MAX_SAMPLES
+    data = rng.standard_normal(size=(n_samples, 7))
+    design = nisignal._butterworth_design(
+        0.5, low_pass=low_pass, high_pass=high_pass
+    )
+    order, critical_freq, btype, sampling_rate = design
+    b, a = scipy.signal.butter(
+        order, critical_freq, btype=btype, fs=sampling_rate
+    )
+    expected = scipy.signal.filtfilt(b, a, data, axis=0, padtype=padtype)
+
+    out = nisignal.butterworth(
+        data,
+        0.5,
+        low_pass=low_pass,
+        high_pass=high_pass,
+        padtype=padtype,
+        copy=True,
+    )
+
+    np.testing.assert_allclose(out, expected, atol=1e-8)
+    np.testing.assert_allclose(
+        out[:, 0],
+        nisignal.butterworth(
+            data[:, 0],
+            0.5,
+            low_pass=low_pass,
+            high_pass=high_pass,
+            padtype=padtype,
+            copy=True,
+        ),
+        atol=1e-12,
+    )
+
+
+def test_butterworth_cache(rng):
+    """Filters are designed once for identical parameters."""
+    nisignal._butterworth_sos.cache_clear()
+    nisignal._butterworth_operator.cache_clear()
+    data = rng.standard_normal(size=(40, 3))
+
+    for _ in range(3):
+        nisignal.butterworth(data, 0.5, low_pass=0.1, copy=True)
+
+    assert nisignal._butterworth_sos.cache_info().misses == 1
+    assert nisignal._butterworth_operator.cache_info().misses == 1
+    assert nisignal._butterworth_operator.cache_info().hits == 2
+
+    with pytest.raises(ValueError, match="read-only"):
+        nisignal._butterworth_operator(
+            nisignal._butterworth_design(0.5, low_pass=0.1), 40, "odd", 18
+        )[0, 0] = 0
+
+
 def test_standardize(rng):
     n_features = 10
     n_samples = 17
@@ -789,6 +850,36 @@ def test_clean_finite_no_inplace_mod():
     assert np.isnan(x_orig_with_nans[0, 0])
 
 
+@pytest.mark.parametrize("standardize", [False, "zscore_sample", "psc"])
+def test_clean_by_blocks(monkeypatch, rng, standardize):
+    """Cleaning by column blocks does not change the result or the dtype."""
+    n_samples, n_features = 60, 23
+    signals = rng.standard_normal((n_samples, n_features)) + 10
+    confounds = rng.standard_normal((n_samples, 3))
+    sample_mask = np.arange(n_samples)[2:]
+    kwargs = dict(
+        confounds=confounds,
+        standardize=standardize,
+        sample_mask=sample_mask,
+        t_r=2.0,
+        low_pass=0.1,
+        high_pass=0.01,
+    )
+    signals_orig = signals.copy()
+
+    expected = clean(signals, **kwargs)
+    monkeypatch.setattr(nisignal, "_CLEAN_BLOCK_SIZE", n_samples * 4)
+    cleaned = clean(signals, **kwargs)
+
+    np.testing.assert_allclose(cleaned, expected)
+    np.testing.assert_array_equal(signals, signals_orig)
+
+    cleaned = clean(signals.astype(np.float32), **kwargs)
+
+    assert cleaned.dtype == np.float32
+    np.testing.assert_allclose(cleaned, expected, rtol=1e-3, atol=1e-3)
+
+
 def test_high_variance_confounds():
     # C and F order might take different paths in the function. Check that the
     # result is identical.